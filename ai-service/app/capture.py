@@ -0,0 +1,319 @@
+"""Opt-in capture of sampled request traffic for offline replay.
+
+When CAPTURE_PATH is set, a CAPTURE_SAMPLE_RATE fraction of requests to
+the CAPTURE_ROUTES prefixes is recorded. The default prefixes are the
+matching, recommendations, fraud and skills routers. Each record holds
+the arrival time, the method, path, route template, the headers that
+change scoring, the request body, the response status and the latency.
+Records go to a gzip-compressed JSON-lines file, one per process. The
+file starts with a header line that carries the sample rate, so
+benchmarks.replay can rebuild the full traffic rate.
+
+The request path only tees the body and enqueues the record. A writer
+thread pseudonymizes, serializes and compresses it. When the bounded
+queue is full, records are dropped rather than slowing requests down.
+
+Bodies are pseudonymized before anything is written, by allowlist. Values
+of KEPT_FIELDS (skills, rates, budgets, counts and flags the services
+read) are kept. In free-text fields (bios, descriptions, proposals, chat
+text), every word that is not part of a skill name or a fraud phrase is
+replaced by a keyed pseudo-word of the same length. This keeps word
+counts, repetition, skill mentions and fraud phrases, which decide how
+much work a request causes. Every other value, including path and query
+parameters and any field of free-form payloads such as user_data, becomes
+a keyed hash, so equal values stay equal. Bodies that are not JSON, NDJSON
+or msgpack are not recorded.
+
+Set CAPTURE_SECRET to get the same pseudonyms across processes. Without
+it, each process hashes with a random key.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode
+import base64
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+
+from .metrics import counter
+
+CAPTURE_FORMAT_VERSION = 1
+DEFAULT_ROUTES = ("/api/matching", "/api/recommendations", "/api/fraud", "/api/skills")
+# Requests sent by benchmarks.replay are never captured again
+REPLAY_HEADER = b"x-replay"
+CAPTURED_HEADERS = (b"content-type", b"accept", b"x-latency-budget-ms")
+
+# Fields the services read as numbers, flags, skills or enums; their values are recorded as sent.
+# Every other string, number or flag, at any depth, is pseudonymized (a hash, or pseudo-words for TEXT_FIELDS),
+# so fields of free-form payloads such as user_data are never written in clear.
+KEPT_FIELDS = frozenset({
+    "skills", "required_skills", "freelancer_skills", "experience_level",
+    "hourly_rate", "experience_years", "completed_jobs", "avg_rating",
+    "budget_min", "budget_max", "preferred_rate", "price", "bid_amount", "job_budget",
+    "limit", "latency_budget_ms",
+    "account_age_days", "profile_completion", "email_verified", "phone_verified",
+    "failed_payments", "jobs_last_24h", "disputes", "fraud", "banned",
+    # Columnar typed arrays (app.models.columnar)
+    "dtype", "data", "shape",
+})
+TEXT_FIELDS = frozenset({
+    "bio", "freelancer_bio", "cover_letter", "proposal_text", "text", "job_description", "description", "title",
+})
+
+_WORD = re.compile(r"[^\W_]+")
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+CAPTURED_REQUESTS = counter("ai_capture_requests_total", "Sampled requests by capture outcome", ["result"])
+
+
+class Pseudonymizer:
+    def __init__(self, secret: bytes, keep_words: Iterable[str] = ()):
+        self._key = hashlib.blake2b(secret, digest_size=32).digest()
+        self.keep_words: FrozenSet[str] = frozenset(keep_words)
+
+    def identifier(self, value: Any) -> str:
+        return "h" + self._digest(f"id:{value}".encode(), 8).hex()
+
+    def text(self, value: str) -> str:
+        return _WORD.sub(self._word, value)
+
+    def payload(self, value: Any, field: Optional[str] = None) -> Any:
+        """Copy of a decoded body with every value outside KEPT_FIELDS replaced, at any depth"""
+        if isinstance(value, dict):
+            return {key: self.payload(item, key) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.payload(item, field) for item in value]
+        if value is None or field in KEPT_FIELDS:
+            return value
+        if field in TEXT_FIELDS and isinstance(value, str):
+            return self.text(value)
+        return self.identifier(value)
+
+    def _word(self, match: "re.Match") -> str:
+        word = match.group()
+        if word.lower() in self.keep_words:
+            return word
+        digest = self._digest(f"word:{word.lower()}".encode(), 64)
+        return "".join(_LETTERS[digest[i % 64] % 26] for i in range(len(word)))
+
+    def _digest(self, data: bytes, size: int) -> bytes:
+        return hashlib.blake2b(data, digest_size=size, key=self._key).digest()
+
+
+class TrafficCapture:
+    """Sampling policy plus a writer thread that appends pseudonymized records to a gzip JSON-lines file"""
+
+    def __init__(self, directory: str, sample_rate: float = 0.01, routes: Tuple[str, ...] = DEFAULT_ROUTES,
+                 secret: Optional[str] = None, max_body_bytes: int = 8 * 1024 * 1024, queue_size: int = 1000):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.routes = routes
+        self.max_body_bytes = max_body_bytes
+        self.path = os.path.join(directory, f"capture-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.jsonl.gz")
+        self.started = time.monotonic()
+        self._secret = secret.encode() if secret else secrets.token_bytes(32)
+        self._pseudonymizer: Optional[Pseudonymizer] = None
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def sampled(self, path: str) -> bool:
+        return path.startswith(self.routes) and random.random() < self.sample_rate
+
+    def offer(self, record: Dict[str, Any]) -> None:
+        """Hand a raw record to the writer thread; never blocks"""
+        with self._lock:
+            if self._writer is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._writer = threading.Thread(target=self._write, name="traffic-capture", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            CAPTURED_REQUESTS.inc(1, "dropped")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and finish the gzip stream"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    def _write(self) -> None:
+        header = {
+            "format_version": CAPTURE_FORMAT_VERSION,
+            "started_at": time.time() - (time.monotonic() - self.started),
+            "sample_rate": self.sample_rate,
+            "routes": list(self.routes),
+        }
+        with gzip.open(self.path, "at", encoding="utf-8") as out:
+            out.write(json.dumps(header) + "\n")
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    raw = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    raw = {}
+                if raw is None:
+                    return
+                record = None
+                if raw:
+                    try:
+                        record = self._record(raw)
+                    except Exception:
+                        CAPTURED_REQUESTS.inc(1, "unreadable")
+                if record is not None:
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    CAPTURED_REQUESTS.inc(1, "captured")
+                # A sync flush every second keeps the file readable up to there while it is still open
+                if time.monotonic() - last_flush >= 1.0:
+                    out.flush()
+                    last_flush = time.monotonic()
+
+    def _record(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        pseudonymizer = self._get_pseudonymizer()
+        path = raw["path"]
+        for value in raw["path_params"].values():
+            path = path.replace(f"/{value}", f"/{pseudonymizer.identifier(value)}", 1)
+        query = urlencode([
+            (key, value if key in KEPT_FIELDS else pseudonymizer.identifier(value))
+            for key, value in parse_qsl(raw["query"])
+        ])
+        content_type = raw["headers"].get("content-type", "")
+        body, encoding = _decode(raw["body"], content_type)
+        if encoding is None:
+            CAPTURED_REQUESTS.inc(1, "skipped")
+            return None
+        body = pseudonymizer.payload(body)
+        if encoding == "msgpack":
+            from .models.columnar import pack
+            body = base64.b64encode(pack(body)).decode()
+        return {
+            "t": round(raw["arrived"] - self.started, 6),
+            "method": raw["method"],
+            "path": path,
+            "route": raw["route"],
+            "query": query,
+            "headers": raw["headers"],
+            "encoding": encoding,
+            "body": body,
+            "status": raw["status"],
+            "duration_ms": round(raw["duration"] * 1000, 3),
+        }
+
+    def _get_pseudonymizer(self) -> Pseudonymizer:
+        if self._pseudonymizer is None:
+            from .services.chat_screening import BYPASS_PATTERNS, CHANNEL_PATTERNS, HIGH_RISK_PATTERNS
+            from .services.skills_service import get_skills_service
+            # Skill names and fraud phrases are not personal and decide how much work a request causes,
+            # so their words survive pseudonymization
+            phrases = [*get_skills_service().skill_vocabulary, *HIGH_RISK_PATTERNS, *CHANNEL_PATTERNS, *BYPASS_PATTERNS]
+            keep = {word for phrase in phrases for word in _WORD.findall(phrase.lower())}
+            self._pseudonymizer = Pseudonymizer(self._secret, keep)
+        return self._pseudonymizer
+
+
+def _decode(body: bytes, content_type: str) -> Tuple[Any, Optional[str]]:
+    """Decoded body and its encoding (json, ndjson, msgpack), or encoding None when it cannot be pseudonymized"""
+    media_type = content_type.split(";")[0].strip().lower()
+    if not body:
+        return None, "json"
+    try:
+        if media_type == "application/x-ndjson":
+            return [json.loads(line) for line in body.decode().splitlines() if line.strip()], "ndjson"
+        if media_type in ("application/x-msgpack", "application/msgpack"):
+            from .models.columnar import unpack
+            return unpack(body), "msgpack"
+        if media_type in ("", "application/json"):
+            return json.loads(body), "json"
+    except ValueError:
+        pass
+    return None, None
+
+
+@lru_cache()
+def get_traffic_capture() -> Optional[TrafficCapture]:
+    """Capture into CAPTURE_PATH, or None when capture is off"""
+    directory = os.getenv("CAPTURE_PATH")
+    if not directory:
+        return None
+    routes = tuple(r.strip() for r in os.getenv("CAPTURE_ROUTES", ",".join(DEFAULT_ROUTES)).split(",") if r.strip())
+    return TrafficCapture(
+        directory,
+        sample_rate=float(os.getenv("CAPTURE_SAMPLE_RATE", "0.01")),
+        routes=routes,
+        secret=os.getenv("CAPTURE_SECRET") or None,
+        max_body_bytes=int(os.getenv("CAPTURE_MAX_BODY_BYTES", str(8 * 1024 * 1024))),
+        queue_size=int(os.getenv("CAPTURE_QUEUE_SIZE", "1000")),
+    )
+
+
+class CaptureMiddleware:
+    """ASGI middleware that hands sampled HTTP requests to the TrafficCapture"""
+
+    def __init__(self, app, capture: Optional[TrafficCapture] = None):
+        self.app = app
+        self.capture = capture if capture is not None else get_traffic_capture()
+
+    async def __call__(self, scope, receive, send):
+        capture = self.capture
+        if (
+            capture is None
+            or scope["type"] != "http"
+            or not capture.sampled(scope.get("path", ""))
+            or any(name == REPLAY_HEADER for name, _ in scope.get("headers", []))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        size = {"bytes": 0}
+        status = {"code": None}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size["bytes"] += len(body)
+                if size["bytes"] <= capture.max_body_bytes:
+                    chunks.append(body)
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        arrived = time.monotonic()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.monotonic() - arrived
+            if size["bytes"] > capture.max_body_bytes:
+                CAPTURED_REQUESTS.inc(1, "too_large")
+            else:
+                route = scope.get("route")
+                capture.offer({
+                    "arrived": arrived,
+                    "duration": duration,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "route": getattr(route, "path", scope.get("path")),
+                    "path_params": dict(scope.get("path_params", {})),
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "headers": {
+                        name.decode(): value.decode("latin-1")
+                        for name, value in scope.get("headers", [])
+                        if name in CAPTURED_HEADERS
+                    },
+                    "body": b"".join(chunks),
+                    "status": status["code"],
+                })
@@ -0,0 +1,128 @@
+"""Per-request latency budgets and degraded scoring tiers.
+
+A request sets its budget with the ``X-Latency-Budget-Ms`` header or a
+``latency_budget_ms`` field. When both are given, the earlier deadline
+wins. Before the expensive stages, a scoring service estimates the cost of
+each tier and runs the first one that fits in the remaining budget. The
+tiers, from full quality down:
+
+- full: every score component
+- no_semantic_skills: skills count only on exact name matches
+- cached_embeddings: the above, with semantic scores only from embeddings
+  already in the EmbeddingService cache
+- skills_and_rate: exact skill matches and the rate/budget terms, no model
+
+The least precise tier used during a request is returned in the
+``X-Scoring-Tier`` response header. Every scoring call is counted in
+ai_scoring_tier_total. Requests without a budget always run the full tier.
+"""
+from typing import Callable, Iterator, Optional, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+from .metrics import counter
+
+TIERS = ("full", "no_semantic_skills", "cached_embeddings", "skills_and_rate")
+
+LATENCY_BUDGET_HEADER = b"x-latency-budget-ms"
+SCORING_TIER_HEADER = b"x-scoring-tier"
+
+# Planned work must fit in this share of the remaining budget; the rest covers
+# estimate error, validation and serialization
+BUDGET_SAFETY = 0.7
+
+SCORING_TIERS = counter("ai_scoring_tier_total", "Scoring calls per degradation tier", ["service", "tier"])
+
+
+class Deadline:
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.expires_at: Optional[float] = None
+        # Least precise tier used so far, as an index into TIERS
+        self.tier: Optional[int] = None
+        if budget_ms is not None:
+            self.limit(budget_ms)
+
+    def limit(self, budget_ms: float) -> None:
+        """Tighten the deadline to budget_ms from now; a later deadline never replaces an earlier one"""
+        expires_at = time.monotonic() + max(budget_ms, 0) / 1000
+        if self.expires_at is None or expires_at < self.expires_at:
+            self.expires_at = expires_at
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a budget"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+
+CURRENT_DEADLINE: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def choose_tier(service: str, estimate: Callable[[], Sequence[float]]) -> str:
+    """First tier whose estimated cost fits the current budget.
+
+    `estimate` returns seconds per tier, in TIERS order. It is only called
+    when the request has a budget.
+    """
+    deadline = CURRENT_DEADLINE.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    index = 0
+    if remaining is not None:
+        available = remaining * BUDGET_SAFETY
+        index = next((i for i, cost in enumerate(estimate()) if cost <= available), len(TIERS) - 1)
+    if deadline is not None:
+        deadline.tier = max(index, deadline.tier or 0)
+    SCORING_TIERS.inc(1, service, TIERS[index])
+    return TIERS[index]
+
+
+@contextmanager
+def latency_budget(budget_ms: Optional[float]) -> Iterator[None]:
+    """Apply a request-body budget for the duration of the block"""
+    deadline = CURRENT_DEADLINE.get()
+    if budget_ms is None:
+        yield
+        return
+    if deadline is not None:
+        deadline.limit(budget_ms)
+        yield
+        return
+    token = CURRENT_DEADLINE.set(Deadline(budget_ms))
+    try:
+        yield
+    finally:
+        CURRENT_DEADLINE.reset(token)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware that starts each request's Deadline and reports the tier it was scored at"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline()
+        for name, value in scope.get("headers", []):
+            if name == LATENCY_BUDGET_HEADER:
+                try:
+                    deadline.limit(float(value))
+                except ValueError:
+                    pass
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and deadline.tier is not None:
+                headers = list(message.get("headers", []))
+                headers.append((SCORING_TIER_HEADER, TIERS[deadline.tier].encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = CURRENT_DEADLINE.set(deadline)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            CURRENT_DEADLINE.reset(token)
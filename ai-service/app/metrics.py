@@ -0,0 +1,205 @@
+"""In-process metrics with Prometheus text exposition.
+
+Deliberately small: a metric update is a dict lookup plus an add, so the
+hot paths can stay instrumented in production. Label values are passed
+positionally in the order of the metric's label names.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextvars import ContextVar
+import functools
+import threading
+import time
+
+# Seconds; spans sub-millisecond skill lookups up to multi-second encodes
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+
+    def _labels(self, values: Tuple[str, ...]) -> str:
+        if not self.label_names:
+            return ""
+        pairs = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, values))
+        return "{" + pairs + "}"
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def total(self) -> float:
+        """Sum over all label sets"""
+        return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def total(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            base = list(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                pairs = ",".join(f'{k}="{v}"' for k, v in base + [("le", le)])
+                lines.append(f"{self.name}_bucket{{{pairs}}} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, label_names))
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    label_names: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, label_names, buckets))
+
+
+STAGE_SECONDS = histogram("ai_stage_duration_seconds", "Time spent per processing stage", ["stage"])
+TEXTS_ENCODED = counter("ai_texts_encoded_total", "Texts passed through the embedding model")
+TOKENS_PROCESSED = counter("ai_tokens_processed_total", "Tokens passed through the embedding model, excluding padding")
+ENCODE_BATCH_SIZE = histogram(
+    "ai_encode_batch_size", "Rows per embedding model forward pass", buckets=BATCH_SIZE_BUCKETS
+)
+CANDIDATES_SCORED = counter("ai_candidates_scored_total", "Candidates scored by the matching engine", ["direction"])
+CANDIDATES_PRUNED = counter(
+    "ai_candidates_pruned_total", "Candidates dropped before full scoring", ["direction", "reason"]
+)
+CACHE_REQUESTS = counter("ai_cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+
+# Per-request stage breakdown {stage: [seconds, calls]}, set only while a request is being profiled
+STAGE_BREAKDOWN: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("stage_breakdown", default=None)
+
+
+def _record_stage(stage: str, elapsed: float) -> None:
+    STAGE_SECONDS.observe(elapsed, stage)
+    breakdown = STAGE_BREAKDOWN.get()
+    if breakdown is not None:
+        entry = breakdown.get(stage)
+        if entry is None:
+            breakdown[stage] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+class timed:
+    """Records the elapsed time of a stage in ai_stage_duration_seconds.
+
+    Use as a context manager around a block, or as a decorator on a function.
+    """
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "timed":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _record_stage(self.stage, time.perf_counter() - self.start)
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_stage(stage, time.perf_counter() - start)
+
+        return wrapper
+
+
+def render() -> str:
+    return REGISTRY.render()
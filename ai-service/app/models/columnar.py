@@ -0,0 +1,172 @@
+"""Compact columnar wire format for backend-to-AI calls.
+
+Requests and responses are msgpack maps whose list-valued fields are
+sent as columns (one array per field) instead of one object per row.
+Numeric columns may be typed arrays, ``{"dtype": "<f8", "data": <bytes>}``,
+which decode straight into NumPy without per-row Python objects. Plain
+msgpack lists are accepted too. Missing floats are NaN.
+
+Embeddings can be shipped precomputed as a typed array with a "shape".
+"""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+
+import msgpack
+import numpy as np
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+
+class ColumnarError(ValueError):
+    """Malformed columnar payload"""
+
+
+def is_msgpack(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.split(";")[0].strip().lower() in (MSGPACK_MEDIA_TYPE, "application/msgpack")
+
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    return bool(accept) and any(is_msgpack(part) for part in accept.split(","))
+
+
+def unpack(body: bytes) -> Dict[str, Any]:
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ColumnarError(f"Invalid msgpack body: {e}")
+    if not isinstance(payload, dict):
+        raise ColumnarError("Columnar payload must be a map")
+    return payload
+
+
+def pack(payload: Dict[str, Any]) -> bytes:
+    return msgpack.packb(payload, default=_pack_default, use_bin_type=True)
+
+
+def typed_array(values: np.ndarray) -> Dict[str, Any]:
+    """Wire form of a NumPy array: dtype, shape and raw little-endian bytes"""
+    values = np.ascontiguousarray(values)
+    if values.dtype.byteorder == ">":
+        values = values.astype(values.dtype.newbyteorder("<"))
+    return {"dtype": values.dtype.str, "shape": list(values.shape), "data": values.tobytes()}
+
+
+def column(value: Any, dtype: str, length: int, name: str) -> np.ndarray:
+    """Decode a numeric column sent as a typed array or a plain list"""
+    try:
+        if isinstance(value, dict):
+            array = np.frombuffer(value["data"], dtype=np.dtype(value["dtype"]))
+            if "shape" in value:
+                array = array.reshape(value["shape"])
+            array = array.astype(dtype, copy=False)
+        else:
+            array = np.array([np.nan if v is None else v for v in value], dtype=dtype)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ColumnarError(f"Column '{name}' is not a valid {dtype} column: {e}")
+    if len(array) != length:
+        raise ColumnarError(f"Column '{name}' has {len(array)} rows, expected {length}")
+    return array
+
+
+def _string_column(columns: Dict[str, Any], name: str, length: int, default: Optional[str] = None) -> List[Any]:
+    values = columns.get(name)
+    if values is None:
+        if default is None:
+            raise ColumnarError(f"Missing column '{name}'")
+        return [default] * length
+    if not isinstance(values, list):
+        raise ColumnarError(f"Column '{name}' must be a list")
+    if len(values) != length:
+        raise ColumnarError(f"Column '{name}' has {len(values)} rows, expected {length}")
+    return values
+
+
+def _embedding_column(columns: Dict[str, Any], length: int) -> Optional[np.ndarray]:
+    value = columns.get("embedding")
+    if value is None:
+        return None
+    embeddings = column(value, "float32", length, "embedding")
+    if embeddings.ndim != 2:
+        raise ColumnarError("Column 'embedding' must be two-dimensional")
+    return embeddings
+
+
+@dataclass
+class FreelancerColumns:
+    user_id: List[str]
+    name: List[str]
+    skills: List[List[str]]
+    bio: List[Optional[str]]
+    hourly_rate: np.ndarray
+    experience_years: np.ndarray
+    completed_jobs: np.ndarray
+    avg_rating: np.ndarray
+    embedding: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.user_id)
+
+    @classmethod
+    def decode(cls, columns: Dict[str, Any]) -> "FreelancerColumns":
+        if not isinstance(columns, dict):
+            raise ColumnarError("Expected a map of columns")
+        user_id = columns.get("user_id")
+        if not isinstance(user_id, list):
+            raise ColumnarError("Missing column 'user_id'")
+        n = len(user_id)
+        return cls(
+            user_id=user_id,
+            name=_string_column(columns, "name", n),
+            skills=_string_column(columns, "skills", n),
+            bio=_string_column(columns, "bio", n, default=""),
+            hourly_rate=column(columns.get("hourly_rate", [None] * n), "float64", n, "hourly_rate"),
+            experience_years=column(columns.get("experience_years", [None] * n), "float64", n, "experience_years"),
+            completed_jobs=column(columns.get("completed_jobs", [0] * n), "int64", n, "completed_jobs"),
+            avg_rating=column(columns.get("avg_rating", [0.0] * n), "float64", n, "avg_rating"),
+            embedding=_embedding_column(columns, n),
+        )
+
+
+@dataclass
+class JobColumns:
+    job_id: List[str]
+    title: List[str]
+    description: List[str]
+    skills: List[List[str]]
+    budget_max: np.ndarray
+    embedding: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.job_id)
+
+    @classmethod
+    def decode(cls, columns: Dict[str, Any]) -> "JobColumns":
+        if not isinstance(columns, dict):
+            raise ColumnarError("Expected a map of columns")
+        job_id = columns.get("job_id")
+        if not isinstance(job_id, list):
+            raise ColumnarError("Missing column 'job_id'")
+        n = len(job_id)
+        return cls(
+            job_id=job_id,
+            title=_string_column(columns, "title", n, default=""),
+            description=_string_column(columns, "description", n, default=""),
+            skills=_string_column(columns, "skills", n),
+            budget_max=column(columns.get("budget_max", [None] * n), "float64", n, "budget_max"),
+            embedding=_embedding_column(columns, n),
+        )
+
+
+def columns_to_rows(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Row-oriented JSON form of a columnar result, for clients that did not ask for msgpack"""
+    names = list(columns)
+    values = [columns[name].tolist() if isinstance(columns[name], np.ndarray) else columns[name] for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _pack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return typed_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
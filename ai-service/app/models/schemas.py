@@ -58,6 +58,37 @@ class JobForMatching(BaseModel):
     budget_max: Optional[float] = None
 
 
+class TopFreelancerMatches(BaseModel):
+    job_id: str
+    matches: List[FreelancerMatch]
+    refreshed_at: float
+    pending_updates: int
+    # A queued change is older than the staleness bound; the list is served as is
+    stale: bool = False
+
+
+class TopJobMatches(BaseModel):
+    user_id: str
+    matches: List[JobMatch]
+    refreshed_at: float
+    pending_updates: int
+    # A queued change is older than the staleness bound; the list is served as is
+    stale: bool = False
+
+
+class FreelancerMatchPage(BaseModel):
+    matches: List[FreelancerMatch]
+    total: int
+    # Opaque; pass to GET /freelancers/ranked for the next page. None on the last page
+    next_cursor: Optional[str] = None
+
+
+class JobMatchPage(BaseModel):
+    matches: List[JobMatch]
+    total: int
+    next_cursor: Optional[str] = None
+
+
 class PriceRecommendation(BaseModel):
     recommended_price: float
     price_range_min: float
@@ -72,6 +103,11 @@ class ProposalQuality(BaseModel):
     suggestions: List[str]
 
 
+class RankedProposalQuality(ProposalQuality):
+    proposal_id: str
+    rank: int
+
+
 class FraudRisk(BaseModel):
     risk_score: float
     risk_level: str  # low, medium, high
@@ -79,6 +115,28 @@ class FraudRisk(BaseModel):
     recommendation: str
 
 
+class ChatMessageRisk(BaseModel):
+    conversation_id: str
+    message_id: Optional[str] = None
+    risk_score: float
+    risk_level: str  # low, medium, high
+    flags: List[str]
+    recommendation: str
+    # Decayed risk built up over the conversation, including this message
+    conversation_risk: float
+
+
+class AccountCluster(BaseModel):
+    user_id: str
+    cluster_size: int
+    linked_accounts: int
+    linked_fraud_accounts: int
+    linked_fraud_rate: float
+    linked_banned_accounts: int
+    # Identifier kinds (payment, device, ip, bio) that linked this account in the last observation
+    shared_identifiers: List[str] = []
+
+
 class SkillAnalysis(BaseModel):
     extracted_skills: List[str]
     skill_categories: dict
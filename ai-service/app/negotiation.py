@@ -0,0 +1,66 @@
+"""Content-Type negotiation between JSON and the columnar msgpack format.
+
+Endpoints keep their JSON signature and register a columnar variant with
+``accepts_columnar``. Routers built with ``route_class=ColumnarRoute``
+send msgpack request bodies to that variant on the same path. The
+variant returns a dict of columns. It is packed as msgpack when the
+client's Accept header asks for it, and converted to JSON rows otherwise.
+"""
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
+
+from .models.columnar import (
+    MSGPACK_MEDIA_TYPE,
+    ColumnarError,
+    accepts_msgpack,
+    columns_to_rows,
+    is_msgpack,
+    pack,
+    unpack,
+)
+
+ColumnarHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_COLUMNAR_HANDLERS: Dict[Callable, ColumnarHandler] = {}
+
+
+def accepts_columnar(handler: ColumnarHandler):
+    """Register `handler(payload) -> columns` as the msgpack variant of the decorated endpoint.
+
+    Apply it below the router decorator so it runs before the route is built.
+    """
+
+    def register(endpoint: Callable) -> Callable:
+        _COLUMNAR_HANDLERS[endpoint] = handler
+        return endpoint
+
+    return register
+
+
+class ColumnarRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        json_handler = super().get_route_handler()
+        columnar_handler = _COLUMNAR_HANDLERS.get(self.endpoint)
+        if columnar_handler is None:
+            return json_handler
+
+        async def route_handler(request: Request) -> Response:
+            if not is_msgpack(request.headers.get("content-type")):
+                return await json_handler(request)
+
+            try:
+                columns = columnar_handler(unpack(await request.body()))
+            except (ColumnarError, ValidationError) as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+
+            if accepts_msgpack(request.headers.get("accept")):
+                return Response(pack(columns), media_type=MSGPACK_MEDIA_TYPE)
+            return JSONResponse(columns_to_rows(columns))
+
+        return route_handler
@@ -0,0 +1,143 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it carries an ``X-Profile`` header equal to
+PROFILING_TOKEN, or when it is picked by PROFILING_SAMPLE_RATE. The
+profile combines cProfile output with the per-stage timings recorded by
+``app.metrics.timed``. Profiles are kept in a bounded ring buffer that the
+admin router exposes.
+
+cProfile sees every coroutine scheduled on the event loop while the
+request runs, so under concurrency a profile can include other requests'
+work. The stage breakdown is per request. Only one cProfile session runs
+at a time; overlapping sampled requests get only the stage breakdown.
+"""
+from typing import Any, Dict, List, Optional
+from collections import deque
+from functools import lru_cache
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+
+from .metrics import STAGE_BREAKDOWN
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfileStore:
+    """Fixed-size ring buffer of captured request profiles, oldest evicted first"""
+
+    def __init__(self, capacity: int = 50):
+        self._profiles: "deque[Dict[str, Any]]" = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return str(next(self._ids))
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries without the profiler text, newest first"""
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "profile"} for p in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((p for p in self._profiles if p["id"] == profile_id), None)
+
+
+@lru_cache()
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(capacity=int(os.getenv("PROFILING_BUFFER_SIZE", "50")))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected HTTP requests into the ProfileStore"""
+
+    def __init__(self, app, token: Optional[str] = None, sample_rate: Optional[float] = None,
+                 store: Optional[ProfileStore] = None, top_functions: int = 40):
+        self.app = app
+        self.token = (token if token is not None else os.getenv("PROFILING_TOKEN", "")).encode()
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+        self.store = store or get_profile_store()
+        self.top_functions = top_functions
+        self._profiler_busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        breakdown: Dict[str, List[float]] = {}
+        context_token = STAGE_BREAKDOWN.set(breakdown)
+        profiler = cProfile.Profile() if self._profiler_busy.acquire(blocking=False) else None
+        profile_id = self.store.new_id()
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiler_busy.release()
+            STAGE_BREAKDOWN.reset(context_token)
+            duration = time.perf_counter() - start
+
+            self.store.add({
+                "id": profile_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status["code"],
+                "trigger": trigger,
+                "started_at": started_at,
+                "duration_ms": round(duration * 1000, 3),
+                "stages": {
+                    stage: {"seconds": round(seconds, 6), "calls": int(calls)}
+                    for stage, (seconds, calls) in sorted(breakdown.items(), key=lambda kv: -kv[1][0])
+                },
+                "profile": self._format(profiler) if profiler is not None else None,
+            })
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER and value == self.token:
+                    return "header"
+        # Never sample the admin endpoints that read profiles back
+        if self.sample_rate > 0 and not scope.get("path", "").startswith("/admin") and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def _format(self, profiler: cProfile.Profile) -> str:
+        out = io.StringIO()
+        try:
+            stats = pstats.Stats(profiler, stream=out)
+        except TypeError:
+            # Nothing was recorded
+            return ""
+        stats.sort_stats("cumulative").print_stats(self.top_functions)
+        return out.getvalue()
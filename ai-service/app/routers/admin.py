@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+from pydantic import BaseModel
+import asyncio
+import os
+from ..profiling import get_profile_store
+from ..services.linkage_graph import get_linkage_graph
+from ..services.snapshot_service import get_snapshot_service
+from ..services.model_migration import MigrationError, get_model_migrations
+
+router = APIRouter()
+profile_store = get_profile_store()
+model_migrations = get_model_migrations()
+
+
+class EmbeddingModelMigrationRequest(BaseModel):
+    model: str
+    # Projection fitted for the new model (fit_projection.py); two-stage search is off without one
+    projection_path: Optional[str] = None
+    # Switch as soon as every known text is re-encoded; defaults to MODEL_MIGRATION_AUTO_SWITCH
+    auto_switch: Optional[bool] = None
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and then require it"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or x_admin_token != expected:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Captured request profiles, newest first, without profiler output"""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """A captured request profile with its stage breakdown and cProfile output"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or evicted")
+    return profile
+
+
+@router.post("/snapshot", dependencies=[Depends(require_admin)])
+async def write_snapshot():
+    """Write the warm state (embedding cache, skill vocabulary, indexes) to a new bundle under SNAPSHOT_PATH"""
+    snapshots = get_snapshot_service()
+    if snapshots is None:
+        raise HTTPException(status_code=404, detail="Snapshots are disabled (SNAPSHOT_PATH is not set)")
+    try:
+        return snapshots.write()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/linkage/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_linkage_graph():
+    """Expire account linkage observations older than FRAUD_LINKAGE_MAX_AGE_DAYS and re-link the rest"""
+    try:
+        return await asyncio.to_thread(get_linkage_graph().rebuild)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/snapshot", dependencies=[Depends(require_admin)])
+async def get_snapshot():
+    """Manifest of the current bundle and the outcome of the startup restore"""
+    snapshots = get_snapshot_service()
+    if snapshots is None:
+        raise HTTPException(status_code=404, detail="Snapshots are disabled (SNAPSHOT_PATH is not set)")
+    try:
+        manifest = snapshots.manifest()
+    except (OSError, ValueError):
+        manifest = None
+    return {"current": manifest, "restore": snapshots.last_restore}
+
+
+@router.get("/embedding-model", dependencies=[Depends(require_admin)])
+async def get_embedding_model():
+    """Active embedding model and the progress of the latest migration: coverage, state, shadow ranking overlap"""
+    current = model_migrations.current
+    return {
+        "active_model": model_migrations.embedding_service.active_space.name,
+        "migration": current.summary() if current is not None else None,
+    }
+
+
+@router.post("/embedding-model", dependencies=[Depends(require_admin)])
+async def start_embedding_model_migration(request: EmbeddingModelMigrationRequest):
+    """Load another embedding model and re-encode known texts into it in the background"""
+    try:
+        migration = model_migrations.start(request.model, request.projection_path, request.auto_switch)
+    except MigrationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return migration.summary()
+
+
+@router.post("/embedding-model/switch", dependencies=[Depends(require_admin)])
+async def switch_embedding_model(force: bool = False):
+    """Serve traffic from the migration's model; `force` switches before re-encoding is complete"""
+    migration = model_migrations.current
+    if migration is None:
+        raise HTTPException(status_code=404, detail="No embedding model migration")
+    try:
+        await migration.switch(force=force)
+    except MigrationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return migration.summary()
+
+
+@router.delete("/embedding-model", dependencies=[Depends(require_admin)])
+async def cancel_embedding_model_migration():
+    """Stop the migration and keep serving from the active model"""
+    migration = model_migrations.current
+    if migration is None:
+        raise HTTPException(status_code=404, detail="No embedding model migration")
+    try:
+        migration.cancel()
+    except MigrationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return migration.summary()
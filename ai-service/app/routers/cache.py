@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from .admin import require_admin
+from ..services.cache_service import get_response_cache
+from ..services.semantic_cache import get_semantic_match_cache
+
+router = APIRouter()
+response_cache = get_response_cache()
+
+
+@router.delete("/{route}", dependencies=[Depends(require_admin)])
+async def invalidate_route(route: str):
+    """Invalidate every cached response for a route (e.g. skills.related)"""
+    try:
+        removed = await response_cache.invalidate_route(route)
+        return {"route": route, "removed": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def cache_stats():
+    """Response cache hit/miss counters for this process"""
+    return response_cache.stats
+
+
+@router.get("/semantic/stats")
+async def semantic_cache_stats():
+    """Semantic match cache hit rate and top-k overlap of verified hits, for this process"""
+    return get_semantic_match_cache().summary()
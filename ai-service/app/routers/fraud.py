@@ -1,11 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 from ..services.fraud_service import FraudDetectionService
-from ..models.schemas import FraudRisk
+from ..services.linkage_graph import account_identifiers
+from ..services.chat_screening import get_chat_screening_service
+from ..models.schemas import AccountCluster, ChatMessageRisk, FraudRisk
 
 router = APIRouter()
 fraud_service = FraudDetectionService()
+chat_screening = get_chat_screening_service()
 
 
 class UserRiskRequest(BaseModel):
@@ -21,6 +24,27 @@ class ProposalRiskRequest(BaseModel):
     proposal_data: dict
 
 
+class LinkageObservation(BaseModel):
+    user_id: str
+    payment_fingerprints: List[str] = []
+    device_ids: List[str] = []
+    ip_addresses: List[str] = []
+    bio: Optional[str] = None
+
+
+class ChatMessage(BaseModel):
+    conversation_id: str
+    text: str
+    # Echoed back so streaming clients can pair results with messages
+    message_id: Optional[str] = None
+
+
+class AccountLabel(BaseModel):
+    # None leaves a label unchanged
+    fraud: Optional[bool] = None
+    banned: Optional[bool] = None
+
+
 @router.post("/user", response_model=FraudRisk)
 async def analyze_user_risk(request: UserRiskRequest):
     """Analyze fraud risk for a user"""
@@ -52,3 +76,85 @@ async def analyze_proposal_risk(request: ProposalRiskRequest):
         return risk
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat", response_model=ChatMessageRisk)
+async def screen_chat_message(request: ChatMessage):
+    """Screen a chat message for off-platform payment solicitation, in the context of its conversation"""
+    try:
+        return chat_screening.screen_message(request.conversation_id, request.text, request.message_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.websocket("/chat/stream")
+async def stream_chat_screening(websocket: WebSocket):
+    """Persistent screening connection: one ChatMessage JSON frame in, one ChatMessageRisk frame out, in order.
+
+    A frame that is binary or does not parse gets {"error": ...} back and the connection stays open.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            if frame.get("text") is None:
+                await websocket.send_json({"error": "Expected a text frame with a ChatMessage JSON object"})
+                continue
+            try:
+                message = ChatMessage.model_validate_json(frame["text"])
+            except ValidationError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            risk = chat_screening.screen_message(message.conversation_id, message.text, message.message_id)
+            await websocket.send_text(risk.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+
+
+@router.delete("/chat/{conversation_id}")
+async def forget_conversation(conversation_id: str):
+    """Drop a conversation's rolling screening state, e.g. once it is closed"""
+    return {"forgotten": chat_screening.forget(conversation_id)}
+
+
+def _cluster(user_id: str, shared: Optional[List[str]] = None) -> AccountCluster:
+    features = fraud_service.linkage_graph.features(user_id)
+    return AccountCluster(
+        user_id=user_id,
+        cluster_size=features.cluster_size,
+        linked_accounts=features.linked_accounts,
+        linked_fraud_accounts=features.linked_fraud_accounts,
+        linked_fraud_rate=round(features.linked_fraud_rate, 4),
+        linked_banned_accounts=features.linked_banned_accounts,
+        shared_identifiers=shared or [],
+    )
+
+
+@router.post("/linkage", response_model=AccountCluster)
+async def observe_account_identifiers(request: LinkageObservation):
+    """Link an account to others sharing its payment instruments, devices, IPs or bio (e.g. on login or payout setup)"""
+    try:
+        shared = fraud_service.linkage_graph.observe(
+            request.user_id, account_identifiers(request.model_dump()), request.bio
+        )
+        return _cluster(request.user_id, shared)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/linkage/{user_id}/label", response_model=AccountCluster)
+async def label_account(user_id: str, request: AccountLabel):
+    """Mark an account as confirmed fraud or banned; linked accounts' risk reflects it immediately"""
+    try:
+        fraud_service.linkage_graph.label(user_id, fraud=request.fraud, banned=request.banned)
+        return _cluster(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/linkage/{user_id}", response_model=AccountCluster)
+async def get_account_cluster(user_id: str):
+    """Cluster features of an account; unknown accounts are a cluster of one"""
+    return _cluster(user_id)
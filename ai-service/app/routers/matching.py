@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic import BaseModel, ValidationError
+import json
+import os
+from ..deadline import latency_budget
+from ..negotiation import ColumnarRoute, accepts_columnar
 from ..services.matching_service import MatchingService
-from ..models.schemas import FreelancerProfile, FreelancerMatch, JobMatch
+from ..services.ranking_sessions import CursorError, get_ranking_sessions
+from ..models.schemas import FreelancerProfile, FreelancerMatch, JobMatch, FreelancerMatchPage, JobMatchPage
+from ..models.columnar import FreelancerColumns, JobColumns
 
-router = APIRouter()
+router = APIRouter(route_class=ColumnarRoute)
 matching_service = MatchingService()
+ranking_sessions = get_ranking_sessions()
+
+# Candidates scored per batch on the streaming endpoints
+STREAM_CHUNK_SIZE = int(os.getenv("MATCHING_STREAM_CHUNK_SIZE", "256"))
 
 
 class MatchFreelancersRequest(BaseModel):
@@ -15,6 +25,8 @@ class MatchFreelancersRequest(BaseModel):
     budget_min: Optional[float] = None
     budget_max: Optional[float] = None
     limit: int = 20
+    # Degrade scoring rather than exceed this; the X-Latency-Budget-Ms header works too
+    latency_budget_ms: Optional[float] = None
 
 
 class MatchJobsRequest(BaseModel):
@@ -23,36 +35,250 @@ class MatchJobsRequest(BaseModel):
     jobs: List[dict]
     preferred_rate: Optional[float] = None
     limit: int = 20
+    latency_budget_ms: Optional[float] = None
+
+
+class MatchFreelancersStreamHeader(BaseModel):
+    job_description: str
+    required_skills: List[str]
+    budget_min: Optional[float] = None
+    budget_max: Optional[float] = None
+    limit: int = 20
+
+
+class MatchJobsStreamHeader(BaseModel):
+    freelancer_skills: List[str]
+    freelancer_bio: str
+    preferred_rate: Optional[float] = None
+    limit: int = 20
+
+
+def _match_freelancers_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    header = MatchFreelancersStreamHeader.model_validate({k: v for k, v in payload.items() if k != "freelancers"})
+    return matching_service.match_freelancer_columns(
+        job_description=header.job_description,
+        required_skills=header.required_skills,
+        columns=FreelancerColumns.decode(payload.get("freelancers", {})),
+        budget_min=header.budget_min,
+        budget_max=header.budget_max,
+        limit=header.limit
+    )
+
+
+def _match_jobs_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    header = MatchJobsStreamHeader.model_validate({k: v for k, v in payload.items() if k != "jobs"})
+    return matching_service.match_job_columns(
+        freelancer_skills=header.freelancer_skills,
+        freelancer_bio=header.freelancer_bio,
+        columns=JobColumns.decode(payload.get("jobs", {})),
+        preferred_rate=header.preferred_rate,
+        limit=header.limit
+    )
 
 
 @router.post("/freelancers", response_model=List[FreelancerMatch])
+@accepts_columnar(_match_freelancers_columnar)
 async def match_freelancers(request: MatchFreelancersRequest):
-    """Match freelancers to a job posting"""
-    try:
-        matches = matching_service.match_freelancers_to_job(
-            job_description=request.job_description,
-            required_skills=request.required_skills,
-            freelancers=request.freelancers,
-            budget_min=request.budget_min,
-            budget_max=request.budget_max,
-            limit=request.limit
-        )
+    """Match freelancers to a job posting.
+
+    Also accepts the columnar msgpack format (Content-Type: application/x-msgpack)
+    with `freelancers` sent as columns; see app.models.columnar.
+    """
+    try:
+        with latency_budget(request.latency_budget_ms):
+            matches = matching_service.match_freelancers_to_job(
+                job_description=request.job_description,
+                required_skills=request.required_skills,
+                freelancers=request.freelancers,
+                budget_min=request.budget_min,
+                budget_max=request.budget_max,
+                limit=request.limit
+            )
         return matches
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/jobs", response_model=List[JobMatch])
+@accepts_columnar(_match_jobs_columnar)
 async def match_jobs(request: MatchJobsRequest):
-    """Match jobs to a freelancer"""
-    try:
-        matches = matching_service.match_jobs_to_freelancer(
-            freelancer_skills=request.freelancer_skills,
-            freelancer_bio=request.freelancer_bio,
-            jobs=request.jobs,
-            preferred_rate=request.preferred_rate,
-            limit=request.limit
-        )
+    """Match jobs to a freelancer; also accepts `jobs` as msgpack columns"""
+    try:
+        with latency_budget(request.latency_budget_ms):
+            matches = matching_service.match_jobs_to_freelancer(
+                freelancer_skills=request.freelancer_skills,
+                freelancer_bio=request.freelancer_bio,
+                jobs=request.jobs,
+                preferred_rate=request.preferred_rate,
+                limit=request.limit
+            )
         return matches
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/freelancers/ranked", response_model=FreelancerMatchPage)
+async def rank_freelancers(request: MatchFreelancersRequest):
+    """First page of a full freelancer ranking; `limit` is the page size.
+
+    Later pages come from GET /freelancers/ranked with the returned cursor
+    and are served from the stored ranking without rescoring.
+    """
+    try:
+        with latency_budget(request.latency_budget_ms):
+            freelancers, components = matching_service.rank_freelancers_to_job(
+                job_description=request.job_description,
+                required_skills=request.required_skills,
+                freelancers=request.freelancers,
+                budget_min=request.budget_min,
+                budget_max=request.budget_max
+            )
+        matches, next_cursor, total = ranking_sessions.start(
+            "freelancers_to_job", freelancers, components, matching_service._build_freelancer_match, request.limit
+        )
+        return FreelancerMatchPage(matches=matches, total=total, next_cursor=next_cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/freelancers/ranked", response_model=FreelancerMatchPage)
+async def next_ranked_freelancers(cursor: str, limit: Optional[int] = None):
+    """Next page of a freelancer ranking; 410 once the ranking has expired"""
+    matches, next_cursor, total = _next_page("freelancers_to_job", cursor, limit)
+    return FreelancerMatchPage(matches=matches, total=total, next_cursor=next_cursor)
+
+
+@router.post("/jobs/ranked", response_model=JobMatchPage)
+async def rank_jobs(request: MatchJobsRequest):
+    """First page of a full job ranking; `limit` is the page size"""
+    try:
+        with latency_budget(request.latency_budget_ms):
+            jobs, components = matching_service.rank_jobs_to_freelancer(
+                freelancer_skills=request.freelancer_skills,
+                freelancer_bio=request.freelancer_bio,
+                jobs=request.jobs,
+                preferred_rate=request.preferred_rate
+            )
+        matches, next_cursor, total = ranking_sessions.start(
+            "jobs_to_freelancer", jobs, components, matching_service._build_job_match, request.limit
+        )
+        return JobMatchPage(matches=matches, total=total, next_cursor=next_cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/ranked", response_model=JobMatchPage)
+async def next_ranked_jobs(cursor: str, limit: Optional[int] = None):
+    """Next page of a job ranking; 410 once the ranking has expired"""
+    matches, next_cursor, total = _next_page("jobs_to_freelancer", cursor, limit)
+    return JobMatchPage(matches=matches, total=total, next_cursor=next_cursor)
+
+
+def _next_page(direction: str, cursor: str, limit: Optional[int]) -> tuple:
+    try:
+        page = ranking_sessions.next(direction, cursor, limit)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=410, detail="Ranking expired; request the first page again")
+    return page
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield non-empty lines of an NDJSON body as they arrive"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _read_header(lines: AsyncIterator[bytes], model: type) -> BaseModel:
+    try:
+        return model.model_validate_json(await lines.__anext__())
+    except StopAsyncIteration:
+        raise HTTPException(status_code=422, detail="Empty body: expected a header line")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Line 1: {e.errors()}")
+
+
+@router.post("/freelancers/stream", response_model=List[FreelancerMatch])
+async def match_freelancers_stream(request: Request):
+    """Match freelancers sent as NDJSON: a header line, then one FreelancerProfile per line.
+
+    Profiles are validated and scored in chunks as the body streams in, and
+    only the best `limit` are kept, so memory does not grow with candidate count.
+    """
+    lines = _ndjson_lines(request)
+    header = await _read_header(lines, MatchFreelancersStreamHeader)
+    try:
+        matcher = matching_service.stream_freelancers_to_job(
+            job_description=header.job_description,
+            required_skills=header.required_skills,
+            budget_min=header.budget_min,
+            budget_max=header.budget_max,
+            limit=header.limit,
+            chunk_size=STREAM_CHUNK_SIZE
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    line_number = 1
+    async for line in lines:
+        line_number += 1
+        try:
+            freelancer = FreelancerProfile.model_validate_json(line)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Line {line_number}: {e.errors()}")
+        try:
+            matcher.add(freelancer)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        return matcher.finish()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs/stream", response_model=List[JobMatch])
+async def match_jobs_stream(request: Request):
+    """Match jobs sent as NDJSON: a header line, then one job object per line"""
+    lines = _ndjson_lines(request)
+    header = await _read_header(lines, MatchJobsStreamHeader)
+    try:
+        matcher = matching_service.stream_jobs_to_freelancer(
+            freelancer_skills=header.freelancer_skills,
+            freelancer_bio=header.freelancer_bio,
+            preferred_rate=header.preferred_rate,
+            limit=header.limit,
+            chunk_size=STREAM_CHUNK_SIZE
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    line_number = 1
+    async for line in lines:
+        line_number += 1
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Line {line_number}: {e}")
+        if not isinstance(job, dict) or "job_id" not in job:
+            raise HTTPException(status_code=422, detail=f"Line {line_number}: expected a job object with job_id")
+        try:
+            matcher.add(job)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        return matcher.finish()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
+import numpy as np
+from ..deadline import latency_budget
+from ..negotiation import ColumnarRoute, accepts_columnar
 from ..services.recommendation_service import RecommendationService
-from ..models.schemas import PriceRecommendation, ProposalQuality
+from ..services.cache_service import get_response_cache
+from ..models.schemas import PriceRecommendation, ProposalQuality, RankedProposalQuality
+from ..models.columnar import ColumnarError
 
-router = APIRouter()
+router = APIRouter(route_class=ColumnarRoute)
 recommendation_service = RecommendationService()
+response_cache = get_response_cache()
 
 
 class PriceRequest(BaseModel):
@@ -19,6 +25,25 @@ class ProposalQualityRequest(BaseModel):
     proposal_text: str
     job_description: str
     required_skills: List[str]
+    # Degrade scoring rather than exceed this; the X-Latency-Budget-Ms header works too
+    latency_budget_ms: Optional[float] = None
+
+
+class ProposalItem(BaseModel):
+    proposal_id: str
+    proposal_text: str
+
+
+class ProposalQualityBatchRequest(BaseModel):
+    job_description: str
+    required_skills: List[str]
+    proposals: List[ProposalItem]
+    latency_budget_ms: Optional[float] = None
+
+
+class ProposalQualityBatchHeader(BaseModel):
+    job_description: str
+    required_skills: List[str]
 
 
 class ResumeRequest(BaseModel):
@@ -33,11 +58,15 @@ class ResumeRequest(BaseModel):
 async def recommend_price(request: PriceRequest):
     """Get price recommendation for a job"""
     try:
-        recommendation = recommendation_service.recommend_price(
-            job_description=request.job_description,
-            required_skills=request.required_skills,
-            experience_level=request.experience_level,
-            similar_jobs_data=request.similar_jobs_data
+        recommendation = await response_cache.get_or_compute(
+            "recommendations.price",
+            request,
+            lambda: recommendation_service.recommend_price(
+                job_description=request.job_description,
+                required_skills=request.required_skills,
+                experience_level=request.experience_level,
+                similar_jobs_data=request.similar_jobs_data
+            )
         )
         return recommendation
     except Exception as e:
@@ -48,26 +77,67 @@ async def recommend_price(request: PriceRequest):
 async def analyze_proposal(request: ProposalQualityRequest):
     """Analyze proposal quality"""
     try:
-        quality = recommendation_service.analyze_proposal_quality(
-            proposal_text=request.proposal_text,
-            job_description=request.job_description,
-            required_skills=request.required_skills
-        )
+        with latency_budget(request.latency_budget_ms):
+            quality = recommendation_service.analyze_proposal_quality(
+                proposal_text=request.proposal_text,
+                job_description=request.job_description,
+                required_skills=request.required_skills
+            )
         return quality
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _analyze_proposals_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnar proposal batch: `proposal_id` and `proposal_text` columns in, ranked columns out"""
+    ids, texts = payload.get("proposal_id"), payload.get("proposal_text")
+    if not isinstance(ids, list) or not isinstance(texts, list) or len(ids) != len(texts):
+        raise ColumnarError("Expected 'proposal_id' and 'proposal_text' columns of equal length")
+    request = ProposalQualityBatchHeader.model_validate(payload)
+    ranked = recommendation_service.analyze_proposals_batch(
+        proposals=[{"proposal_id": i, "proposal_text": t} for i, t in zip(ids, texts)],
+        job_description=request.job_description,
+        required_skills=request.required_skills
+    )
+    return {
+        "proposal_id": [r.proposal_id for r in ranked],
+        "rank": np.array([r.rank for r in ranked], dtype=np.int32),
+        "score": np.array([r.score for r in ranked], dtype=np.float64),
+        "feedback": [r.feedback for r in ranked],
+        "suggestions": [r.suggestions for r in ranked],
+    }
+
+
+@router.post("/proposal-quality/batch", response_model=List[RankedProposalQuality])
+@accepts_columnar(_analyze_proposals_columnar)
+async def analyze_proposals_batch(request: ProposalQualityBatchRequest):
+    """Analyze and rank all proposals for a job; also accepts msgpack columns"""
+    try:
+        with latency_budget(request.latency_budget_ms):
+            ranked = recommendation_service.analyze_proposals_batch(
+                proposals=[p.model_dump() for p in request.proposals],
+                job_description=request.job_description,
+                required_skills=request.required_skills
+            )
+        return ranked
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/resume-summary")
 async def generate_resume(request: ResumeRequest):
     """Generate AI resume summary"""
     try:
-        summary = recommendation_service.generate_resume_summary(
-            skills=request.skills,
-            experience_years=request.experience_years,
-            completed_jobs=request.completed_jobs,
-            avg_rating=request.avg_rating,
-            bio=request.bio
+        summary = await response_cache.get_or_compute(
+            "recommendations.resume_summary",
+            request,
+            lambda: recommendation_service.generate_resume_summary(
+                skills=request.skills,
+                experience_years=request.experience_years,
+                completed_jobs=request.completed_jobs,
+                avg_rating=request.avg_rating,
+                bio=request.bio
+            )
         )
         return summary
     except Exception as e:
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from pydantic import BaseModel
-from ..services.skills_service import SkillsService
+from ..services.skills_service import get_skills_service
+from ..services.cache_service import get_response_cache
 from ..models.schemas import SkillAnalysis
 
 router = APIRouter()
-skills_service = SkillsService()
+skills_service = get_skills_service()
+response_cache = get_response_cache()
 
 
 class ExtractSkillsRequest(BaseModel):
@@ -35,11 +37,16 @@ async def extract_skills(request: ExtractSkillsRequest):
 async def get_related_skills(request: RelatedSkillsRequest):
     """Get related skills based on input skills"""
     try:
-        related = skills_service.get_related_skills(
-            skills=request.skills,
-            limit=request.limit
+        return await response_cache.get_or_compute(
+            "skills.related",
+            request,
+            lambda: {
+                "related_skills": skills_service.get_related_skills(
+                    skills=request.skills,
+                    limit=request.limit
+                )
+            }
         )
-        return {"related_skills": related}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from ..services.top_matches_service import get_top_matches_service
+from ..models.schemas import FreelancerProfile, JobForMatching, TopFreelancerMatches, TopJobMatches
+
+router = APIRouter()
+top_matches = get_top_matches_service()
+
+
+@router.put("/jobs", status_code=202)
+async def upsert_job(job: JobForMatching):
+    """Queue a new or changed open job; affected lists refresh within the staleness bound"""
+    top_matches.upsert_job(job)
+    return {"job_id": job.job_id, "pending_updates": top_matches.pending_updates}
+
+
+@router.delete("/jobs/{job_id}", status_code=202)
+async def remove_job(job_id: str):
+    """Queue removal of a closed job"""
+    top_matches.remove_job(job_id)
+    return {"job_id": job_id, "pending_updates": top_matches.pending_updates}
+
+
+@router.put("/freelancers", status_code=202)
+async def upsert_freelancer(freelancer: FreelancerProfile):
+    """Queue a new or changed freelancer profile"""
+    top_matches.upsert_freelancer(freelancer)
+    return {"user_id": freelancer.user_id, "pending_updates": top_matches.pending_updates}
+
+
+@router.delete("/freelancers/{user_id}", status_code=202)
+async def remove_freelancer(user_id: str):
+    """Queue removal of an inactive freelancer"""
+    top_matches.remove_freelancer(user_id)
+    return {"user_id": user_id, "pending_updates": top_matches.pending_updates}
+
+
+@router.get("/jobs/{job_id}/freelancers", response_model=TopFreelancerMatches)
+async def top_freelancers(job_id: str, limit: Optional[int] = None):
+    """Materialized best freelancers for a job"""
+    try:
+        result = top_matches.top_freelancers(job_id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not indexed")
+    return result
+
+
+@router.get("/freelancers/{user_id}/jobs", response_model=TopJobMatches)
+async def top_jobs(user_id: str, limit: Optional[int] = None):
+    """Materialized best jobs for a freelancer"""
+    try:
+        result = top_matches.top_jobs(user_id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Freelancer not indexed")
+    return result
+
+
+@router.post("/refresh")
+async def refresh():
+    """Apply queued changes now instead of waiting for the background refresh"""
+    try:
+        return top_matches.refresh()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
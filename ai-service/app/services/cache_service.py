@@ -0,0 +1,200 @@
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from ..metrics import CACHE_REQUESTS
+
+
+# Seconds a cached response stays valid, per route
+DEFAULT_ROUTE_TTLS = {
+    "recommendations.price": 3600,
+    "recommendations.resume_summary": 900,
+    "skills.related": 86400,
+}
+
+
+class ResponseCache:
+    """Caches JSON responses of idempotent endpoints keyed by their validated request model.
+
+    Concurrent misses for the same key inside one process are coalesced so the
+    response is computed once. Subclasses provide the storage.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, int]] = None, default_ttl: int = 300, prefix: str = "aicache"):
+        self.ttls = dict(DEFAULT_ROUTE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def key_for(self, route: str, request: BaseModel) -> str:
+        """Canonical cache key: route plus a hash of the request's sorted JSON form"""
+        canonical = json.dumps(request.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        return f"{self.prefix}:{route}:{digest}"
+
+    async def get_or_compute(self, route: str, request: BaseModel, compute: Callable[[], Any]) -> Any:
+        """Return the cached response for this request, computing and storing it on a miss"""
+        key = self.key_for(route, request)
+
+        # Register as in flight before touching storage so identical requests
+        # arriving during the lookup or the computation wait for this one
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            CACHE_REQUESTS.inc(1, f"response:{route}", "coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The request computing it was cancelled, not this one: take over
+                return await self.get_or_compute(route, request, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        # Consume the exception so it is not reported when nobody else is waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            cached = await self._safe_get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                CACHE_REQUESTS.inc(1, f"response:{route}", "hit")
+                value = json.loads(cached)
+            else:
+                self.stats["misses"] += 1
+                CACHE_REQUESTS.inc(1, f"response:{route}", "miss")
+                value = jsonable_encoder(compute())
+                await self._safe_set(key, json.dumps(value), self.ttls.get(route, self.default_ttl))
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # Cancellation is not an Exception; never leave waiters on an unresolved future
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    async def invalidate(self, route: str, request: BaseModel) -> None:
+        """Drop the cached response for one request"""
+        await self._delete(self.key_for(route, request))
+
+    async def invalidate_route(self, route: str) -> int:
+        """Drop every cached response for a route, returning how many were removed"""
+        return await self._delete_prefix(f"{self.prefix}:{route}:")
+
+    async def _safe_get(self, key: str) -> Optional[str]:
+        # A broken cache must never fail the request, so storage errors count as misses
+        try:
+            return await self._get(key)
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+
+    async def _safe_set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            await self._set(key, value, ttl)
+        except Exception:
+            self.stats["errors"] += 1
+
+    async def _get(self, key: str) -> Optional[str]:
+        return None
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        return None
+
+    async def _delete(self, key: str) -> None:
+        return None
+
+    async def _delete_prefix(self, prefix: str) -> int:
+        return 0
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Process-local LRU cache for tests and single-node deployments"""
+
+    def __init__(self, max_entries: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def _delete_prefix(self, prefix: str) -> int:
+        keys = [k for k in self._entries if k.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+class RedisResponseCache(ResponseCache):
+    """Cache shared by all AI service replicas through Redis"""
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def _get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def _delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def _delete_prefix(self, prefix: str) -> int:
+        removed = 0
+        batch = []
+        async for key in self.client.scan_iter(match=f"{prefix}*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                removed += await self.client.delete(*batch)
+                batch = []
+        if batch:
+            removed += await self.client.delete(*batch)
+        return removed
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Build the cache selected by RESPONSE_CACHE_BACKEND (redis, memory or none)"""
+    redis_url = os.getenv("REDIS_URL")
+    backend = os.getenv("RESPONSE_CACHE_BACKEND", "redis" if redis_url else "memory").lower()
+
+    if backend == "redis" and redis_url:
+        return RedisResponseCache(redis_url)
+    if backend == "memory":
+        return InMemoryResponseCache()
+    # Storage disabled; concurrent identical requests are still coalesced
+    return ResponseCache()
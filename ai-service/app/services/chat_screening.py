@@ -0,0 +1,203 @@
+"""Inline screening of chat messages for off-platform payment solicitation.
+
+Each message is lowercased once and scanned with a single compiled regular
+expression. The expression is built from the fraud service's
+HIGH_RISK_PATTERNS plus contact details, off-platform channels and
+fee-avoidance phrases. Every alternative is a named group, so a match
+reports its signal through `lastgroup` without a second pass.
+
+Signals are ordered by how far they take a conversation off the platform:
+
+1. channel: naming another messenger or asking to be texted or called
+2. contact: an email address or phone number, including "at"/"dot" spellings
+3. bypass, payment: paying directly or outside the platform, high-risk terms
+
+A bounded LRU holds rolling state for each conversation. The state is the
+decayed conversation risk, the decayed number of contact details shared,
+and the highest stage reached. Decay halves these values every
+`half_life` seconds. A message scores its own signals, plus extra risk for
+repeated contact sharing, for reaching a later stage than before, and for
+risk already built up in the conversation. A screening is one regex scan,
+under a microsecond per word, and one dictionary update. The state is per
+process, so a conversation's messages must be screened by the same
+replica.
+"""
+from typing import Dict, Iterable, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import os
+import re
+import threading
+import time
+
+from .fraud_service import HIGH_RISK_PATTERNS
+from ..models.schemas import ChatMessageRisk
+from ..metrics import counter, timed
+
+CHANNEL_PATTERNS = (
+    "whatsapp", "telegram", "signal app", "skype", "wechat", "viber",
+    "text me", "call me", "email me", "e-mail me", "dm me",
+    "my number", "my phone", "my email", "my cell",
+    "reach me at", "reach me on", "contact me at", "contact me on", "contact me via",
+)
+BYPASS_PATTERNS = (
+    "pay you directly", "pay me directly", "paid directly",
+    "outside the platform", "outside of the platform", "outside this platform", "off the platform",
+    "off platform", "avoid the fees", "avoid fees", "save on fees", "skip the fees", "no platform fees",
+    "paypal", "venmo", "zelle", "cash app", "cashapp", "gift card", "bank details", "account number", "iban",
+)
+
+_EMAIL = (
+    r"(?<![\w.+-])[\w.+-]++(?:\s*@\s*|\s*[\[(]\s*at\s*[\])]\s*|\s+at\s+)[\w-]+"
+    r"(?:\s*\.\s*|\s*[\[(]\s*dot\s*[\])]\s*|\s+dot\s+)(?:com|net|org|io|co|me)\b"
+)
+# A "+" country code, or digits grouped the way phone numbers are written (555-123-4567, 06 12 34 56 78).
+# Bare digit runs are left alone: those are invoice, order and account numbers far more often
+_PHONE = (
+    r"(?<![\w.])(?:\+\d(?:[\s.()-]{0,2}\d){7,14}"
+    r"|(?:\d{1,3}[\s.-])?\d{2,4}\)?[\s.-]{1,2}\d{3,4}[\s.-]\d{4}"
+    r"|\d{2}(?:[\s.-]\d{2}){4})(?![.-]?\d)"
+)
+
+SIGNAL_WEIGHTS = {"payment": 0.4, "bypass": 0.3, "contact": 0.25, "channel": 0.1}
+SIGNAL_STAGES = {"channel": 1, "contact": 2, "bypass": 3, "payment": 3}
+REPEATED_CONTACT_WEIGHT = 0.2
+ESCALATION_WEIGHT = 0.15
+# Share of the conversation's accumulated risk added to each message
+CONVERSATION_WEIGHT = 0.25
+
+CHAT_SCREENINGS = counter("ai_chat_messages_screened_total", "Chat messages screened, by risk level", ["risk_level"])
+
+
+def _phrases(patterns: Iterable[str]) -> str:
+    return "|".join(r"\b" + r"\s+".join(map(re.escape, p.split())) + r"\b" for p in patterns)
+
+
+class ConversationState:
+    __slots__ = ("updated_at", "risk", "contact_shares", "peak_stage")
+
+    def __init__(self, now: float):
+        self.updated_at = now
+        self.risk = 0.0
+        self.contact_shares = 0.0
+        self.peak_stage = 0
+
+
+class ChatScreeningService:
+    def __init__(self, high_risk_patterns: Iterable[str] = HIGH_RISK_PATTERNS,
+                 max_conversations: int = 100_000, half_life: float = 3600.0):
+        self.max_conversations = max_conversations
+        self.half_life = half_life
+        # Every signal starts a word (or a "+" phone prefix); checking that first skips most positions cheaply
+        self.matcher = re.compile(
+            r"(?<!\w)(?=[\w+])(?:"
+            f"(?P<payment>{_phrases(high_risk_patterns)})"
+            f"|(?P<bypass>{_phrases(BYPASS_PATTERNS)})"
+            f"|(?P<contact>{_EMAIL}|{_PHONE})"
+            f"|(?P<channel>{_phrases(CHANNEL_PATTERNS)})"
+            ")"
+        )
+        self._conversations: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    @timed("fraud.chat")
+    def screen_message(self, conversation_id: str, text: str, message_id: Optional[str] = None,
+                       now: Optional[float] = None) -> ChatMessageRisk:
+        """Score one message and fold it into its conversation's rolling state"""
+        terms: Dict[str, list] = {}
+        contacts = 0
+        for match in self.matcher.finditer(text.lower()):
+            signal = match.lastgroup
+            if signal == "contact":
+                contacts += 1
+                terms.setdefault(signal, [])
+            elif match.group() not in terms.setdefault(signal, []):
+                terms[signal].append(match.group())
+
+        message_score = sum(SIGNAL_WEIGHTS[signal] for signal in terms)
+        stage = max((SIGNAL_STAGES[signal] for signal in terms), default=0)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._state(conversation_id, now)
+            prior_risk, prior_peak = state.risk, state.peak_stage
+            state.contact_shares += contacts
+            contact_shares = state.contact_shares
+            escalated = prior_peak > 0 and stage > prior_peak
+            state.peak_stage = max(prior_peak, stage)
+            state.risk += message_score
+
+        flags = []
+        risk_score = message_score
+        if "payment" in terms:
+            flags.append(f"High-risk payment term: {', '.join(repr(t) for t in terms['payment'])}")
+        if "bypass" in terms:
+            flags.append(f"Off-platform payment: {', '.join(repr(t) for t in terms['bypass'])}")
+        if contacts:
+            flags.append("Shares contact details")
+            if contact_shares >= 2:
+                risk_score += REPEATED_CONTACT_WEIGHT
+                flags.append(f"Contact details shared {round(contact_shares)} times in this conversation")
+        if "channel" in terms:
+            flags.append(f"Off-platform channel: {', '.join(repr(t) for t in terms['channel'])}")
+        if escalated:
+            risk_score += ESCALATION_WEIGHT
+            flags.append("Conversation escalating toward off-platform payment")
+        if message_score and prior_risk:
+            risk_score += CONVERSATION_WEIGHT * min(prior_risk, 1.0)
+            if prior_risk >= 0.3:
+                flags.append("Earlier messages in this conversation were flagged")
+
+        risk_score = min(risk_score, 1.0)
+        if risk_score < 0.3:
+            risk_level = "low"
+            recommendation = "Deliver normally."
+        elif risk_score < 0.6:
+            risk_level = "medium"
+            recommendation = "Deliver with a warning to keep payments on the platform."
+        else:
+            risk_level = "high"
+            recommendation = "Hold the message for review."
+        CHAT_SCREENINGS.inc(1, risk_level)
+
+        return ChatMessageRisk(
+            conversation_id=conversation_id,
+            message_id=message_id,
+            risk_score=round(risk_score * 100, 2),
+            risk_level=risk_level,
+            flags=flags,
+            recommendation=recommendation,
+            conversation_risk=round(min(prior_risk + message_score, 1.0) * 100, 2),
+        )
+
+    def forget(self, conversation_id: str) -> bool:
+        """Drop a conversation's rolling state, e.g. once it is closed"""
+        with self._lock:
+            return self._conversations.pop(conversation_id, None) is not None
+
+    def _state(self, conversation_id: str, now: float) -> ConversationState:
+        state = self._conversations.get(conversation_id)
+        if state is None:
+            state = ConversationState(now)
+            self._conversations[conversation_id] = state
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+            return state
+        self._conversations.move_to_end(conversation_id)
+        elapsed = now - state.updated_at
+        if elapsed > 0:
+            decay = 0.5 ** (elapsed / self.half_life)
+            state.risk *= decay
+            state.contact_shares *= decay
+            state.updated_at = now
+        return state
+
+
+@lru_cache()
+def get_chat_screening_service() -> ChatScreeningService:
+    return ChatScreeningService(
+        max_conversations=int(os.getenv("CHAT_SCREENING_MAX_CONVERSATIONS", "100000")),
+        half_life=float(os.getenv("CHAT_SCREENING_HALF_LIFE", "3600")),
+    )
@@ -0,0 +1,185 @@
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import os
+import numpy as np
+
+from .projection import EmbeddingProjection, get_projection
+from ..metrics import timed
+
+
+class EmbeddingIndex:
+    """In-memory store of L2-normalized embeddings keyed by entity id, searchable by cosine similarity.
+
+    With a projection, a reduced copy of every vector is kept as well.
+    Searches scan the reduced matrix and re-score only the best
+    `rerank_depth` rows with the full vectors, so returned similarities are
+    exact while the full matrix is mostly left untouched.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        initial_capacity: int = 1024,
+        projection: Optional[EmbeddingProjection] = None,
+        rerank_depth: int = 300,
+    ):
+        self.dim = dim
+        self.projection = projection
+        self.rerank_depth = rerank_depth
+        self._capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._reduced: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Live rows of the matrix, aligned with ids"""
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:len(self._ids)]
+
+    def get(self, entity_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(entity_id)
+        return None if row is None else self._vectors[row]
+
+    def upsert_many(self, entity_ids: List[str], embeddings: np.ndarray) -> None:
+        """Insert or replace embeddings for a batch of ids"""
+        if not entity_ids:
+            return
+        embeddings = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        self._ensure_capacity(len(self._ids) + len(entity_ids), embeddings.shape[1])
+        reduced = None if self._reduced is None else self.projection.transform_documents(embeddings)
+
+        for j, (entity_id, embedding) in enumerate(zip(entity_ids, embeddings)):
+            row = self._rows.get(entity_id)
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(entity_id)
+                self._rows[entity_id] = row
+            self._vectors[row] = embedding
+            if self._reduced is not None:
+                self._reduced[row] = reduced[j]
+
+    def upsert(self, entity_id: str, embedding: np.ndarray) -> None:
+        self.upsert_many([entity_id], np.asarray(embedding)[None, :])
+
+    def remove(self, entity_id: str) -> bool:
+        """Remove an id by moving the last row into its slot"""
+        row = self._rows.pop(entity_id, None)
+        if row is None:
+            return False
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._vectors[row] = self._vectors[last]
+            if self._reduced is not None:
+                self._reduced[row] = self._reduced[last]
+            self._rows[moved_id] = row
+        self._ids.pop()
+        return True
+
+    def search(self, query: np.ndarray, k: int = 10, exact: bool = False) -> List[Tuple[str, float]]:
+        """Top-k ids by cosine similarity to the query; two-stage when a projection is set, unless `exact`"""
+        if not self._ids or k <= 0:
+            return []
+        query = self._normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+        depth = max(k, self.rerank_depth)
+        if exact or self._reduced is None or depth >= len(self._ids):
+            scores = self.vectors @ query
+            rows = self._top_rows(scores, k)
+            return [(self._ids[i], float(scores[i])) for i in rows]
+
+        with timed("index.search_reduced"):
+            candidates = self._top_rows(self._reduced[:len(self._ids)] @ self.projection.transform_query(query), depth)
+        with timed("index.rerank"):
+            # Ascending row order reads the full matrix sequentially
+            candidates.sort()
+            scores = self._vectors[candidates] @ query
+            rows = self._top_rows(scores, k)
+        return [(self._ids[candidates[i]], float(scores[i])) for i in rows]
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Live vectors and ids for a snapshot; the reduced matrix is rebuilt on load"""
+        return {"vectors": self.vectors}, {"ids": list(self._ids)}
+
+    def load_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> None:
+        """Replace the contents with an export_state() result.
+
+        The vectors are used as given, so a memory-mapped array stays mapped
+        until an upsert outgrows it.
+        """
+        vectors = arrays["vectors"]
+        if len(vectors) != len(strings["ids"]):
+            raise ValueError(f"{len(strings['ids'])} ids for {len(vectors)} vectors")
+        self._ids = list(strings["ids"])
+        self._rows = {entity_id: row for row, entity_id in enumerate(self._ids)}
+        self._vectors = self._reduced = None
+        if not len(vectors):
+            return
+        self.dim = vectors.shape[1]
+        self._capacity = len(vectors)
+        self._vectors = vectors
+        if self.projection is not None:
+            if self.projection.input_dim != self.dim:
+                raise ValueError(f"Projection expects dimension {self.projection.input_dim}, got {self.dim}")
+            self._reduced = self.projection.transform_documents(vectors)
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        if self._vectors is None:
+            self.dim = dim
+            self._capacity = max(self._capacity, needed)
+            self._vectors = np.zeros((self._capacity, dim), dtype=np.float32)
+            if self.projection is not None:
+                if self.projection.input_dim != dim:
+                    raise ValueError(f"Projection expects dimension {self.projection.input_dim}, got {dim}")
+                self._reduced = np.zeros((self._capacity, self.projection.dim), dtype=np.float32)
+            return
+        if dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self.dim}")
+        if needed > self._capacity:
+            while self._capacity < needed:
+                self._capacity *= 2
+            grown = np.zeros((self._capacity, dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+            self._vectors = grown
+            if self._reduced is not None:
+                grown = np.zeros((self._capacity, self._reduced.shape[1]), dtype=np.float32)
+                grown[:len(self._ids)] = self._reduced[:len(self._ids)]
+                self._reduced = grown
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+
+def _rerank_depth() -> int:
+    return int(os.getenv("EMBEDDING_RERANK_DEPTH", "300"))
+
+
+@lru_cache()
+def get_job_index() -> EmbeddingIndex:
+    return EmbeddingIndex(projection=get_projection(), rerank_depth=_rerank_depth())
+
+
+@lru_cache()
+def get_freelancer_index() -> EmbeddingIndex:
+    return EmbeddingIndex(projection=get_projection(), rerank_depth=_rerank_depth())
@@ -1,34 +1,396 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 import os
+import re
+import threading
+import time
 from functools import lru_cache
+from .projection import EmbeddingProjection, get_projection
+from ..metrics import timed, TEXTS_ENCODED, TOKENS_PROCESSED, ENCODE_BATCH_SIZE, CACHE_REQUESTS
+
+
+# Split after sentence-ending punctuation followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Weight of the newest measurement in the seconds-per-token moving average
+COST_EMA_WEIGHT = 0.2
+
+
+class EmbeddingSpace:
+    """Everything tied to one embedding model: the model, its projection, the embedding cache and the cost estimate.
+
+    Embeddings from different spaces are not comparable, so each model gets
+    its own space and nothing is shared between them.
+    """
+
+    def __init__(self, name: str, model, projection: Optional[EmbeddingProjection] = None, cache_size: int = 10000):
+        self.name = name
+        self.model = model
+        # Reduced-dimension projection for first-stage search, if one was fitted for this model
+        self.projection = projection
+        # LRU of recent embeddings by (kind, text); 0 disables it
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self.cache_lock = threading.Lock()
+        # Moving average of model seconds per token, for latency budget planning; None until measured
+        self.seconds_per_token: Optional[float] = None
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+# Space pinned for the current request or background call; None means the service's active space
+CURRENT_SPACE: ContextVar[Optional[EmbeddingSpace]] = ContextVar("embedding_space", default=None)
 
 
 class EmbeddingService:
     _instance: Optional["EmbeddingService"] = None
 
-    def __new__(cls):
+    def __new__(cls, model=None):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, model=None):
+        """Load EMBEDDING_MODEL, or use an already constructed model (e.g. a benchmark stub)"""
         if self._initialized:
             return
 
         model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-        self.model = SentenceTransformer(model_name)
+        if model is None:
+            model = load_model(model_name)
+        # Padded tokens allowed in one forward pass, and a hard cap on batch rows
+        self.token_budget = int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))
+        self.max_batch_size = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "128"))
+        self.last_document_stats: Dict[str, Any] = {}
+        # Space that serves traffic; projection from EMBEDDING_PROJECTION_PATH, if one was fitted
+        self.active_space = EmbeddingSpace(
+            model_name, model, get_projection(), int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        )
+        # Called with (kind, texts) after cache misses are encoded; a model migration uses it to follow new texts
+        self.on_encoded: Optional[Callable[[str, List[str]], None]] = None
         self._initialized = True
 
+    # The model-specific state below belongs to the current space
+
+    @property
+    def space(self) -> EmbeddingSpace:
+        return CURRENT_SPACE.get() or self.active_space
+
+    @property
+    def shadowing(self) -> bool:
+        """True while encoding in a space other than the active one"""
+        return self.space is not self.active_space
+
+    @property
+    def model(self):
+        return self.space.model
+
+    @property
+    def projection(self) -> Optional[EmbeddingProjection]:
+        return self.space.projection
+
+    @property
+    def cache_size(self) -> int:
+        return self.space.cache_size
+
+    @cache_size.setter
+    def cache_size(self, value: int) -> None:
+        self.space.cache_size = value
+
+    @property
+    def seconds_per_token(self) -> Optional[float]:
+        return self.space.seconds_per_token
+
+    @seconds_per_token.setter
+    def seconds_per_token(self, value: Optional[float]) -> None:
+        self.space.seconds_per_token = value
+
+    @property
+    def _cache(self) -> "OrderedDict[Tuple[str, str], np.ndarray]":
+        return self.space.cache
+
+    @_cache.setter
+    def _cache(self, value: "OrderedDict[Tuple[str, str], np.ndarray]") -> None:
+        self.space.cache = value
+
+    @property
+    def _cache_lock(self) -> threading.Lock:
+        return self.space.cache_lock
+
+    @contextmanager
+    def using(self, space: EmbeddingSpace) -> Iterator[None]:
+        """Encode in `space` for the duration of the block (shadow scoring, re-encoding)"""
+        token = CURRENT_SPACE.set(space)
+        try:
+            yield
+        finally:
+            CURRENT_SPACE.reset(token)
+
+    def switch_space(self, space: EmbeddingSpace) -> EmbeddingSpace:
+        """Make `space` serve traffic from the next call on; returns the previous space"""
+        previous, self.active_space = self.active_space, space
+        return previous
+
     def encode(self, texts: List[str]) -> np.ndarray:
         """Encode texts to embeddings"""
-        return self.model.encode(texts, convert_to_numpy=True)
+        return self._through_cache("text", list(texts), self._encode_texts)
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        with timed("embedding.tokenize"):
+            lengths = self.count_tokens(texts)
+        return self._encode_bucketed(texts, lengths)
 
     def encode_single(self, text: str) -> np.ndarray:
         """Encode a single text"""
-        return self.model.encode([text], convert_to_numpy=True)[0]
+        TEXTS_ENCODED.inc()
+        ENCODE_BATCH_SIZE.observe(1)
+        with timed("embedding.forward"):
+            return self.model.encode([text], convert_to_numpy=True)[0]
+
+    def encode_documents(self, texts: List[str]) -> np.ndarray:
+        """Encode long documents as token-weighted means of sentence-aware chunks"""
+        return self._through_cache("document", list(texts), self._encode_documents)
+
+    def cached_documents(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached document embeddings without encoding anything: (embeddings, found mask), zero rows where missing"""
+        embeddings = np.zeros((len(texts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        found = np.zeros(len(texts), dtype=bool)
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                embedding = self._cache.get(("document", text))
+                if embedding is not None:
+                    embeddings[i] = embedding
+                    found[i] = True
+        return embeddings, found
+
+    def estimate_encode_seconds(self, texts: List[str], documents: bool = True) -> float:
+        """Expected model time for the texts not already cached; 0 before any encode was measured"""
+        if self.seconds_per_token is None:
+            return 0.0
+        kind = "document" if documents else "text"
+        with self._cache_lock:
+            missing = [text for text in texts if (kind, text) not in self._cache]
+        # Roughly four tokens per three words for English text
+        tokens = sum(len(text.split()) for text in missing) * 4 / 3 + 2 * len(missing)
+        return tokens * self.seconds_per_token
+
+    def export_cache_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Cached embeddings, least recently used first, for a snapshot"""
+        with self._cache_lock:
+            entries = list(self._cache.items())
+        dim = self.model.get_sentence_embedding_dimension()
+        embeddings = np.stack([e for _, e in entries]) if entries else np.zeros((0, dim), dtype=np.float32)
+        return {"embeddings": embeddings}, {
+            "kinds": [kind for (kind, _), _ in entries],
+            "texts": [text for (_, text), _ in entries],
+        }
+
+    def load_cache_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> None:
+        """Add a snapshot's entries as the oldest in the LRU; rows stay views of the (mapped) array"""
+        embeddings = arrays["embeddings"]
+        restored = list(zip(strings["kinds"], strings["texts"]))
+        if len(restored) != len(embeddings):
+            raise ValueError(f"{len(restored)} cache keys for {len(embeddings)} embeddings")
+        with self._cache_lock:
+            room = max(self.cache_size - len(self._cache), 0)
+            start = max(len(restored) - room, 0)
+            current = self._cache
+            self._cache = OrderedDict((key, embeddings[i]) for i, key in enumerate(restored) if i >= start)
+            for key, embedding in current.items():
+                self._cache[key] = embedding
+                self._cache.move_to_end(key)
+
+    def _through_cache(self, kind: str, texts: List[str], compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Serve texts from the LRU, computing only the missing ones, in one call, in input order"""
+        space = self.space
+        if not texts or space.cache_size <= 0:
+            embeddings = compute(texts)
+            self._notify_encoded(space, kind, texts)
+            return embeddings
+
+        rows: Dict[str, np.ndarray] = {}
+        with space.cache_lock:
+            for text in texts:
+                embedding = space.cache.get((kind, text))
+                if embedding is not None:
+                    space.cache.move_to_end((kind, text))
+                    rows[text] = embedding
+        missing = list(dict.fromkeys(text for text in texts if text not in rows))
+        CACHE_REQUESTS.inc(len(texts) - len(missing), "embedding", "hit")
+        CACHE_REQUESTS.inc(len(missing), "embedding", "miss")
+
+        if missing:
+            computed = compute(missing)
+            with space.cache_lock:
+                for text, embedding in zip(missing, computed):
+                    rows[text] = embedding
+                    space.cache[(kind, text)] = np.array(embedding)
+                    space.cache.move_to_end((kind, text))
+                while len(space.cache) > space.cache_size:
+                    space.cache.popitem(last=False)
+            self._notify_encoded(space, kind, missing)
+        return np.stack([rows[text] for text in texts])
+
+    def _notify_encoded(self, space: EmbeddingSpace, kind: str, texts: List[str]) -> None:
+        if texts and self.on_encoded is not None and space is self.active_space:
+            self.on_encoded(kind, texts)
+
+    def _encode_documents(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        start = time.perf_counter()
+        chunk_limit = self._chunk_token_limit()
+
+        chunks: List[str] = []
+        chunk_tokens: List[int] = []
+        owners: List[int] = []
+        with timed("embedding.chunk"):
+            for doc_idx, text in enumerate(texts):
+                for chunk, tokens in self._chunk_text(text, chunk_limit):
+                    chunks.append(chunk)
+                    chunk_tokens.append(tokens)
+                    owners.append(doc_idx)
+
+        chunk_embeddings = self._encode_bucketed(chunks, chunk_tokens)
+
+        # Pool chunks back per document, weighting each chunk by its token count
+        weights = np.maximum(np.asarray(chunk_tokens, dtype=np.float32), 1.0)
+        owners_arr = np.asarray(owners)
+        pooled = np.zeros((len(texts), chunk_embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners_arr, chunk_embeddings * weights[:, None])
+        pooled /= np.bincount(owners_arr, weights=weights, minlength=len(texts))[:, None]
+
+        elapsed = time.perf_counter() - start
+        total_tokens = int(sum(chunk_tokens))
+        self.last_document_stats = {
+            "documents": len(texts),
+            "chunks": len(chunks),
+            "tokens": total_tokens,
+            "seconds": elapsed,
+            "tokens_per_second": total_tokens / elapsed if elapsed > 0 else 0.0,
+        }
+        return pooled
+
+    def reduce_documents(self, embeddings: np.ndarray) -> np.ndarray:
+        """Reduced first-stage vectors for document embeddings; pair with reduce_query"""
+        if self.projection is None:
+            raise ValueError("No embedding projection loaded; set EMBEDDING_PROJECTION_PATH")
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return self.projection.transform_documents(unit)
+
+    def reduce_query(self, embedding: np.ndarray) -> np.ndarray:
+        """Reduced first-stage vector for a query embedding"""
+        if self.projection is None:
+            raise ValueError("No embedding projection loaded; set EMBEDDING_PROJECTION_PATH")
+        embedding = np.asarray(embedding, dtype=np.float32)
+        return self.projection.transform_query(embedding / max(float(np.linalg.norm(embedding)), 1e-12))
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """Count model tokens per text, excluding special tokens"""
+        if not texts:
+            return []
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return [len(text.split()) for text in texts]
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+
+    def plan_batches(self, lengths: List[int]) -> List[List[int]]:
+        """Group input indices into length buckets sized to the token budget"""
+        max_seq_length = getattr(self.model, "max_seq_length", None) or 256
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_bucket = 0
+        current_size = 0
+
+        for idx in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            # Bucket by padded length (plus special tokens), rounded up to a power of two
+            padded = min(lengths[idx] + 2, max_seq_length)
+            bucket = min(1 << max(padded - 1, 1).bit_length(), max_seq_length)
+            if bucket != current_bucket:
+                if current:
+                    batches.append(current)
+                current = []
+                current_bucket = bucket
+                current_size = max(1, min(self.token_budget // bucket, self.max_batch_size))
+            current.append(idx)
+            if len(current) >= current_size:
+                batches.append(current)
+                current = []
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _encode_bucketed(self, texts: List[str], lengths: List[int]) -> np.ndarray:
+        """Encode texts batch by batch from plan_batches and restore input order"""
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        start = time.perf_counter()
+        embeddings = None
+        for batch_idx in self.plan_batches(lengths):
+            ENCODE_BATCH_SIZE.observe(len(batch_idx))
+            with timed("embedding.forward"):
+                batch = self.model.encode(
+                    [texts[i] for i in batch_idx], convert_to_numpy=True, batch_size=len(batch_idx)
+                )
+            if embeddings is None:
+                embeddings = np.zeros((len(texts), batch.shape[1]), dtype=batch.dtype)
+            embeddings[batch_idx] = batch
+
+        TEXTS_ENCODED.inc(len(texts))
+        TOKENS_PROCESSED.inc(sum(lengths))
+        tokens = sum(lengths) + 2 * len(texts)
+        per_token = (time.perf_counter() - start) / tokens
+        if self.seconds_per_token is None:
+            self.seconds_per_token = per_token
+        else:
+            self.seconds_per_token += COST_EMA_WEIGHT * (per_token - self.seconds_per_token)
+        return embeddings
+
+    def _chunk_token_limit(self) -> int:
+        """Tokens available per chunk after the model's special tokens"""
+        max_seq_length = getattr(self.model, "max_seq_length", None) or 256
+        return max(max_seq_length - 2, 1)
+
+    def _chunk_text(self, text: str, chunk_limit: int) -> List[tuple]:
+        """Pack whole sentences into chunks of at most chunk_limit tokens"""
+        sentences = [s for s in SENTENCE_BOUNDARY.split(text.strip()) if s]
+        if not sentences:
+            return [(text, 0)]
+
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for sentence, tokens in zip(sentences, self.count_tokens(sentences)):
+            if tokens > chunk_limit:
+                # A single sentence longer than the model window is split on words
+                if current:
+                    chunks.append((" ".join(current), current_tokens))
+                    current, current_tokens = [], 0
+                words = sentence.split()
+                words_per_piece = max(1, len(words) * chunk_limit // tokens)
+                for i in range(0, len(words), words_per_piece):
+                    piece = words[i:i + words_per_piece]
+                    chunks.append((" ".join(piece), tokens * len(piece) // len(words)))
+                continue
+
+            if current and current_tokens + tokens > chunk_limit:
+                chunks.append((" ".join(current), current_tokens))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += tokens
+
+        if current:
+            chunks.append((" ".join(current), current_tokens))
+        return chunks
 
     def similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings"""
@@ -43,6 +405,12 @@ class EmbeddingService:
         return np.dot(embeddings_norm, query_norm)
 
 
+def load_model(model_name: str):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
 @lru_cache()
 def get_embedding_service() -> EmbeddingService:
     return EmbeddingService()
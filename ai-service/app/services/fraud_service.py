@@ -1,19 +1,36 @@
 from typing import List, Dict, Any, Optional
 import numpy as np
+from .linkage_graph import AccountLinkageGraph, account_identifiers, get_linkage_graph
 from ..models.schemas import FraudRisk
+from ..metrics import timed
+
+HIGH_RISK_PATTERNS = (
+    "wire transfer",
+    "western union",
+    "bitcoin only",
+    "payment outside platform",
+    "urgent payment",
+    "cryptocurrency only",
+    "prepaid card",
+)
+
+LINK_DESCRIPTIONS = {
+    "bio": "a near-identical bio",
+    "device": "devices",
+    "ip": "IP addresses",
+    "payment": "payment instruments",
+}
 
 
 class FraudDetectionService:
-    def __init__(self):
-        self.high_risk_patterns = [
-            "wire transfer",
-            "western union",
-            "bitcoin only",
-            "payment outside platform",
-            "urgent payment",
-            "cryptocurrency only",
-            "prepaid card",
-        ]
+    def __init__(self, linkage_graph: Optional[AccountLinkageGraph] = None, link_accounts: bool = True):
+        # Accounts linked by shared payment instruments, devices, IPs and bios (see linkage_graph).
+        # Only the process that owns the graph links accounts; elsewhere user risk has no cluster signals
+        self.linkage_graph: Optional[AccountLinkageGraph] = None
+        if link_accounts:
+            self.linkage_graph = linkage_graph if linkage_graph is not None else get_linkage_graph()
+
+        self.high_risk_patterns = list(HIGH_RISK_PATTERNS)
 
         self.spam_patterns = [
             "click here",
@@ -25,12 +42,13 @@ class FraudDetectionService:
             "no experience needed",
         ]
 
+    @timed("fraud.user")
     def analyze_user_risk(
         self,
         user_data: Dict[str, Any],
         activity_data: Optional[Dict[str, Any]] = None
     ) -> FraudRisk:
-        """Analyze fraud risk for a user"""
+        """Analyze fraud risk for a user; also records the user's identifiers in the linkage graph"""
 
         risk_score = 0.0
         flags = []
@@ -86,6 +104,23 @@ class FraudDetectionService:
                 risk_score += 0.15
                 flags.append(f"Suspicious content: mentions '{pattern}'")
 
+        # Check links to other accounts
+        user_id = user_data.get("user_id")
+        if user_id and self.linkage_graph is not None:
+            shared = self.linkage_graph.observe(str(user_id), account_identifiers(user_data), bio)
+            cluster = self.linkage_graph.features(str(user_id))
+            if cluster.linked_banned_accounts:
+                risk_score += 0.3
+                flags.append(f"Linked to {cluster.linked_banned_accounts} banned account(s)")
+            if cluster.linked_fraud_accounts and cluster.linked_fraud_rate >= 0.25:
+                risk_score += 0.2
+                flags.append(f"{cluster.linked_fraud_rate:.0%} of linked accounts confirmed fraudulent")
+            if cluster.linked_accounts >= 2:
+                risk_score += 0.1
+                flags.append(f"Part of a cluster of {cluster.cluster_size} linked accounts")
+            if shared:
+                flags.append(f"Shares {', '.join(LINK_DESCRIPTIONS[kind] for kind in shared)} with other accounts")
+
         # Normalize score
         risk_score = min(risk_score, 1.0)
 
@@ -107,6 +142,7 @@ class FraudDetectionService:
             recommendation=recommendation
         )
 
+    @timed("fraud.job")
     def analyze_job_posting(self, job_data: Dict[str, Any]) -> FraudRisk:
         """Analyze fraud risk for a job posting"""
 
@@ -165,6 +201,7 @@ class FraudDetectionService:
             recommendation=recommendation
         )
 
+    @timed("fraud.proposal")
     def analyze_proposal(self, proposal_data: Dict[str, Any]) -> FraudRisk:
         """Analyze fraud risk for a proposal"""
 
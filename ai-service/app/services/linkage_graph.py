@@ -0,0 +1,288 @@
+"""Account linkage graph for fraud ring detection.
+
+Accounts are linked when they share an identifier: a payment instrument
+fingerprint, a device id, an IP address, or a near-identical bio. Linked
+accounts are merged into clusters with union-find (union by size, path
+halving), so an event costs a few near-constant-time operations per
+identifier. Each cluster root keeps its size and its counts of accounts
+labelled fraud or banned. Cluster features are therefore lookups, cheap
+enough for every analyze_user_risk call.
+
+Identifiers are kept only as 64-bit keyed digests, never as raw values.
+Near-identical bios are matched with MinHash over word 3-shingles, split
+into BIO_BANDS bands of BIO_ROWS values. Two bios sharing any band get
+linked, which happens with probability about 1 - (1 - s^6)^4 for shingle
+Jaccard similarity s: 0.95 at s = 0.9, 0.06 at s = 0.5.
+
+An identifier shared by more than `max_shared` accounts (a public Wi-Fi
+or VPN exit IP, a marketplace's own payment processor) stops creating
+links. Union-find cannot split clusters, so a link lasts until rebuild().
+rebuild() forgets observations older than `max_age` seconds and re-links
+the rest from scratch, in one pass over the observations. Run it
+periodically, e.g. POST /admin/linkage/rebuild from a scheduler.
+Unlabelling an account only updates the counts.
+
+The graph lives in the API process. Observations (POST /api/fraud/user,
+POST /api/fraud/linkage) and labels are all applied there. The scoring
+worker does not keep a graph of its own.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import os
+import threading
+import time
+import zlib
+import numpy as np
+
+from .skill_index import tokenize
+
+IDENTIFIER_FIELDS = {
+    "payment": "payment_fingerprints",
+    "device": "device_ids",
+    "ip": "ip_addresses",
+}
+
+BIO_BANDS = 4
+BIO_ROWS = 6
+# Shorter bios are too generic to link accounts
+MIN_BIO_WORDS = 10
+_MINHASH_PRIME = (1 << 31) - 1
+_minhash_rng = np.random.default_rng(0x5EED)
+_MINHASH_A = _minhash_rng.integers(1, _MINHASH_PRIME, size=BIO_BANDS * BIO_ROWS, dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, _MINHASH_PRIME, size=BIO_BANDS * BIO_ROWS, dtype=np.uint64)
+
+FRAUD = 1
+BANNED = 2
+
+
+@dataclass
+class ClusterFeatures:
+    cluster_size: int
+    # Accounts in the cluster other than this one, by label
+    linked_fraud_accounts: int
+    linked_banned_accounts: int
+
+    @property
+    def linked_accounts(self) -> int:
+        return self.cluster_size - 1
+
+    @property
+    def linked_fraud_rate(self) -> float:
+        return self.linked_fraud_accounts / self.linked_accounts if self.linked_accounts else 0.0
+
+
+class AccountLinkageGraph:
+    def __init__(self, max_shared: int = 50, secret: str = "", max_age: float = 0.0):
+        self.max_shared = max_shared
+        # Seconds an observation counts toward links; 0 keeps it forever
+        self.max_age = max_age
+        # Keys the identifier digests, so they cannot be matched against a list of known values
+        self._secret = hashlib.blake2b(secret.encode(), digest_size=32).digest() if secret else b""
+        self._accounts: Dict[str, int] = {}
+        self._account_ids: List[str] = []
+        self._parent: List[int] = []
+        # Per root: accounts in the cluster and how many carry each label
+        self._size: List[int] = []
+        self._fraud: List[int] = []
+        self._banned: List[int] = []
+        self._labels = bytearray()
+        # Identifier digest -> (first account seen with it, accounts seen with it)
+        self._identifiers: Dict[int, Tuple[int, int]] = {}
+        # (account, digest) -> when it was last observed; repeated events do not inflate counts
+        self._seen: Dict[Tuple[int, int], float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._account_ids)
+
+    def observe(self, account_id: str, identifiers: Iterable[Tuple[str, str]], bio: Optional[str] = None,
+                now: Optional[float] = None) -> List[str]:
+        """Record an account's (kind, value) identifiers and bio; returns the kinds that link it to other accounts"""
+        keys = [(kind, self._digest(f"{kind}:{value.strip().lower()}")) for kind, value in identifiers if value]
+        keys += [("bio", key) for key in self._bio_keys(bio)]
+        now = time.time() if now is None else now
+        shared = set()
+        with self._lock:
+            account = self._account(account_id)
+            for kind, key in keys:
+                owner, count = self._identifiers.get(key, (account, 0))
+                if (account, key) not in self._seen:
+                    count += 1
+                    self._identifiers[key] = (owner, count)
+                self._seen[(account, key)] = now
+                if owner != account and count <= self.max_shared:
+                    self._union(owner, account)
+                if 1 < count <= self.max_shared:
+                    shared.add(kind)
+        return sorted(shared)
+
+    def label(self, account_id: str, fraud: Optional[bool] = None, banned: Optional[bool] = None) -> None:
+        """Set or clear an account's fraud and banned labels"""
+        with self._lock:
+            account = self._account(account_id)
+            labels = self._labels[account]
+            if fraud is not None:
+                labels = labels | FRAUD if fraud else labels & ~FRAUD
+            if banned is not None:
+                labels = labels | BANNED if banned else labels & ~BANNED
+            root = self._find(account)
+            self._fraud[root] += bool(labels & FRAUD) - bool(self._labels[account] & FRAUD)
+            self._banned[root] += bool(labels & BANNED) - bool(self._labels[account] & BANNED)
+            self._labels[account] = labels
+
+    def rebuild(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop observations older than max_age and re-link accounts from the rest; labels are kept"""
+        now = time.time() if now is None else now
+        with self._lock:
+            before = len(self._seen)
+            if self.max_age > 0:
+                self._seen = {pair: at for pair, at in self._seen.items() if now - at <= self.max_age}
+            # Insertion order keeps the first account seen with an identifier as its owner
+            self._identifiers = {}
+            for account, key in self._seen:
+                owner, count = self._identifiers.get(key, (account, 0))
+                self._identifiers[key] = (owner, count + 1)
+
+            accounts = len(self._account_ids)
+            self._parent = list(range(accounts))
+            self._size = [1] * accounts
+            self._fraud = [1 if labels & FRAUD else 0 for labels in self._labels]
+            self._banned = [1 if labels & BANNED else 0 for labels in self._labels]
+            for account, key in self._seen:
+                owner, count = self._identifiers[key]
+                if owner != account and count <= self.max_shared:
+                    self._union(owner, account)
+            return {
+                "expired": before - len(self._seen),
+                "observations": len(self._seen),
+                "linked_accounts": sum(1 for account in range(accounts) if self._size[self._find(account)] > 1),
+            }
+
+    def features(self, account_id: str) -> ClusterFeatures:
+        with self._lock:
+            account = self._accounts.get(account_id)
+            if account is None:
+                return ClusterFeatures(1, 0, 0)
+            root = self._find(account)
+            labels = self._labels[account]
+            return ClusterFeatures(
+                self._size[root],
+                self._fraud[root] - bool(labels & FRAUD),
+                self._banned[root] - bool(labels & BANNED),
+            )
+
+    def clusters(self, min_size: int = 2) -> Dict[str, List[str]]:
+        """Clusters of at least min_size accounts, keyed by their root account id (a full scan)"""
+        with self._lock:
+            members: Dict[int, List[str]] = {}
+            for account, account_id in enumerate(self._account_ids):
+                root = self._find(account)
+                if self._size[root] >= min_size:
+                    members.setdefault(root, []).append(account_id)
+            return {self._account_ids[root]: ids for root, ids in members.items()}
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        with self._lock:
+            keys = list(self._identifiers)
+            seen = np.array(list(self._seen), dtype=np.uint64).reshape(len(self._seen), 2)
+            arrays = {
+                "parent": np.array(self._parent, dtype=np.int64),
+                "size": np.array(self._size, dtype=np.int64),
+                "fraud": np.array(self._fraud, dtype=np.int64),
+                "banned": np.array(self._banned, dtype=np.int64),
+                "labels": np.frombuffer(bytes(self._labels), dtype=np.uint8),
+                "identifier_keys": np.array(keys, dtype=np.uint64),
+                "identifier_owners": np.array([self._identifiers[k][0] for k in keys], dtype=np.int64),
+                "identifier_counts": np.array([self._identifiers[k][1] for k in keys], dtype=np.int64),
+                "seen": seen,
+                "seen_at": np.array(list(self._seen.values()), dtype=np.float64),
+            }
+            return arrays, {"accounts": list(self._account_ids)}
+
+    def load_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> None:
+        with self._lock:
+            self._account_ids = list(strings["accounts"])
+            self._accounts = {account_id: i for i, account_id in enumerate(self._account_ids)}
+            self._parent = arrays["parent"].tolist()
+            self._size = arrays["size"].tolist()
+            self._fraud = arrays["fraud"].tolist()
+            self._banned = arrays["banned"].tolist()
+            self._labels = bytearray(arrays["labels"].tobytes())
+            self._identifiers = dict(zip(
+                arrays["identifier_keys"].tolist(),
+                zip(arrays["identifier_owners"].tolist(), arrays["identifier_counts"].tolist()),
+            ))
+            seen = map(tuple, arrays["seen"].tolist())
+            if "seen_at" in arrays:
+                self._seen = dict(zip(seen, arrays["seen_at"].tolist()))
+            else:
+                # Bundles written before observations were timestamped: age them from now
+                self._seen = dict.fromkeys(seen, time.time())
+
+    def _account(self, account_id: str) -> int:
+        account = self._accounts.get(account_id)
+        if account is None:
+            account = len(self._account_ids)
+            self._accounts[account_id] = account
+            self._account_ids.append(account_id)
+            self._parent.append(account)
+            self._size.append(1)
+            self._fraud.append(0)
+            self._banned.append(0)
+            self._labels.append(0)
+        return account
+
+    def _find(self, account: int) -> int:
+        parent = self._parent
+        while parent[account] != account:
+            parent[account] = parent[parent[account]]
+            account = parent[account]
+        return account
+
+    def _union(self, a: int, b: int) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        self._fraud[a] += self._fraud[b]
+        self._banned[a] += self._banned[b]
+
+    def _digest(self, value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8, key=self._secret).digest(), "big")
+
+    def _bio_keys(self, bio: Optional[str]) -> List[int]:
+        words = tokenize(bio)
+        if len(words) < MIN_BIO_WORDS:
+            return []
+        shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+        hashes = np.array([zlib.crc32(s.encode()) for s in shingles], dtype=np.uint64)
+        signature = ((_MINHASH_A[:, None] * hashes[None, :] + _MINHASH_B[:, None]) % _MINHASH_PRIME).min(axis=1)
+        return [
+            self._digest(f"bio:{band}:{signature[band * BIO_ROWS:(band + 1) * BIO_ROWS].tobytes().hex()}")
+            for band in range(BIO_BANDS)
+        ]
+
+
+def account_identifiers(user_data: Dict) -> List[Tuple[str, str]]:
+    """(kind, value) identifiers in a user payload; each field may be a list or a single value"""
+    identifiers = []
+    for kind, field in IDENTIFIER_FIELDS.items():
+        values = user_data.get(field) or []
+        if isinstance(values, str):
+            values = [values]
+        identifiers.extend((kind, str(value)) for value in values)
+    return identifiers
+
+
+@lru_cache()
+def get_linkage_graph() -> AccountLinkageGraph:
+    return AccountLinkageGraph(
+        max_shared=int(os.getenv("FRAUD_LINKAGE_MAX_SHARED", "50")),
+        secret=os.getenv("FRAUD_LINKAGE_SECRET", ""),
+        max_age=float(os.getenv("FRAUD_LINKAGE_MAX_AGE_DAYS", "0")) * 86400,
+    )
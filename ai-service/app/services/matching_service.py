@@ -1,12 +1,117 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import heapq
+import os
+import time
 import numpy as np
 from .embedding_service import get_embedding_service
+from .skill_index import SkillIndex, canonical_skill
+from .sharded_scoring import top_k_sharded
+from .semantic_cache import SemanticMatchCache, get_semantic_match_cache
+from .model_migration import get_model_migrations
+from ..deadline import choose_tier
+from ..metrics import timed, CANDIDATES_SCORED, CANDIDATES_PRUNED
 from ..models.schemas import FreelancerProfile, FreelancerMatch, JobMatch
+from ..models.columnar import ColumnarError, FreelancerColumns, JobColumns
+
+
+class TopK:
+    """Bounded min-heap of the best `limit` items by score.
+
+    Among equal scores the earliest pushed item wins, which matches a stable
+    descending sort over the full list.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, item: Any, order: Optional[int] = None) -> None:
+        """Offer an item; `order` overrides arrival order as the tie-breaker (lower wins)"""
+        entry = (score, -(self._seq if order is None else order), item)
+        self._seq += 1
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif self.limit > 0 and entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def min_score(self) -> Optional[float]:
+        """Score of the weakest kept item, or None while fewer than limit are kept"""
+        if len(self._heap) < self.limit:
+            return None
+        return self._heap[0][0]
+
+    def items(self) -> List[Any]:
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+
+class StreamingMatcher:
+    """Scores candidates in fixed-size chunks as they arrive, keeping only the top `limit`"""
+
+    def __init__(
+        self,
+        score_chunk: Callable[[List[Any]], List[tuple]],
+        build: Callable[[Any, tuple], Any],
+        limit: int,
+        chunk_size: int = 256,
+    ):
+        self._score_chunk = score_chunk
+        self._build = build
+        self._chunk_size = chunk_size
+        self._pending: List[Any] = []
+        self._top = TopK(limit)
+        self.candidates_seen = 0
+
+    def add(self, candidate: Any) -> None:
+        self._pending.append(candidate)
+        if len(self._pending) >= self._chunk_size:
+            self._flush()
+
+    def finish(self) -> List[Any]:
+        """Score any remaining candidates and build result models for the top `limit`"""
+        self._flush()
+        with timed("matching.build_results"):
+            return [self._build(candidate, components) for candidate, components in self._top.items()]
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        chunk, self._pending = self._pending, []
+        self.candidates_seen += len(chunk)
+        for candidate, components in zip(chunk, self._score_chunk(chunk)):
+            # Rank on the rounded score the response exposes, as the exhaustive sort does
+            self._top.push(round(components[0] * 100, 2), (candidate, components))
+
+
+# Added to upper bounds so float rounding in the exact score can never exceed them
+BOUND_SLACK = 1e-6
+# Weight of the newest measurement in the per-candidate skill matching cost average
+COST_EMA_WEIGHT = 0.2
+# Candidates fully scored per round of bound-pruned evaluation (at least `limit`)
+PRUNING_CHUNK_SIZE = 64
 
 
 class MatchingService:
     def __init__(self):
         self.embedding_service = get_embedding_service()
+        # Above this many candidates, only a lexically prefiltered shortlist is fully scored (0 = off)
+        self.shortlist_size = int(os.getenv("MATCHING_SHORTLIST_SIZE", "0"))
+        # Columnar requests with at least shard_min_candidates rows are scored in `shards` row ranges:
+        # 1 runs them in process, more use a process pool, 0 turns sharding off
+        self.shards = int(os.getenv("MATCHING_SHARDS", "0"))
+        self.shard_min_candidates = int(os.getenv("MATCHING_SHARD_MIN_CANDIDATES", "20000"))
+        # Skip full scoring of candidates whose score upper bound cannot reach the current top `limit`
+        self.bound_pruning = os.getenv("MATCHING_BOUND_PRUNING", "true").lower() not in ("0", "false", "no")
+        # Approximate reuse of rankings for near-identical job queries over the same candidates (off by default)
+        self.semantic_cache: Optional[SemanticMatchCache] = None
+        if os.getenv("MATCHING_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes"):
+            self.semantic_cache = get_semantic_match_cache()
+        # Moving average of skill matching seconds per candidate, for latency budget planning
+        self.skill_match_seconds: Optional[float] = None
 
     def match_freelancers_to_job(
         self,
@@ -18,60 +123,255 @@ class MatchingService:
         limit: int = 20
     ) -> List[FreelancerMatch]:
         """Match freelancers to a job based on skills, experience, and rate"""
+        args = (job_description, required_skills, freelancers, budget_min, budget_max, limit)
+        matches = self._match_freelancers_to_job(*args)
+        migration = get_model_migrations().active()
+        if migration is not None:
+            migration.shadow(
+                "freelancers_to_job",
+                [m.freelancer_id for m in matches],
+                lambda: [m.freelancer_id for m in self._match_freelancers_to_job(*args)],
+            )
+        return matches
 
+    def _match_freelancers_to_job(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        budget_min: Optional[float],
+        budget_max: Optional[float],
+        limit: int
+    ) -> List[FreelancerMatch]:
         if not freelancers:
             return []
 
-        # Create job embedding from description + skills
-        job_text = f"{job_description} Skills: {', '.join(required_skills)}"
-        job_embedding = self.embedding_service.encode_single(job_text)
+        tier = self._plan_freelancer_tier(job_description, required_skills, freelancers)
+        if tier != "full":
+            freelancers = self._shortlist(
+                freelancers,
+                lambda f: (f.skills, f.bio),
+                required_skills,
+                job_description,
+                "freelancers_to_job"
+            )
+            job_embedding = None if tier == "skills_and_rate" else self._job_embedding(job_description, required_skills)
+            terms = self._freelancer_terms(job_embedding, required_skills, freelancers, tier)
+            return self._rank_freelancer_terms(freelancers, terms, budget_min, budget_max, limit)
+
+        # Cached entries hold embeddings of the active space, so shadow scoring in another space skips them
+        if self.semantic_cache is not None and not self.embedding_service.shadowing:
+            return self._match_freelancers_cached(
+                job_description, required_skills, freelancers, budget_min, budget_max, limit
+            )
 
-        matches = []
+        freelancers = self._shortlist(
+            freelancers,
+            lambda f: (f.skills, f.bio),
+            required_skills,
+            job_description,
+            "freelancers_to_job"
+        )
+        if self.bound_pruning:
+            job_embedding = self._job_embedding(job_description, required_skills)
+            return self._match_with_bounds(
+                freelancers,
+                self._freelancer_upper_bounds(required_skills, freelancers, budget_min, budget_max),
+                lambda chunk: self._score_freelancers(job_embedding, required_skills, chunk, budget_min, budget_max),
+                self._build_freelancer_match,
+                limit,
+                "freelancers_to_job"
+            )
 
+        matcher = self.stream_freelancers_to_job(
+            job_description, required_skills, budget_min, budget_max, limit, chunk_size=len(freelancers)
+        )
         for freelancer in freelancers:
-            # Create freelancer embedding
-            freelancer_text = f"{freelancer.bio or ''} Skills: {', '.join(freelancer.skills)}"
-            freelancer_embedding = self.embedding_service.encode_single(freelancer_text)
+            matcher.add(freelancer)
+        return matcher.finish()
+
+    def _match_freelancers_cached(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        budget_min: Optional[float],
+        budget_max: Optional[float],
+        limit: int
+    ) -> List[FreelancerMatch]:
+        """match_freelancers_to_job through the semantic cache; a miss scores every shortlisted candidate"""
+        cache = self.semantic_cache
+        job_embedding = self._job_embedding(job_description, required_skills)
+        group = cache.group_key(required_skills, budget_max, freelancers)
+        hit = cache.lookup(group, job_embedding)
 
-            # Calculate skill match
-            skill_match = self._calculate_skill_match(required_skills, freelancer.skills)
+        if hit is not None:
+            entry, _ = hit
+            candidates = [freelancers[i] for i in entry.rows.tolist()]
+            terms = (entry.skill_matches, entry.semantic_scores, entry.exp_bonus, entry.rating_bonus)
+            CANDIDATES_PRUNED.inc(len(freelancers), "freelancers_to_job", "semantic_cache")
+            matches = self._rank_freelancer_terms(candidates, terms, budget_min, budget_max, limit)
+            if cache.should_verify():
+                exact = self._rank_freelancer_terms(
+                    candidates,
+                    self._freelancer_terms(job_embedding, required_skills, candidates),
+                    budget_min, budget_max, limit
+                )
+                cache.record_overlap([m.freelancer_id for m in matches], [m.freelancer_id for m in exact])
+            return matches
 
-            # Calculate semantic similarity
-            semantic_score = self.embedding_service.similarity(job_embedding, freelancer_embedding)
+        positions = {id(f): i for i, f in enumerate(freelancers)}
+        candidates = self._shortlist(
+            freelancers,
+            lambda f: (f.skills, f.bio),
+            required_skills,
+            job_description,
+            "freelancers_to_job"
+        )
+        terms = self._freelancer_terms(job_embedding, required_skills, candidates)
+        cache.store(group, job_embedding, np.array([positions[id(f)] for f in candidates], dtype=np.int64), *terms)
+        return self._rank_freelancer_terms(candidates, terms, budget_min, budget_max, limit)
 
-            # Calculate rate match
-            rate_match = self._calculate_rate_match(
-                freelancer.hourly_rate, budget_min, budget_max
-            )
+    def _plan_freelancer_tier(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile]
+    ) -> str:
+        def estimate() -> Tuple[float, ...]:
+            query = f"{job_description} Skills: {', '.join(required_skills)}"
+            documents = [f"{f.bio or ''} Skills: {', '.join(f.skills)}" for f in freelancers]
+            return self._tier_costs(query, documents)
 
-            # Experience bonus
-            exp_bonus = min(freelancer.experience_years or 0, 10) / 10 * 0.1
+        return choose_tier("matching.freelancers_to_job", estimate)
 
-            # Rating bonus
-            rating_bonus = (freelancer.avg_rating / 5) * 0.1
+    def _plan_job_tier(self, freelancer_skills: List[str], freelancer_bio: str, jobs: List[Dict[str, Any]]) -> str:
+        def estimate() -> Tuple[float, ...]:
+            query = f"{freelancer_bio} Skills: {', '.join(freelancer_skills)}"
+            documents = [
+                f"{job.get('title', '')} {job.get('description', '')} Skills: {', '.join(job.get('skills', []))}"
+                for job in jobs
+            ]
+            return self._tier_costs(query, documents)
 
-            # Calculate final score
-            final_score = (
-                skill_match * 0.4 +
-                semantic_score * 0.3 +
-                rate_match * 0.15 +
+        return choose_tier("matching.jobs_to_freelancer", estimate)
+
+    def _tier_costs(self, query: str, documents: List[str], encoded: bool = False) -> Tuple[float, ...]:
+        """Estimated seconds for each tier in app.deadline.TIERS order; `encoded` documents come with embeddings"""
+        # Only a shortlist is scored when the prefilter is on
+        scale = 1.0
+        if self.shortlist_size and len(documents) > self.shortlist_size:
+            scale = self.shortlist_size / len(documents)
+        query_seconds = self.embedding_service.estimate_encode_seconds([query])
+        document_seconds = 0.0 if encoded else self.embedding_service.estimate_encode_seconds(documents) * scale
+        skill_seconds = (self.skill_match_seconds or 0.0) * len(documents) * scale
+        return (
+            query_seconds + document_seconds + skill_seconds,
+            query_seconds + document_seconds,
+            query_seconds,
+            0.0,
+        )
+
+    def _skill_matches(self, pairs: List[Tuple[List[str], List[str]]], tier: str = "full") -> List[float]:
+        """Skill match per (required, available) pair; exact names only below the full tier"""
+        with timed("matching.skill_match"):
+            if tier != "full":
+                return [self._direct_skill_match(required, available) for required, available in pairs]
+            start = time.perf_counter()
+            matches = [self._calculate_skill_match(required, available) for required, available in pairs]
+            if pairs:
+                per_candidate = (time.perf_counter() - start) / len(pairs)
+                if self.skill_match_seconds is None:
+                    self.skill_match_seconds = per_candidate
+                else:
+                    self.skill_match_seconds += COST_EMA_WEIGHT * (per_candidate - self.skill_match_seconds)
+            return matches
+
+    def _semantic_scores(self, query_embedding: Optional[np.ndarray], documents: List[str], tier: str) -> np.ndarray:
+        """Query-document similarity per document, as far as the tier allows"""
+        if tier == "skills_and_rate":
+            return np.zeros(len(documents))
+        if tier == "cached_embeddings":
+            embeddings, found = self.embedding_service.cached_documents(documents)
+            scores = np.zeros(len(documents))
+            if found.any():
+                scores[found] = self.embedding_service.batch_similarity(query_embedding, embeddings[found])
+                # Documents without a cached embedding get the average, neither favoured nor buried
+                scores[~found] = scores[found].mean()
+            return scores
+        with timed("matching.encode"):
+            embeddings = self.embedding_service.encode_documents(documents)
+        return self.embedding_service.batch_similarity(query_embedding, embeddings).astype(np.float64)
+
+    def _freelancer_terms(
+        self,
+        job_embedding: Optional[np.ndarray],
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        tier: str = "full"
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Budget-independent score terms per freelancer: skill match, semantic score, experience and rating bonus"""
+        semantic_scores = self._semantic_scores(
+            job_embedding,
+            [f"{freelancer.bio or ''} Skills: {', '.join(freelancer.skills)}" for freelancer in freelancers],
+            tier
+        )
+        skill_matches = np.array(
+            self._skill_matches([(required_skills, freelancer.skills) for freelancer in freelancers], tier),
+            dtype=np.float64
+        )
+        exp_bonus = np.array([min(f.experience_years or 0, 10) / 10 * 0.1 for f in freelancers], dtype=np.float64)
+        rating_bonus = np.array([(f.avg_rating / 5) * 0.1 for f in freelancers], dtype=np.float64)
+        CANDIDATES_SCORED.inc(len(freelancers), "freelancers_to_job")
+        return skill_matches, semantic_scores, exp_bonus, rating_bonus
+
+    def _rank_freelancer_terms(
+        self,
+        freelancers: List[FreelancerProfile],
+        terms: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        budget_min: Optional[float],
+        budget_max: Optional[float],
+        limit: int
+    ) -> List[FreelancerMatch]:
+        """Top `limit` from precomputed terms, with the rate match computed for this budget"""
+        skill_matches, semantic_scores, exp_bonus, rating_bonus = terms
+        with timed("matching.score"):
+            rates = np.array([np.nan if f.hourly_rate is None else f.hourly_rate for f in freelancers], dtype=np.float64)
+            rate_matches = self._rate_match_array(rates, budget_min, budget_max)
+            final_scores = (
+                skill_matches * 0.4 +
+                semantic_scores * 0.3 +
+                rate_matches * 0.15 +
                 exp_bonus +
                 rating_bonus
             )
+            top = self._top_indices(final_scores, limit).tolist()
+        with timed("matching.build_results"):
+            return [
+                self._build_freelancer_match(
+                    freelancers[i],
+                    (float(final_scores[i]), float(skill_matches[i]), float(exp_bonus[i]), float(rate_matches[i]))
+                )
+                for i in top
+            ]
 
-            matches.append(FreelancerMatch(
-                freelancer_id=freelancer.user_id,
-                name=freelancer.name,
-                match_score=round(final_score * 100, 2),
-                skill_match=round(skill_match * 100, 2),
-                experience_match=round((exp_bonus * 10) * 100, 2),
-                rate_match=round(rate_match * 100, 2),
-                skills=freelancer.skills
-            ))
+    def stream_freelancers_to_job(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        limit: int = 20,
+        chunk_size: int = 256
+    ) -> StreamingMatcher:
+        """Incremental freelancer matching: add() profiles as they are parsed, then finish()"""
+
+        job_embedding = self._job_embedding(job_description, required_skills)
+
+        def score_chunk(freelancers: List[FreelancerProfile]) -> List[tuple]:
+            return self._score_freelancers(job_embedding, required_skills, freelancers, budget_min, budget_max)
 
-        # Sort by match score and return top matches
-        matches.sort(key=lambda x: x.match_score, reverse=True)
-        return matches[:limit]
+        return StreamingMatcher(score_chunk, self._build_freelancer_match, limit, chunk_size)
 
     def match_jobs_to_freelancer(
         self,
@@ -82,52 +382,703 @@ class MatchingService:
         limit: int = 20
     ) -> List[JobMatch]:
         """Match jobs to a freelancer based on their skills and preferences"""
+        args = (freelancer_skills, freelancer_bio, jobs, preferred_rate, limit)
+        matches = self._match_jobs_to_freelancer(*args)
+        migration = get_model_migrations().active()
+        if migration is not None:
+            migration.shadow(
+                "jobs_to_freelancer",
+                [m.job_id for m in matches],
+                lambda: [m.job_id for m in self._match_jobs_to_freelancer(*args)],
+            )
+        return matches
 
+    def _match_jobs_to_freelancer(
+        self,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float],
+        limit: int
+    ) -> List[JobMatch]:
         if not jobs:
             return []
 
-        # Create freelancer embedding
-        freelancer_text = f"{freelancer_bio} Skills: {', '.join(freelancer_skills)}"
-        freelancer_embedding = self.embedding_service.encode_single(freelancer_text)
+        tier = self._plan_job_tier(freelancer_skills, freelancer_bio, jobs)
+        jobs = self._shortlist(
+            jobs,
+            lambda j: (j.get("skills", []), f"{j.get('title', '')} {j.get('description', '')}"),
+            freelancer_skills,
+            freelancer_bio,
+            "jobs_to_freelancer"
+        )
+        if tier != "full":
+            return self._match_jobs_degraded(tier, freelancer_skills, freelancer_bio, jobs, preferred_rate, limit)
 
-        matches = []
+        if self.bound_pruning:
+            freelancer_embedding = self._freelancer_embedding(freelancer_skills, freelancer_bio)
+            return self._match_with_bounds(
+                jobs,
+                self._job_upper_bounds(freelancer_skills, jobs, preferred_rate),
+                lambda chunk: self._score_jobs(freelancer_embedding, freelancer_skills, chunk, preferred_rate),
+                self._build_job_match,
+                limit,
+                "jobs_to_freelancer"
+            )
 
+        matcher = self.stream_jobs_to_freelancer(
+            freelancer_skills, freelancer_bio, preferred_rate, limit, chunk_size=len(jobs)
+        )
         for job in jobs:
-            job_skills = job.get("skills", [])
-            job_description = job.get("description", "")
+            matcher.add(job)
+        return matcher.finish()
+
+    def _match_jobs_degraded(
+        self,
+        tier: str,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float],
+        limit: int
+    ) -> List[JobMatch]:
+        """match_jobs_to_freelancer at a reduced tier chosen by the latency budget"""
+        scored = self._score_jobs_degraded(tier, freelancer_skills, freelancer_bio, jobs, preferred_rate)
+        with timed("matching.score"):
+            top = self._top_indices(np.array([components[0] for components in scored], dtype=np.float64), limit)
+        with timed("matching.build_results"):
+            return [self._build_job_match(jobs[i], scored[i]) for i in top.tolist()]
+
+    def _score_jobs_degraded(
+        self,
+        tier: str,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float]
+    ) -> List[tuple]:
+        """_score_jobs components at a reduced tier"""
+        freelancer_embedding = None
+        if tier != "skills_and_rate":
+            freelancer_embedding = self._freelancer_embedding(freelancer_skills, freelancer_bio)
+        semantic_scores = self._semantic_scores(
+            freelancer_embedding,
+            [
+                f"{job.get('title', '')} {job.get('description', '')} Skills: {', '.join(job.get('skills', []))}"
+                for job in jobs
+            ],
+            tier
+        )
+        skill_matches = np.array(
+            self._skill_matches([(job.get("skills", []), freelancer_skills) for job in jobs], tier),
+            dtype=np.float64
+        )
+        with timed("matching.score"):
+            budget_matches = np.array([
+                self._calculate_budget_match(preferred_rate, job.get("budget_max")) for job in jobs
+            ], dtype=np.float64)
+            final_scores = skill_matches * 0.5 + semantic_scores * 0.35 + budget_matches * 0.15
+        CANDIDATES_SCORED.inc(len(jobs), "jobs_to_freelancer")
+        return list(zip(final_scores.tolist(), skill_matches.tolist(), budget_matches.tolist()))
+
+    def stream_jobs_to_freelancer(
+        self,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        preferred_rate: Optional[float] = None,
+        limit: int = 20,
+        chunk_size: int = 256
+    ) -> StreamingMatcher:
+        """Incremental job matching: add() jobs as they are parsed, then finish()"""
+
+        freelancer_embedding = self._freelancer_embedding(freelancer_skills, freelancer_bio)
+
+        def score_chunk(jobs: List[Dict[str, Any]]) -> List[tuple]:
+            return self._score_jobs(freelancer_embedding, freelancer_skills, jobs, preferred_rate)
+
+        return StreamingMatcher(score_chunk, self._build_job_match, limit, chunk_size)
+
+    def rank_freelancers_to_job(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None
+    ) -> Tuple[List[FreelancerProfile], np.ndarray]:
+        """Every freelancer best first, with score components per row, for paging with cursors"""
+
+        tier = self._plan_freelancer_tier(job_description, required_skills, freelancers) if freelancers else "full"
+        freelancers = self._shortlist(
+            freelancers,
+            lambda f: (f.skills, f.bio),
+            required_skills,
+            job_description,
+            "freelancers_to_job"
+        )
+        if not freelancers:
+            return [], np.empty((0, 4))
+        job_embedding = None if tier == "skills_and_rate" else self._job_embedding(job_description, required_skills)
+        if tier != "full":
+            skill_matches, semantic_scores, exp_bonus, rating_bonus = self._freelancer_terms(
+                job_embedding, required_skills, freelancers, tier
+            )
+            rates = np.array(
+                [np.nan if f.hourly_rate is None else f.hourly_rate for f in freelancers], dtype=np.float64
+            )
+            rate_matches = self._rate_match_array(rates, budget_min, budget_max)
+            final_scores = skill_matches * 0.4 + semantic_scores * 0.3 + rate_matches * 0.15 + exp_bonus + rating_bonus
+            return self._rank(freelancers, list(zip(final_scores, skill_matches, exp_bonus, rate_matches)))
+        return self._rank(
+            freelancers,
+            self._score_freelancers(job_embedding, required_skills, freelancers, budget_min, budget_max)
+        )
+
+    def rank_jobs_to_freelancer(
+        self,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Every job best first, with score components per row, for paging with cursors"""
+
+        tier = self._plan_job_tier(freelancer_skills, freelancer_bio, jobs) if jobs else "full"
+        jobs = self._shortlist(
+            jobs,
+            lambda j: (j.get("skills", []), f"{j.get('title', '')} {j.get('description', '')}"),
+            freelancer_skills,
+            freelancer_bio,
+            "jobs_to_freelancer"
+        )
+        if not jobs:
+            return [], np.empty((0, 3))
+        if tier != "full":
+            return self._rank(
+                jobs, self._score_jobs_degraded(tier, freelancer_skills, freelancer_bio, jobs, preferred_rate)
+            )
+        freelancer_embedding = self._freelancer_embedding(freelancer_skills, freelancer_bio)
+        return self._rank(
+            jobs,
+            self._score_jobs(freelancer_embedding, freelancer_skills, jobs, preferred_rate)
+        )
+
+    @staticmethod
+    def _rank(candidates: List[Any], scored: List[tuple]) -> Tuple[List[Any], np.ndarray]:
+        # Same order as the top-k paths: rounded score descending, ties in input order
+        components = np.array(scored, dtype=np.float64)
+        rounded = np.array([round(score * 100, 2) for score in components[:, 0].tolist()])
+        order = np.argsort(-rounded, kind="stable")
+        return [candidates[i] for i in order.tolist()], components[order]
+
+    def match_freelancer_columns(
+        self,
+        job_description: str,
+        required_skills: List[str],
+        columns: FreelancerColumns,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Columnar match_freelancers_to_job: the same tiers, shortlist and pruning, scored as arrays over rows"""
+        self._check_embedding_column(columns.embedding)
+
+        def documents(rows: List[int]) -> List[str]:
+            return [f"{columns.bio[i] or ''} Skills: {', '.join(columns.skills[i])}" for i in rows]
+
+        direction = "freelancers_to_job"
+        tier = choose_tier(f"matching.{direction}", lambda: self._tier_costs(
+            f"{job_description} Skills: {', '.join(required_skills)}",
+            documents(range(len(columns))),
+            encoded=columns.embedding is not None
+        )) if len(columns) else "full"
+        rows = self._shortlist(
+            list(range(len(columns))),
+            lambda i: (columns.skills[i], columns.bio[i]),
+            required_skills,
+            job_description,
+            direction
+        )
+        job_embedding = None
+        if rows and tier != "skills_and_rate":
+            job_embedding = self._job_embedding(job_description, required_skills)
+
+        rate_matches = self._rate_match_array(columns.hourly_rate, budget_min, budget_max)
+        exp_bonus = np.minimum(np.nan_to_num(columns.experience_years, nan=0.0), 10) / 10 * 0.1
+        rating_bonus = (columns.avg_rating / 5) * 0.1
+
+        def score_rows(chunk: List[int]) -> np.ndarray:
+            """(final_score, skill_match, exp_bonus, rate_match) per row, as _score_freelancers"""
+            skill_matches = np.array(
+                self._skill_matches([(required_skills, columns.skills[i]) for i in chunk], tier), dtype=np.float64
+            )
+            semantic_scores = self._column_semantic_scores(job_embedding, columns.embedding, documents, chunk, tier)
+            with timed("matching.score"):
+                final_scores = (
+                    skill_matches * 0.4 +
+                    semantic_scores * 0.3 +
+                    rate_matches[chunk] * 0.15 +
+                    exp_bonus[chunk] +
+                    rating_bonus[chunk]
+                )
+            CANDIDATES_SCORED.inc(len(chunk), direction)
+            return np.column_stack((final_scores, skill_matches, exp_bonus[chunk], rate_matches[chunk]))
+
+        if tier == "full" and self.shards > 0 and len(rows) >= self.shard_min_candidates:
+            with timed("matching.score_sharded"):
+                embeddings = (
+                    columns.embedding[rows] if columns.embedding is not None
+                    else self._encode_column_documents(documents(rows))
+                )
+                positions, final_scores, skill_matches = self._score_freelancer_shards(
+                    job_embedding, embeddings, required_skills, [columns.skills[i] for i in rows],
+                    rate_matches[rows], exp_bonus[rows], rating_bonus[rows], limit
+                )
+            CANDIDATES_SCORED.inc(len(rows), direction)
+            top = np.array(rows, dtype=np.int64)[positions]
+            components = np.column_stack((final_scores, skill_matches, exp_bonus[top], rate_matches[top]))
+        else:
+            top, components = self._match_rows(
+                rows,
+                lambda: (
+                    np.array([self._skill_match_bound(required_skills, columns.skills[i]) for i in rows]) * 0.4 +
+                    1.0 * 0.3 + rate_matches[rows] * 0.15 + exp_bonus[rows] + rating_bonus[rows]
+                ),
+                score_rows,
+                tier,
+                limit,
+                direction,
+                width=4
+            )
+
+        return {
+            "freelancer_id": [columns.user_id[i] for i in top],
+            "name": [columns.name[i] for i in top],
+            "match_score": self._percent(components[:, 0]),
+            "skill_match": self._percent(components[:, 1]),
+            "experience_match": self._percent(components[:, 2] * 10),
+            "rate_match": self._percent(components[:, 3]),
+            "skills": [columns.skills[i] for i in top],
+        }
+
+    def _score_freelancer_shards(
+        self,
+        job_embedding: np.ndarray,
+        freelancer_embeddings: np.ndarray,
+        required_skills: List[str],
+        skills: List[List[str]],
+        rate_matches: np.ndarray,
+        exp_bonus: np.ndarray,
+        rating_bonus: np.ndarray,
+        limit: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Top rows with their final scores and skill matches, scored across the shard process pool"""
+        # Skill lists become ids into one vocabulary, encoded once instead of per candidate
+        vocabulary: Dict[str, int] = {}
+        required = [vocabulary.setdefault(s.lower(), len(vocabulary)) for s in set(s.lower() for s in required_skills)]
+        indptr = np.zeros(len(skills) + 1, dtype=np.int64)
+        indices: List[int] = []
+        for row, row_skills in enumerate(skills):
+            indices.extend(vocabulary.setdefault(s.lower(), len(vocabulary)) for s in row_skills)
+            indptr[row + 1] = len(indices)
+
+        with timed("matching.encode"):
+            vocabulary_embeddings = self.embedding_service.encode(list(vocabulary)) if vocabulary else np.zeros((0, 1))
+        unit = vocabulary_embeddings / np.maximum(np.linalg.norm(vocabulary_embeddings, axis=1, keepdims=True), 1e-12)
+
+        results = top_k_sharded(
+            {
+                "query": np.asarray(job_embedding),
+                "embeddings": np.asarray(freelancer_embeddings),
+                "vocabulary": unit,
+                "required": np.array(required, dtype=np.int64),
+                "skill_indptr": indptr,
+                "skill_indices": np.array(indices, dtype=np.int64),
+                "rate_terms": rate_matches * 0.15,
+                "experience_terms": exp_bonus,
+                "rating_terms": rating_bonus,
+            },
+            rows=len(skills),
+            limit=limit,
+            required_count=len(required_skills),
+            shards=self.shards,
+        )
+        return (
+            np.array([r[1] for r in results], dtype=np.int64),
+            np.array([r[2] for r in results], dtype=np.float64),
+            np.array([r[3] for r in results], dtype=np.float64),
+        )
+
+    def match_job_columns(
+        self,
+        freelancer_skills: List[str],
+        freelancer_bio: str,
+        columns: JobColumns,
+        preferred_rate: Optional[float] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Columnar match_jobs_to_freelancer: the same tiers, shortlist and pruning, scored as arrays over rows"""
+        self._check_embedding_column(columns.embedding)
+
+        def documents(rows: List[int]) -> List[str]:
+            return [
+                f"{columns.title[i]} {columns.description[i]} Skills: {', '.join(columns.skills[i])}" for i in rows
+            ]
+
+        direction = "jobs_to_freelancer"
+        tier = choose_tier(f"matching.{direction}", lambda: self._tier_costs(
+            f"{freelancer_bio} Skills: {', '.join(freelancer_skills)}",
+            documents(range(len(columns))),
+            encoded=columns.embedding is not None
+        )) if len(columns) else "full"
+        rows = self._shortlist(
+            list(range(len(columns))),
+            lambda i: (columns.skills[i], f"{columns.title[i]} {columns.description[i]}"),
+            freelancer_skills,
+            freelancer_bio,
+            direction
+        )
+        freelancer_embedding = None
+        if rows and tier != "skills_and_rate":
+            freelancer_embedding = self._freelancer_embedding(freelancer_skills, freelancer_bio)
 
-            # Create job embedding
-            job_text = f"{job.get('title', '')} {job_description} Skills: {', '.join(job_skills)}"
-            job_embedding = self.embedding_service.encode_single(job_text)
+        budget_matches = np.ones(len(columns))
+        if preferred_rate:
+            budget_max = columns.budget_max
+            # Missing (NaN) and zero budgets keep the neutral 1.0, as in _score_jobs
+            over = (np.nan_to_num(budget_max, nan=0.0) != 0) & (preferred_rate > budget_max)
+            budget_matches[over] = np.maximum(0, 1 - (preferred_rate - budget_max[over]) / preferred_rate)
 
-            # Calculate skill match
-            skill_match = self._calculate_skill_match(job_skills, freelancer_skills)
+        def score_rows(chunk: List[int]) -> np.ndarray:
+            """(final_score, skill_match, budget_match) per row, as _score_jobs"""
+            skill_matches = np.array(
+                self._skill_matches([(columns.skills[i], freelancer_skills) for i in chunk], tier), dtype=np.float64
+            )
+            semantic_scores = self._column_semantic_scores(
+                freelancer_embedding, columns.embedding, documents, chunk, tier
+            )
+            with timed("matching.score"):
+                final_scores = skill_matches * 0.5 + semantic_scores * 0.35 + budget_matches[chunk] * 0.15
+            CANDIDATES_SCORED.inc(len(chunk), direction)
+            return np.column_stack((final_scores, skill_matches, budget_matches[chunk]))
+
+        top, components = self._match_rows(
+            rows,
+            lambda: (
+                np.array([self._skill_match_bound(columns.skills[i], freelancer_skills) for i in rows]) * 0.5 +
+                1.0 * 0.35 + budget_matches[rows] * 0.15
+            ),
+            score_rows,
+            tier,
+            limit,
+            direction,
+            width=3
+        )
+
+        return {
+            "job_id": [columns.job_id[i] for i in top],
+            "title": [columns.title[i] for i in top],
+            "match_score": self._percent(components[:, 0]),
+            "skill_match": self._percent(components[:, 1]),
+            "budget_match": self._percent(components[:, 2]),
+            "skills": [columns.skills[i] for i in top],
+        }
+
+    def _match_rows(
+        self,
+        rows: List[int],
+        upper_bounds: Callable[[], np.ndarray],
+        score_rows: Callable[[List[int]], np.ndarray],
+        tier: str,
+        limit: int,
+        direction: str,
+        width: int
+    ) -> Tuple[List[int], np.ndarray]:
+        """Best `limit` rows with their score components, ranked as the object paths rank candidates"""
+        if not rows or limit <= 0:
+            return [], np.empty((0, width))
+        if tier == "full" and self.bound_pruning:
+            entries = self._match_with_bounds(
+                rows, upper_bounds(), score_rows, lambda row, components: (row, components), limit, direction
+            )
+            return [row for row, _ in entries], np.array([c for _, c in entries], dtype=np.float64).reshape(-1, width)
+        components = score_rows(rows)
+        top = self._top_indices(components[:, 0], limit).tolist()
+        return [rows[i] for i in top], components[top]
+
+    def _column_semantic_scores(
+        self,
+        query_embedding: Optional[np.ndarray],
+        embeddings: Optional[np.ndarray],
+        documents: Callable[[List[int]], List[str]],
+        rows: List[int],
+        tier: str
+    ) -> np.ndarray:
+        """_semantic_scores for the given rows, from the request's embedding column when it has one"""
+        if embeddings is None or tier == "skills_and_rate":
+            return self._semantic_scores(query_embedding, documents(rows), tier)
+        with timed("matching.score"):
+            return self.embedding_service.batch_similarity(query_embedding, embeddings[rows]).astype(np.float64)
+
+    def _encode_column_documents(self, documents: List[str]) -> np.ndarray:
+        with timed("matching.encode"):
+            return self.embedding_service.encode_documents(documents)
+
+    def _check_embedding_column(self, embeddings: Optional[np.ndarray]) -> None:
+        dim = self.embedding_service.space.dim
+        if embeddings is not None and embeddings.shape[1] != dim:
+            raise ColumnarError(f"Column 'embedding' has {embeddings.shape[1]} dimensions, the model produces {dim}")
+
+    def _job_embedding(self, job_description: str, required_skills: List[str]) -> np.ndarray:
+        # Create job embedding from description + skills
+        with timed("matching.encode"):
+            job_text = f"{job_description} Skills: {', '.join(required_skills)}"
+            return self.embedding_service.encode_documents([job_text])[0]
+
+    def _freelancer_embedding(self, freelancer_skills: List[str], freelancer_bio: str) -> np.ndarray:
+        with timed("matching.encode"):
+            freelancer_text = f"{freelancer_bio} Skills: {', '.join(freelancer_skills)}"
+            return self.embedding_service.encode_documents([freelancer_text])[0]
 
+    def _match_with_bounds(
+        self,
+        candidates: List[Any],
+        upper_bounds: np.ndarray,
+        score_chunk: Callable[[List[Any]], List[tuple]],
+        build: Callable[[Any, tuple], Any],
+        limit: int,
+        direction: str
+    ) -> List[Any]:
+        """Exact top `limit` that fully scores candidates in descending upper-bound order.
+
+        Once the k-th best rounded score exceeds a candidate's rounded upper
+        bound, that candidate and every later one are skipped. Ties keep
+        input order, so the result equals exhaustive scoring.
+        """
+        if limit <= 0:
+            return []
+
+        top = TopK(limit)
+        order = np.argsort(-upper_bounds, kind="stable").tolist()
+        ceilings = [round(bound * 100, 2) for bound in (upper_bounds + BOUND_SLACK).tolist()]
+        chunk_size = max(limit, PRUNING_CHUNK_SIZE)
+
+        scored = 0
+        for start in range(0, len(order), chunk_size):
+            floor = top.min_score()
+            chunk = [i for i in order[start:start + chunk_size] if floor is None or ceilings[i] >= floor]
+            if not chunk:
+                break
+            for i, components in zip(chunk, score_chunk([candidates[i] for i in chunk])):
+                top.push(round(components[0] * 100, 2), (candidates[i], components), order=i)
+            scored += len(chunk)
+
+        CANDIDATES_PRUNED.inc(len(candidates) - scored, direction, "bound")
+        with timed("matching.build_results"):
+            return [build(candidate, components) for candidate, components in top.items()]
+
+    def _freelancer_upper_bounds(
+        self,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        budget_min: Optional[float],
+        budget_max: Optional[float]
+    ) -> np.ndarray:
+        """Best final score each freelancer could reach, from the components that need no encoding"""
+        bounds = []
+        for freelancer in freelancers:
+            # Same terms and order as _score_freelancers, with semantic similarity at its maximum
+            bounds.append(
+                self._skill_match_bound(required_skills, freelancer.skills) * 0.4 +
+                1.0 * 0.3 +
+                self._calculate_rate_match(freelancer.hourly_rate, budget_min, budget_max) * 0.15 +
+                min(freelancer.experience_years or 0, 10) / 10 * 0.1 +
+                (freelancer.avg_rating / 5) * 0.1
+            )
+        return np.array(bounds, dtype=np.float64)
+
+    def _job_upper_bounds(
+        self,
+        freelancer_skills: List[str],
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float]
+    ) -> np.ndarray:
+        """Best final score each job could reach, from the components that need no encoding"""
+        return np.array([
+            self._skill_match_bound(job.get("skills", []), freelancer_skills) * 0.5 +
+            1.0 * 0.35 +
+            self._calculate_budget_match(preferred_rate, job.get("budget_max")) * 0.15
+            for job in jobs
+        ], dtype=np.float64)
+
+    @staticmethod
+    def _skill_match_bound(required: List[str], available: List[str]) -> float:
+        """Upper bound of _calculate_skill_match without encoding: every unmatched skill counted as a perfect match"""
+        if not required:
+            return 1.0
+        required_lower = set(s.lower() for s in required)
+        available_lower = set(s.lower() for s in available)
+        direct_matches = len(required_lower & available_lower)
+        possible = len(required_lower) - direct_matches if available_lower else 0
+        return min((direct_matches + possible) / len(required), 1.0)
+
+    def _shortlist(
+        self,
+        candidates: List[Any],
+        fields: Callable[[Any], Tuple[List[str], Optional[str]]],
+        skills: List[str],
+        text: str,
+        direction: str
+    ) -> List[Any]:
+        """Candidates kept for full scoring, in input order.
+
+        Candidates are ranked by how many of the query skills they list. Ties
+        at the cutoff are broken by BM25 of their text against the query text,
+        scored over the tied candidates only, then by input order. Candidates
+        that are indexed already, such as the materialized top-match entities,
+        are shortlisted from their SkillIndex instead (SkillIndex.shortlist).
+        """
+        if not self.shortlist_size or len(candidates) <= self.shortlist_size:
+            return candidates
+
+        with timed("matching.prefilter"):
+            wanted = {canonical_skill(skill) for skill in skills}
+            candidate_fields = [fields(candidate) for candidate in candidates]
+            overlap = np.array([
+                len(wanted.intersection(canonical_skill(skill) for skill in candidate_skills))
+                for candidate_skills, _ in candidate_fields
+            ])
+            order = np.argsort(-overlap, kind="stable")
+            cutoff = overlap[order[self.shortlist_size - 1]]
+            keep = order[overlap[order] > cutoff].tolist()
+            tied = order[overlap[order] == cutoff]
+            ties = SkillIndex()
+            for i in tied.tolist():
+                ties.upsert(i, (), candidate_fields[i][1])
+            relevance = ties.bm25(text)
+            keep += tied[np.argsort(-relevance, kind="stable")][:self.shortlist_size - len(keep)].tolist()
+            keep.sort()
+
+        CANDIDATES_PRUNED.inc(len(candidates) - len(keep), direction, "prefilter")
+        return [candidates[i] for i in keep]
+
+    def _score_freelancers(
+        self,
+        job_embedding: np.ndarray,
+        required_skills: List[str],
+        freelancers: List[FreelancerProfile],
+        budget_min: Optional[float],
+        budget_max: Optional[float],
+        freelancer_embeddings: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """Score components per freelancer: (final_score, skill_match, exp_bonus, rate_match)"""
+
+        # Create freelancer embeddings, chunking long bios
+        if freelancer_embeddings is None:
+            with timed("matching.encode"):
+                freelancer_embeddings = self.embedding_service.encode_documents([
+                    f"{freelancer.bio or ''} Skills: {', '.join(freelancer.skills)}"
+                    for freelancer in freelancers
+                ])
+
+        # Calculate skill match
+        skill_matches = self._skill_matches([(required_skills, freelancer.skills) for freelancer in freelancers])
+
+        with timed("matching.score"):
             # Calculate semantic similarity
-            semantic_score = self.embedding_service.similarity(freelancer_embedding, job_embedding)
+            semantic_scores = self.embedding_service.batch_similarity(job_embedding, freelancer_embeddings)
 
-            # Calculate budget match
-            budget_match = 1.0
-            if preferred_rate and job.get("budget_max"):
-                if preferred_rate <= job["budget_max"]:
-                    budget_match = 1.0
-                else:
-                    budget_match = max(0, 1 - (preferred_rate - job["budget_max"]) / preferred_rate)
+            scored = []
+            for freelancer, skill_match, semantic_score in zip(freelancers, skill_matches, semantic_scores):
+                # Calculate rate match
+                rate_match = self._calculate_rate_match(
+                    freelancer.hourly_rate, budget_min, budget_max
+                )
 
-            # Final score
-            final_score = skill_match * 0.5 + semantic_score * 0.35 + budget_match * 0.15
+                # Experience bonus
+                exp_bonus = min(freelancer.experience_years or 0, 10) / 10 * 0.1
+
+                # Rating bonus
+                rating_bonus = (freelancer.avg_rating / 5) * 0.1
+
+                # Calculate final score
+                final_score = (
+                    skill_match * 0.4 +
+                    float(semantic_score) * 0.3 +
+                    rate_match * 0.15 +
+                    exp_bonus +
+                    rating_bonus
+                )
+                scored.append((final_score, skill_match, exp_bonus, rate_match))
 
-            matches.append(JobMatch(
-                job_id=job["job_id"],
-                title=job.get("title", ""),
-                match_score=round(final_score * 100, 2),
-                skill_match=round(skill_match * 100, 2),
-                budget_match=round(budget_match * 100, 2),
-                skills=job_skills
-            ))
+        CANDIDATES_SCORED.inc(len(freelancers), "freelancers_to_job")
+        return scored
 
-        matches.sort(key=lambda x: x.match_score, reverse=True)
-        return matches[:limit]
+    def _build_freelancer_match(self, freelancer: FreelancerProfile, components: tuple) -> FreelancerMatch:
+        final_score, skill_match, exp_bonus, rate_match = components
+        return FreelancerMatch(
+            freelancer_id=freelancer.user_id,
+            name=freelancer.name,
+            match_score=round(final_score * 100, 2),
+            skill_match=round(skill_match * 100, 2),
+            experience_match=round((exp_bonus * 10) * 100, 2),
+            rate_match=round(rate_match * 100, 2),
+            skills=freelancer.skills
+        )
+
+    def _score_jobs(
+        self,
+        freelancer_embedding: np.ndarray,
+        freelancer_skills: List[str],
+        jobs: List[Dict[str, Any]],
+        preferred_rate: Optional[float],
+        job_embeddings: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """Score components per job: (final_score, skill_match, budget_match)"""
+
+        # Create job embeddings, chunking long descriptions
+        if job_embeddings is None:
+            with timed("matching.encode"):
+                job_embeddings = self.embedding_service.encode_documents([
+                    f"{job.get('title', '')} {job.get('description', '')} Skills: {', '.join(job.get('skills', []))}"
+                    for job in jobs
+                ])
+
+        # Calculate skill match
+        skill_matches = self._skill_matches([(job.get("skills", []), freelancer_skills) for job in jobs])
+
+        with timed("matching.score"):
+            # Calculate semantic similarity
+            semantic_scores = self.embedding_service.batch_similarity(freelancer_embedding, job_embeddings)
+
+            scored = []
+            for job, skill_match, semantic_score in zip(jobs, skill_matches, semantic_scores):
+                budget_match = self._calculate_budget_match(preferred_rate, job.get("budget_max"))
+
+                # Final score
+                final_score = skill_match * 0.5 + float(semantic_score) * 0.35 + budget_match * 0.15
+                scored.append((final_score, skill_match, budget_match))
+
+        CANDIDATES_SCORED.inc(len(jobs), "jobs_to_freelancer")
+        return scored
+
+    def _build_job_match(self, job: Dict[str, Any], components: tuple) -> JobMatch:
+        final_score, skill_match, budget_match = components
+        return JobMatch(
+            job_id=job["job_id"],
+            title=job.get("title", ""),
+            match_score=round(final_score * 100, 2),
+            skill_match=round(skill_match * 100, 2),
+            budget_match=round(budget_match * 100, 2),
+            skills=job.get("skills", [])
+        )
+
+    def _direct_skill_match(self, required: List[str], available: List[str]) -> float:
+        """_calculate_skill_match without the semantic part: exact (case-insensitive) names only"""
+        if not required:
+            return 1.0
+        required_lower = set(s.lower() for s in required)
+        return min(len(required_lower & set(s.lower() for s in available)) / len(required), 1.0)
 
     def _calculate_skill_match(self, required: List[str], available: List[str]) -> float:
         """Calculate skill match percentage"""
@@ -187,3 +1138,51 @@ class MatchingService:
             return 1.0 if rate >= budget_min else max(0, rate / budget_min)
 
         return 0.5
+
+    def _calculate_budget_match(self, preferred_rate: Optional[float], budget_max: Optional[float]) -> float:
+        """Calculate how well a job's budget covers the freelancer's rate"""
+        if preferred_rate and budget_max:
+            if preferred_rate <= budget_max:
+                return 1.0
+            return max(0, 1 - (preferred_rate - budget_max) / preferred_rate)
+        return 1.0
+
+    def _rate_match_array(
+        self,
+        rates: np.ndarray,
+        budget_min: Optional[float],
+        budget_max: Optional[float]
+    ) -> np.ndarray:
+        """Vectorized _calculate_rate_match; NaN rates count as missing"""
+        scores = np.full(len(rates), 0.5)
+        known = ~np.isnan(rates)
+        rate = rates[known]
+
+        if budget_min is None and budget_max is None:
+            values = np.ones(len(rate))
+        elif budget_min and budget_max:
+            values = np.ones(len(rate))
+            below = rate < budget_min
+            above = rate > budget_max
+            values[below] = np.maximum(0, 1 - (budget_min - rate[below]) / budget_min)
+            values[above] = np.maximum(0, 1 - (rate[above] - budget_max) / budget_max)
+        elif budget_max:
+            values = np.where(rate <= budget_max, 1.0, np.maximum(0, 1 - (rate - budget_max) / budget_max))
+        elif budget_min:
+            values = np.where(rate >= budget_min, 1.0, np.maximum(0, rate / budget_min))
+        else:
+            values = np.full(len(rate), 0.5)
+
+        scores[known] = values
+        return scores
+
+    @staticmethod
+    def _top_indices(final_scores: np.ndarray, limit: int) -> np.ndarray:
+        """Row indices of the best `limit` scores, ties in input order like TopK"""
+        # Rank on the same rounded percentages the object path compares
+        rounded = np.array([round(score * 100, 2) for score in final_scores.tolist()])
+        return np.argsort(-rounded, kind="stable")[:max(limit, 0)]
+
+    @staticmethod
+    def _percent(values: np.ndarray) -> np.ndarray:
+        return np.array([round(value * 100, 2) for value in values.tolist()], dtype=np.float64)
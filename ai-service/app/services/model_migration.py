@@ -0,0 +1,372 @@
+"""Zero-downtime embedding model migration.
+
+Changing the embedding model makes every stored embedding useless, because
+vectors from two models are not comparable. A migration therefore builds the
+new model's EmbeddingSpace next to the one serving traffic:
+
+1. The target model is loaded in the background. Traffic keeps using the
+   active space.
+2. Known texts are re-encoded into the target space's cache. These are the
+   active embedding cache, plus texts from registered sources (skill
+   vocabulary, materialized top-match entities). Texts the active space
+   encodes during the migration are queued as well, so the target converges
+   on the live working set. Re-encoding runs in small batches on one
+   background thread, throttled to `duty_cycle` of wall time, so live
+   requests keep most of the CPU. At most `max_texts` are tracked, and the
+   target cache holds exactly that many. The summary reports a migration as
+   not converging when texts were dropped at that cap, or when the queue has
+   not shrunk for STALL_INTERVAL because live traffic adds texts faster than
+   the duty cycle encodes them.
+3. Meanwhile a `shadow_rate` sample of match requests is re-run in the
+   target space off the request path. Their top-k overlap with the served
+   ranking is recorded, so the new model's rankings can be compared before
+   they go live.
+4. Once nothing is left to encode, the service switches. One reference swap
+   makes the target the active space. Registered hooks then drop state
+   derived from the old space (semantic cache, vocabulary embeddings,
+   response cache) and rebuild the top-match lists from the pre-encoded
+   texts. Requests already running finish in the space they started in.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import inspect
+import itertools
+import math
+import os
+import threading
+import time
+
+from .embedding_service import EmbeddingService, EmbeddingSpace, get_embedding_service, load_model
+from .projection import EmbeddingProjection
+from ..metrics import counter, histogram
+
+OVERLAP_BUCKETS = (0.5, 0.7, 0.8, 0.9, 0.95, 1.0)
+# Shadow comparisons allowed to wait for the migration thread; more are skipped
+MAX_SHADOW_BACKLOG = 2
+# Seconds between checks for new texts once the queue is empty
+IDLE_INTERVAL = 1.0
+# Seconds the queue may go without shrinking below its lowest size before the migration reports it is not converging
+STALL_INTERVAL = 300.0
+
+MIGRATION_TEXTS = counter("ai_model_migration_texts_total", "Texts re-encoded into the target embedding space")
+SHADOW_COMPARISONS = counter(
+    "ai_model_shadow_comparisons_total", "Shadow scoring of sampled requests in the target space", ["direction", "result"]
+)
+SHADOW_OVERLAP = histogram(
+    "ai_model_shadow_overlap", "Top-k overlap of the target space's ranking with the served ranking",
+    ["direction"], buckets=OVERLAP_BUCKETS,
+)
+
+TextSource = Callable[[], Iterable[Tuple[str, str]]]
+SwitchHook = Callable[[], Union[None, Awaitable[None]]]
+
+
+class MigrationError(Exception):
+    """Migration request that conflicts with the migration's current state"""
+
+
+class ModelMigration:
+    """Re-encodes known texts into a new model's space, shadow-scores against it, then switches"""
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        model_name: str,
+        projection_path: Optional[str] = None,
+        batch_size: int = 32,
+        duty_cycle: float = 0.25,
+        shadow_rate: float = 0.05,
+        max_texts: int = 200_000,
+        auto_switch: bool = True,
+        sources: Iterable[TextSource] = (),
+        on_switch: Iterable[SwitchHook] = (),
+        model=None,
+    ):
+        self.embedding_service = embedding_service
+        self.model_name = model_name
+        self.projection_path = projection_path
+        self.batch_size = max(batch_size, 1)
+        self.duty_cycle = min(max(duty_cycle, 0.01), 1.0)
+        self.shadow_rate = shadow_rate
+        self.max_texts = max(max_texts, 1)
+        self.auto_switch = auto_switch
+        self.sources = list(sources)
+        self.on_switch = list(on_switch)
+        # loading -> reindexing <-> ready -> switched; or failed / cancelled
+        self.state = "loading"
+        self.error: Optional[str] = None
+        self.target: Optional[EmbeddingSpace] = None
+        self.started_at = time.time()
+        self.switched_at: Optional[float] = None
+        self.encoded = 0
+        # Texts not tracked because max_texts was reached; they are encoded on first use after the switch
+        self.dropped = 0
+        self.shadow_stats: Dict[str, Dict[str, float]] = {}
+        self._model = model
+        self._pending: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        # Lowest queue size seen, and when it was reached
+        self._pending_low: Tuple[float, float] = (math.inf, time.monotonic())
+        self._lock = threading.Lock()
+        self._stopped = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-migration")
+        self._shadow_backlog = 0
+        self._shadow_counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self.state in ("loading", "reindexing", "ready")
+
+    @property
+    def coverage(self) -> float:
+        """Share of known texts already encoded in the target space"""
+        total = self.encoded + len(self._pending)
+        return self.encoded / total if total else (1.0 if self.target is not None else 0.0)
+
+    @property
+    def converging(self) -> bool:
+        """False once texts were dropped at max_texts, or the queue has not shrunk for STALL_INTERVAL"""
+        if self.dropped:
+            return False
+        return not self._pending or time.monotonic() - self._pending_low[1] <= STALL_INTERVAL
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    def track(self, kind: str, texts: List[str]) -> None:
+        """Queue texts for re-encoding unless the target space already has them or max_texts is reached"""
+        target = self.target
+        with self._lock:
+            for text in texts:
+                key = (kind, text)
+                if key in self._pending or (target is not None and key in target.cache):
+                    continue
+                if self.encoded + len(self._pending) >= self.max_texts:
+                    self.dropped += 1
+                    continue
+                self._pending[key] = None
+            if self._pending and self.state == "ready":
+                self.state = "reindexing"
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Follow texts the active space encodes from now on, so none are missed while the model loads
+        self.embedding_service.on_encoded = self.track
+        try:
+            self.target = await loop.run_in_executor(self._executor, self._load_target)
+            self.track("document", [text for kind, text in self._active_keys() if kind == "document"])
+            self.track("text", [text for kind, text in self._active_keys() if kind == "text"])
+            for source in self.sources:
+                for kind, text in source():
+                    self.track(kind, [text])
+            with self._lock:
+                if self.state != "loading":
+                    return
+                self.state = "reindexing"
+
+            while not self._stopped.is_set():
+                batch = self._take_batch()
+                if not batch:
+                    with self._lock:
+                        if self.state == "reindexing":
+                            self.state = "ready"
+                    if self.state == "ready" and self.auto_switch:
+                        try:
+                            await self.switch()
+                            return
+                        except MigrationError:
+                            continue  # new texts arrived in the meantime
+                    await self._wait(IDLE_INTERVAL)
+                    continue
+
+                start = time.perf_counter()
+                await loop.run_in_executor(self._executor, self._encode_batch, batch)
+                elapsed = time.perf_counter() - start
+                # Stay within duty_cycle of wall time so live requests keep the rest
+                await self._wait(elapsed * (1 - self.duty_cycle) / self.duty_cycle)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            if self.embedding_service.on_encoded == self.track:
+                self.embedding_service.on_encoded = None
+            if not self.in_progress:
+                self._executor.shutdown(wait=False)
+
+    async def switch(self, force: bool = False) -> None:
+        """Make the target space serve traffic; without `force`, only once every known text is encoded"""
+        with self._lock:
+            if self.state not in ("reindexing", "ready") or self.target is None:
+                raise MigrationError(f"Cannot switch a migration that is {self.state}")
+            if self._pending and not force:
+                raise MigrationError(f"{len(self._pending)} texts are not re-encoded yet ({self.coverage:.1%} coverage)")
+            self.embedding_service.on_encoded = None
+            self.embedding_service.switch_space(self.target)
+            self.state = "switched"
+            self.switched_at = time.time()
+        self._stopped.set()
+
+        # Keep the pre-encoded texts until the hooks have rebuilt their state from them
+        for hook in self.on_switch:
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                # The switch itself stands; the failed hook's state rebuilds lazily or on its own expiry
+                self.error = f"Switch hook failed: {e}"
+        self.target.cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+    def cancel(self) -> None:
+        with self._lock:
+            if not self.in_progress:
+                raise MigrationError(f"Cannot cancel a migration that is {self.state}")
+            self.state = "cancelled"
+        if self.embedding_service.on_encoded == self.track:
+            self.embedding_service.on_encoded = None
+        self._stopped.set()
+
+    def shadow(self, direction: str, served_ids: List[str], compute: Callable[[], List[str]]) -> None:
+        """Re-run a sampled request in the target space off the request path and record top-k overlap"""
+        if self.state not in ("reindexing", "ready") or self.shadow_rate <= 0:
+            return
+        n = next(self._shadow_counter)
+        if math.floor((n + 1) * self.shadow_rate) == math.floor(n * self.shadow_rate):
+            return
+        with self._lock:
+            if self._shadow_backlog >= MAX_SHADOW_BACKLOG:
+                SHADOW_COMPARISONS.inc(1, direction, "skipped")
+                return
+            self._shadow_backlog += 1
+        self._executor.submit(self._run_shadow, direction, list(served_ids), compute)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "active_model": self.embedding_service.active_space.name,
+            "state": self.state,
+            "error": self.error,
+            "coverage": self.coverage,
+            "encoded": self.encoded,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "converging": self.converging,
+            "started_at": self.started_at,
+            "switched_at": self.switched_at,
+            "shadow": {
+                direction: {
+                    "compared": int(stats["compared"]),
+                    "mean_top_k_overlap": stats["overlap_sum"] / stats["compared"] if stats["compared"] else None,
+                }
+                for direction, stats in self.shadow_stats.items()
+            },
+        }
+
+    def _load_target(self) -> EmbeddingSpace:
+        model = self._model if self._model is not None else load_model(self.model_name)
+        projection = None
+        if self.projection_path:
+            projection = EmbeddingProjection.load(self.projection_path)
+            if projection.model_name and projection.model_name != self.model_name:
+                raise ValueError(f"Projection {self.projection_path} was fitted for {projection.model_name}")
+        # Room for every tracked text, which has to stay cached until the switch
+        return EmbeddingSpace(self.model_name, model, projection, cache_size=self.max_texts)
+
+    def _active_keys(self) -> List[Tuple[str, str]]:
+        active = self.embedding_service.active_space
+        with active.cache_lock:
+            return list(active.cache)
+
+    def _take_batch(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            if not self._pending or len(self._pending) < self._pending_low[0]:
+                self._pending_low = (len(self._pending), time.monotonic())
+            return [self._pending.popitem(last=False)[0] for _ in range(min(self.batch_size, len(self._pending)))]
+
+    def _encode_batch(self, batch: List[Tuple[str, str]]) -> None:
+        documents = [text for kind, text in batch if kind == "document"]
+        texts = [text for kind, text in batch if kind == "text"]
+        with self.embedding_service.using(self.target):
+            if documents:
+                self.embedding_service.encode_documents(documents)
+            if texts:
+                self.embedding_service.encode(texts)
+        self.encoded += len(batch)
+        MIGRATION_TEXTS.inc(len(batch))
+
+    def _run_shadow(self, direction: str, served_ids: List[str], compute: Callable[[], List[str]]) -> None:
+        try:
+            with self.embedding_service.using(self.target):
+                shadow_ids = compute()
+            overlap = len(set(served_ids) & set(shadow_ids)) / len(served_ids) if served_ids else 1.0
+            with self._lock:
+                stats = self.shadow_stats.setdefault(direction, {"compared": 0, "overlap_sum": 0.0})
+                stats["compared"] += 1
+                stats["overlap_sum"] += overlap
+            SHADOW_COMPARISONS.inc(1, direction, "compared")
+            SHADOW_OVERLAP.observe(overlap, direction)
+        except Exception:
+            SHADOW_COMPARISONS.inc(1, direction, "failed")
+        finally:
+            with self._lock:
+                self._shadow_backlog -= 1
+
+    async def _wait(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+class ModelMigrations:
+    """The current migration, plus the text sources and switch hooks every migration is given"""
+
+    def __init__(self, embedding_service: EmbeddingService):
+        self.embedding_service = embedding_service
+        self.current: Optional[ModelMigration] = None
+        self.sources: List[TextSource] = []
+        self.on_switch: List[SwitchHook] = []
+
+    def add_source(self, source: TextSource) -> None:
+        """Texts beyond the embedding cache to re-encode, as (kind, text) with kind "text" or "document" """
+        self.sources.append(source)
+
+    def add_switch_hook(self, hook: SwitchHook) -> None:
+        """Called after the switch to drop or rebuild state derived from the old space; may return an awaitable"""
+        self.on_switch.append(hook)
+
+    def active(self) -> Optional[ModelMigration]:
+        current = self.current
+        return current if current is not None and current.in_progress else None
+
+    def start(self, model_name: str, projection_path: Optional[str] = None,
+              auto_switch: Optional[bool] = None, model=None) -> ModelMigration:
+        if self.active() is not None:
+            raise MigrationError(f"A migration to {self.current.model_name} is already {self.current.state}")
+        if model_name == self.embedding_service.active_space.name:
+            raise MigrationError(f"{model_name} is already the active model")
+        if auto_switch is None:
+            auto_switch = os.getenv("MODEL_MIGRATION_AUTO_SWITCH", "true").lower() in ("1", "true", "yes")
+        self.current = ModelMigration(
+            self.embedding_service,
+            model_name,
+            projection_path=projection_path,
+            batch_size=int(os.getenv("MODEL_MIGRATION_BATCH_SIZE", "32")),
+            duty_cycle=float(os.getenv("MODEL_MIGRATION_DUTY_CYCLE", "0.25")),
+            shadow_rate=float(os.getenv("MODEL_MIGRATION_SHADOW_RATE", "0.05")),
+            max_texts=int(os.getenv("MODEL_MIGRATION_MAX_TEXTS", "200000")),
+            auto_switch=auto_switch,
+            sources=self.sources,
+            on_switch=self.on_switch,
+            model=model,
+        )
+        self.current.start()
+        return self.current
+
+
+@lru_cache()
+def get_model_migrations() -> ModelMigrations:
+    return ModelMigrations(get_embedding_service())
@@ -0,0 +1,93 @@
+"""PCA projection of model embeddings for reduced-dimension first-stage search.
+
+The projection is fitted offline on unit-normalized corpus embeddings with
+fit_projection.py. It is saved as an .npz next to the model and loaded
+from EMBEDDING_PROJECTION_PATH. The file records the model it was fitted
+for, and loading it under a different EMBEDDING_MODEL fails.
+
+Only documents are centered. For a unit document x, x·q equals
+(x - mean)·q + mean·q, and the second term is the same for every document.
+Ranking by P(x - mean)·Pq therefore approximates ranking by cosine
+similarity, up to the variance in the dropped components.
+"""
+from typing import Optional
+from functools import lru_cache
+import os
+import numpy as np
+
+
+class EmbeddingProjection:
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance: np.ndarray,
+                 model_name: str = ""):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        # (dim, input_dim), rows ordered by explained variance
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.explained_variance = np.asarray(explained_variance, dtype=np.float64)
+        self.model_name = model_name
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, dim: int, model_name: str = "") -> "EmbeddingProjection":
+        """Top `dim` principal components of the unit-normalized embeddings"""
+        unit = _normalize(np.asarray(embeddings, dtype=np.float64))
+        mean = unit.mean(axis=0)
+        centered = unit - mean
+        eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered / max(len(unit) - 1, 1))
+        order = np.argsort(eigenvalues)[::-1][:dim]
+        return cls(mean, eigenvectors[:, order].T, eigenvalues[order], model_name)
+
+    def truncate(self, dim: int) -> "EmbeddingProjection":
+        """Same projection keeping only the leading `dim` components"""
+        return EmbeddingProjection(self.mean, self.components[:dim], self.explained_variance[:dim], self.model_name)
+
+    def explained_ratio(self, total_variance: Optional[float] = None) -> float:
+        """Share of variance kept; pass the corpus total when the projection was truncated"""
+        total = total_variance or float(self.explained_variance.sum())
+        return float(self.explained_variance.sum() / total) if total else 0.0
+
+    def transform_documents(self, unit_embeddings: np.ndarray) -> np.ndarray:
+        return ((np.asarray(unit_embeddings, dtype=np.float32) - self.mean) @ self.components.T).astype(np.float32)
+
+    def transform_query(self, unit_query: np.ndarray) -> np.ndarray:
+        return (self.components @ np.asarray(unit_query, dtype=np.float32)).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                mean=self.mean,
+                components=self.components,
+                explained_variance=self.explained_variance,
+                model_name=np.array(self.model_name),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingProjection":
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"], data["explained_variance"], str(data["model_name"]))
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+@lru_cache()
+def get_projection() -> Optional[EmbeddingProjection]:
+    """Projection from EMBEDDING_PROJECTION_PATH, or None when two-stage search is off"""
+    path = os.getenv("EMBEDDING_PROJECTION_PATH")
+    if not path:
+        return None
+    projection = EmbeddingProjection.load(path)
+    model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    if projection.model_name and projection.model_name != model_name:
+        raise ValueError(
+            f"Projection {path} was fitted for {projection.model_name}, not EMBEDDING_MODEL={model_name}"
+        )
+    return projection
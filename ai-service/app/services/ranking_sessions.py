@@ -0,0 +1,131 @@
+"""Ranking sessions: one full ranking, served page by page through cursors.
+
+The first page of a ranked match request scores and orders every candidate
+once. The ordered candidates and their raw score components are stored in
+a bounded LRU with a TTL, and the caller gets an opaque cursor for the next
+page. A later page is a slice of the stored ranking. Match models are only
+built for the entries on the returned page.
+
+Sessions are held in process memory. A cursor is only valid on the replica
+that issued it, so paging requests need sticky routing.
+"""
+from typing import Any, Callable, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+import base64
+import binascii
+import os
+import secrets
+import threading
+import time
+import numpy as np
+
+from ..metrics import CACHE_REQUESTS
+
+
+class CursorError(ValueError):
+    """Cursor that is malformed or was issued for another direction"""
+
+
+@dataclass
+class RankingSession:
+    direction: str
+    # Candidates best first, and their score components row for row
+    candidates: List[Any]
+    components: np.ndarray
+    build: Callable[[Any, tuple], Any]
+    page_size: int
+    expires_at: float = field(default=0.0)
+
+    @property
+    def total(self) -> int:
+        return len(self.candidates)
+
+    def page(self, offset: int, limit: int) -> List[Any]:
+        """Match models for ranks [offset, offset + limit)"""
+        stop = min(offset + max(limit, 0), self.total)
+        return [
+            self.build(self.candidates[i], tuple(self.components[i].tolist()))
+            for i in range(offset, stop)
+        ]
+
+
+class RankingSessionCache:
+    """Bounded LRU of ranking sessions; entries also expire `ttl` seconds after their last use"""
+
+    def __init__(self, max_sessions: int = 256, ttl: float = 300.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, RankingSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self, direction: str, candidates: List[Any], components: np.ndarray,
+              build: Callable[[Any, tuple], Any], page_size: int) -> Tuple[List[Any], Optional[str], int]:
+        """Store a full ranking and return its first page, the next cursor and the total"""
+        session = RankingSession(direction, candidates, components, build, page_size)
+        session_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._store(session_id, session)
+        return self._page(session_id, session, 0, page_size)
+
+    def next(self, direction: str, cursor: str,
+             limit: Optional[int] = None) -> Optional[Tuple[List[Any], Optional[str], int]]:
+        """Page at the cursor, or None once the session has expired or been evicted"""
+        session_id, offset = decode_cursor(cursor)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                CACHE_REQUESTS.inc(1, "ranking_session", "miss")
+                return None
+            if session.expires_at <= time.monotonic():
+                del self._sessions[session_id]
+                CACHE_REQUESTS.inc(1, "ranking_session", "expired")
+                return None
+            if session.direction != direction:
+                raise CursorError(f"Cursor belongs to {session.direction} matching")
+            self._store(session_id, session)
+        CACHE_REQUESTS.inc(1, "ranking_session", "hit")
+        return self._page(session_id, session, offset, session.page_size if limit is None else limit)
+
+    def _store(self, session_id: str, session: RankingSession) -> None:
+        session.expires_at = time.monotonic() + self.ttl
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    @staticmethod
+    def _page(session_id: str, session: RankingSession, offset: int,
+              limit: int) -> Tuple[List[Any], Optional[str], int]:
+        matches = session.page(offset, limit)
+        end = offset + len(matches)
+        next_cursor = encode_cursor(session_id, end) if matches and end < session.total else None
+        return matches, next_cursor, session.total
+
+
+def encode_cursor(session_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{session_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        session_id, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorError("Malformed cursor")
+    if offset < 0:
+        raise CursorError("Malformed cursor")
+    return session_id, offset
+
+
+@lru_cache()
+def get_ranking_sessions() -> RankingSessionCache:
+    return RankingSessionCache(
+        max_sessions=int(os.getenv("RANKING_SESSION_MAX", "256")),
+        ttl=float(os.getenv("RANKING_SESSION_TTL", "300")),
+    )
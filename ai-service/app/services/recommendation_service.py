@@ -1,13 +1,19 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import numpy as np
 from .embedding_service import get_embedding_service
-from ..models.schemas import PriceRecommendation, ProposalQuality
+from ..deadline import choose_tier
+from ..metrics import timed
+from ..models.schemas import PriceRecommendation, ProposalQuality, RankedProposalQuality
+
+# Relevance assumed for a proposal when a degraded tier left it without an embedding
+NEUTRAL_RELEVANCE = 0.5
 
 
 class RecommendationService:
     def __init__(self):
         self.embedding_service = get_embedding_service()
 
+    @timed("recommendations.price")
     def recommend_price(
         self,
         job_description: str,
@@ -60,6 +66,7 @@ class RecommendationService:
             }
         )
 
+    @timed("recommendations.proposal_quality")
     def analyze_proposal_quality(
         self,
         proposal_text: str,
@@ -68,70 +75,159 @@ class RecommendationService:
     ) -> ProposalQuality:
         """Analyze the quality of a proposal"""
 
-        score = 0.0
-        feedback = []
-        suggestions = []
-
-        # Length check
-        word_count = len(proposal_text.split())
-        if word_count < 50:
-            feedback.append("Proposal is too short")
-            suggestions.append("Add more detail about your approach and experience")
-        elif word_count > 500:
-            feedback.append("Proposal might be too long")
-            suggestions.append("Consider being more concise")
-        else:
-            score += 0.2
-            feedback.append("Good proposal length")
+        tier = self._plan_tier(job_description, [proposal_text])
+        job_embedding = self._job_embedding(job_description, tier)
+        return self._score_proposals([proposal_text], job_embedding, required_skills, tier)[0]
 
-        # Skill mention check
-        mentioned_skills = sum(1 for skill in required_skills if skill.lower() in proposal_text.lower())
-        skill_mention_ratio = mentioned_skills / max(len(required_skills), 1)
+    @timed("recommendations.proposal_batch")
+    def analyze_proposals_batch(
+        self,
+        proposals: List[Dict[str, str]],
+        job_description: str,
+        required_skills: List[str]
+    ) -> List[RankedProposalQuality]:
+        """Score every proposal for a job in one pass and rank them by quality"""
+
+        if not proposals:
+            return []
+
+        proposal_texts = [p["proposal_text"] for p in proposals]
+        tier = self._plan_tier(job_description, proposal_texts)
+        # Encode the job once for the whole set
+        job_embedding = self._job_embedding(job_description, tier)
+        qualities = self._score_proposals(proposal_texts, job_embedding, required_skills, tier)
+
+        order = sorted(range(len(qualities)), key=lambda i: qualities[i].score, reverse=True)
+        return [
+            RankedProposalQuality(
+                proposal_id=proposals[i]["proposal_id"],
+                rank=rank,
+                **qualities[i].model_dump()
+            )
+            for rank, i in enumerate(order, start=1)
+        ]
 
-        if skill_mention_ratio < 0.3:
-            suggestions.append("Mention more of the required skills and your experience with them")
-        else:
-            score += 0.2
-            feedback.append("Good skill coverage")
+    def _plan_tier(self, job_description: str, proposal_texts: List[str]) -> str:
+        """Scoring tier for the request's latency budget; see app.deadline"""
+        def estimate() -> Tuple[float, ...]:
+            job_seconds = self.embedding_service.estimate_encode_seconds([job_description])
+            proposal_seconds = self.embedding_service.estimate_encode_seconds(proposal_texts)
+            # Proposals have no semantic skill matching, so the first two tiers cost the same
+            return (job_seconds + proposal_seconds, job_seconds + proposal_seconds, job_seconds, 0.0)
 
-        # Semantic relevance
-        proposal_embedding = self.embedding_service.encode_single(proposal_text)
-        job_embedding = self.embedding_service.encode_single(job_description)
-        relevance = self.embedding_service.similarity(proposal_embedding, job_embedding)
+        return choose_tier("recommendations.proposal_quality", estimate)
 
-        score += relevance * 0.4
+    def _job_embedding(self, job_description: str, tier: str) -> Optional[np.ndarray]:
+        if tier == "skills_and_rate":
+            return None
+        return self.embedding_service.encode_documents([job_description])[0]
 
-        if relevance < 0.5:
-            suggestions.append("Make your proposal more relevant to the specific job requirements")
+    def _score_proposals(
+        self,
+        proposal_texts: List[str],
+        job_embedding: Optional[np.ndarray],
+        required_skills: List[str],
+        tier: str = "full"
+    ) -> List[ProposalQuality]:
+        """Score proposals against an already encoded job description.
+
+        In the cached_embeddings and skills_and_rate tiers, proposals without
+        an available embedding get NEUTRAL_RELEVANCE and no relevance feedback.
+        """
+
+        # Lowercase each proposal once and run the keyword checks column-wise
+        lowered = np.array([text.lower() for text in proposal_texts])
+        word_counts = np.array([len(text.split()) for text in proposal_texts])
+
+        if required_skills:
+            mentioned_skills = np.sum(
+                [np.char.find(lowered, skill.lower()) >= 0 for skill in required_skills], axis=0
+            )
         else:
-            feedback.append("Proposal is relevant to the job")
+            mentioned_skills = np.zeros(len(proposal_texts), dtype=int)
+        skill_mention_ratio = mentioned_skills / max(len(required_skills), 1)
 
         # Professional language indicators
         professional_terms = ["experience", "deliver", "timeline", "quality", "communication", "milestone"]
-        prof_count = sum(1 for term in professional_terms if term in proposal_text.lower())
+        prof_counts = np.sum([np.char.find(lowered, term) >= 0 for term in professional_terms], axis=0)
 
-        if prof_count >= 3:
-            score += 0.1
-            feedback.append("Uses professional language")
-        else:
-            suggestions.append("Use more professional language about delivery and communication")
+        asks_question = np.char.find(lowered, "?") >= 0
 
-        # Question engagement
-        if "?" in proposal_text:
-            score += 0.1
-            feedback.append("Shows engagement by asking questions")
+        if tier in ("full", "no_semantic_skills"):
+            # Semantic relevance, with all proposals chunked and encoded in one batch
+            proposal_embeddings = self.embedding_service.encode_documents(list(proposal_texts))
+            relevances = self.embedding_service.batch_similarity(job_embedding, proposal_embeddings)
         else:
-            suggestions.append("Consider asking clarifying questions to show engagement")
+            relevances = np.full(len(proposal_texts), np.nan)
+            if tier == "cached_embeddings":
+                proposal_embeddings, found = self.embedding_service.cached_documents(list(proposal_texts))
+                if found.any():
+                    relevances[found] = self.embedding_service.batch_similarity(
+                        job_embedding, proposal_embeddings[found]
+                    )
+
+        results = []
+        for i in range(len(proposal_texts)):
+            score = 0.0
+            feedback = []
+            suggestions = []
+
+            # Length check
+            word_count = word_counts[i]
+            if word_count < 50:
+                feedback.append("Proposal is too short")
+                suggestions.append("Add more detail about your approach and experience")
+            elif word_count > 500:
+                feedback.append("Proposal might be too long")
+                suggestions.append("Consider being more concise")
+            else:
+                score += 0.2
+                feedback.append("Good proposal length")
 
-        # Normalize score
-        final_score = min(max(score, 0), 1.0)
+            # Skill mention check
+            if skill_mention_ratio[i] < 0.3:
+                suggestions.append("Mention more of the required skills and your experience with them")
+            else:
+                score += 0.2
+                feedback.append("Good skill coverage")
 
-        return ProposalQuality(
-            score=round(final_score * 100, 2),
-            feedback=feedback,
-            suggestions=suggestions
-        )
+            # Semantic relevance
+            relevance = float(relevances[i])
+            if np.isnan(relevance):
+                score += NEUTRAL_RELEVANCE * 0.4
+            else:
+                score += relevance * 0.4
+
+                if relevance < 0.5:
+                    suggestions.append("Make your proposal more relevant to the specific job requirements")
+                else:
+                    feedback.append("Proposal is relevant to the job")
+
+            if prof_counts[i] >= 3:
+                score += 0.1
+                feedback.append("Uses professional language")
+            else:
+                suggestions.append("Use more professional language about delivery and communication")
+
+            # Question engagement
+            if asks_question[i]:
+                score += 0.1
+                feedback.append("Shows engagement by asking questions")
+            else:
+                suggestions.append("Consider asking clarifying questions to show engagement")
+
+            # Normalize score
+            final_score = min(max(score, 0), 1.0)
+
+            results.append(ProposalQuality(
+                score=round(final_score * 100, 2),
+                feedback=feedback,
+                suggestions=suggestions
+            ))
+
+        return results
 
+    @timed("recommendations.resume_summary")
     def generate_resume_summary(
         self,
         skills: List[str],
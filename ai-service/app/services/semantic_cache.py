@@ -0,0 +1,189 @@
+"""Approximate cache of freelancer rankings for near-identical job queries.
+
+An entry holds the budget-independent score terms for every candidate of
+one request: skill match, semantic score, experience and rating bonus.
+Entries are grouped by an exact key made of the candidate pool
+fingerprint, the canonical required-skill set and a budget bucket. Within
+a group, a query hits the most similar cached job embedding if it reaches
+`threshold` and the entry is younger than `ttl`. The rate match is then
+recomputed for the new budget and the candidates are re-ranked. Only the
+job text is approximated.
+
+A fraction `verify_rate` of hits is also scored exactly. Each verified hit
+records top-k overlap with the exact ranking, so drift can be watched
+while tuning the threshold.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import itertools
+import math
+import os
+import threading
+import time
+import numpy as np
+
+from ..metrics import CACHE_REQUESTS, histogram
+
+SIMILARITY_BUCKETS = (0.9, 0.95, 0.97, 0.98, 0.99, 0.995, 0.999, 1.0)
+OVERLAP_BUCKETS = (0.5, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+SEMANTIC_HIT_SIMILARITY = histogram(
+    "ai_semantic_cache_hit_similarity", "Cosine similarity of the cached query served on a hit",
+    buckets=SIMILARITY_BUCKETS,
+)
+SEMANTIC_HIT_OVERLAP = histogram(
+    "ai_semantic_cache_hit_overlap", "Top-k overlap of a cached answer with the exact ranking, on verified hits",
+    buckets=OVERLAP_BUCKETS,
+)
+
+
+@dataclass
+class SemanticCacheEntry:
+    group: str
+    # Unit job embedding the entry was computed for
+    embedding: np.ndarray
+    # Indices into the request's freelancer list, with per-candidate score terms aligned to them
+    rows: np.ndarray
+    skill_matches: np.ndarray
+    semantic_scores: np.ndarray
+    exp_bonus: np.ndarray
+    rating_bonus: np.ndarray
+    created_at: float
+
+
+class SemanticMatchCache:
+    """Bounded by the total candidate rows held across entries, least recently used evicted first"""
+
+    def __init__(self, threshold: float = 0.97, ttl: float = 600.0, max_rows: int = 1_000_000,
+                 verify_rate: float = 0.0, budget_bucket_ratio: float = 1.25):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.verify_rate = verify_rate
+        self.budget_bucket_ratio = budget_bucket_ratio
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "verified": 0, "overlap_sum": 0.0}
+        self._entries: "OrderedDict[int, SemanticCacheEntry]" = OrderedDict()
+        self._groups: Dict[str, List[int]] = {}
+        self._rows = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._verify_counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def group_key(self, required_skills: List[str], budget_max: Optional[float], candidates: List[Any]) -> str:
+        """Exact part of the key: candidate pool, skill set and budget bucket"""
+        digest = hashlib.sha256()
+        for candidate in candidates:
+            digest.update(candidate.model_dump_json().encode())
+            digest.update(b"\n")
+        skills = ",".join(sorted({s.strip().lower() for s in required_skills}))
+        if budget_max:
+            bucket = str(math.floor(math.log(budget_max) / math.log(self.budget_bucket_ratio)))
+        else:
+            bucket = "none"
+        return f"{digest.hexdigest()}:{bucket}:{skills}"
+
+    def lookup(self, group: str, embedding: np.ndarray) -> Optional[Tuple[SemanticCacheEntry, float]]:
+        """Most similar fresh entry in the group and its similarity, or None below the threshold"""
+        query = _unit(embedding)
+        now = time.monotonic()
+        best: Optional[Tuple[SemanticCacheEntry, float]] = None
+        best_id = None
+        with self._lock:
+            for entry_id in list(self._groups.get(group, ())):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl:
+                    self._remove(entry_id)
+                    self.stats["expired"] += 1
+                    continue
+                similarity = float(entry.embedding @ query)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (entry, similarity)
+                    best_id = entry_id
+
+            if best is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(best_id)
+        CACHE_REQUESTS.inc(1, "semantic_match", "miss" if best is None else "hit")
+        if best is not None:
+            SEMANTIC_HIT_SIMILARITY.observe(best[1])
+        return best
+
+    def store(self, group: str, embedding: np.ndarray, rows: np.ndarray, skill_matches: np.ndarray,
+              semantic_scores: np.ndarray, exp_bonus: np.ndarray, rating_bonus: np.ndarray) -> None:
+        entry = SemanticCacheEntry(
+            group, _unit(embedding), rows, skill_matches, semantic_scores, exp_bonus, rating_bonus, time.monotonic()
+        )
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._groups.setdefault(group, []).append(entry_id)
+            self._rows += len(rows)
+            while self._rows > self.max_rows and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def should_verify(self) -> bool:
+        """Deterministically picks every 1/verify_rate-th hit for exact re-scoring"""
+        if self.verify_rate <= 0:
+            return False
+        n = next(self._verify_counter)
+        return math.floor((n + 1) * self.verify_rate) > math.floor(n * self.verify_rate)
+
+    def record_overlap(self, cached_ids: List[str], exact_ids: List[str]) -> None:
+        overlap = len(set(cached_ids) & set(exact_ids)) / len(exact_ids) if exact_ids else 1.0
+        with self._lock:
+            self.stats["verified"] += 1
+            self.stats["overlap_sum"] += overlap
+        SEMANTIC_HIT_OVERLAP.observe(overlap)
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        verified = self.stats["verified"]
+        return {
+            "entries": len(self._entries),
+            "rows": self._rows,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "expired": self.stats["expired"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "verified_hits": verified,
+            "mean_top_k_overlap": self.stats["overlap_sum"] / verified if verified else None,
+            "threshold": self.threshold,
+        }
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the embedding model changed"""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._rows = 0
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._rows -= len(entry.rows)
+        group = self._groups[entry.group]
+        group.remove(entry_id)
+        if not group:
+            del self._groups[entry.group]
+
+
+def _unit(embedding: np.ndarray) -> np.ndarray:
+    embedding = np.asarray(embedding, dtype=np.float32)
+    return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+
+@lru_cache()
+def get_semantic_match_cache() -> SemanticMatchCache:
+    return SemanticMatchCache(
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "600")),
+        max_rows=int(os.getenv("SEMANTIC_CACHE_MAX_ROWS", "1000000")),
+        verify_rate=float(os.getenv("SEMANTIC_CACHE_VERIFY_RATE", "0.05")),
+    )
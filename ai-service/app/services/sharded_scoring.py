@@ -0,0 +1,151 @@
+"""Sharded freelancer scoring across a process pool.
+
+The parent copies the candidate columns into one shared memory block,
+including embeddings, skill ids and the cheap score terms. Worker
+processes attach to the block by name, so nothing row-sized is pickled.
+Each worker scores a contiguous row range and returns only its local top
+`limit`. The parent merges the shard results with the same tie-break as
+TopK: higher rounded score first, then lower row.
+
+This module imports only NumPy so spawned workers start quickly.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import get_context, shared_memory
+import numpy as np
+
+# (rounded score, row, final score, skill match, semantic score)
+ShardResult = Tuple[float, int, float, float, float]
+
+_ALIGNMENT = 64
+
+
+class SharedArrays:
+    """NumPy arrays copied into one shared memory segment, described by a small picklable spec"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = (offset, array.dtype.str, array.shape)
+            offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, array in arrays.items():
+            start, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)[...] = array
+        self.spec = {"name": self._shm.name, "layout": layout}
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _attach(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+    # Pool workers share the parent's resource tracker, so the parent's unlink also
+    # clears the registration this attach makes
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        for name, (offset, dtype, shape) in spec["layout"].items()
+    }
+    return shm, arrays
+
+
+def score_freelancer_rows(arrays: Dict[str, np.ndarray], start: int, stop: int, limit: int,
+                          required_count: int) -> List[ShardResult]:
+    """Score rows [start, stop) and return their top `limit`, best first"""
+    embeddings = arrays["embeddings"][start:stop]
+    query = arrays["query"]
+    # Same arithmetic as EmbeddingService.batch_similarity
+    query_norm = query / np.linalg.norm(query)
+    embeddings_norm = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    semantic_scores = np.dot(embeddings_norm, query_norm).astype(np.float64)
+
+    skill_matches = _skill_matches(arrays, start, stop, required_count)
+    final_scores = (
+        skill_matches * 0.4 +
+        semantic_scores * 0.3 +
+        arrays["rate_terms"][start:stop] +
+        arrays["experience_terms"][start:stop] +
+        arrays["rating_terms"][start:stop]
+    )
+
+    rounded = np.array([round(score * 100, 2) for score in final_scores.tolist()])
+    top = np.argsort(-rounded, kind="stable")[:max(limit, 0)]
+    return [
+        (float(rounded[i]), start + int(i), float(final_scores[i]), float(skill_matches[i]), float(semantic_scores[i]))
+        for i in top
+    ]
+
+
+def _skill_matches(arrays: Dict[str, np.ndarray], start: int, stop: int, required_count: int) -> np.ndarray:
+    """MatchingService._calculate_skill_match per row, from skill ids and unit vocabulary embeddings"""
+    if not required_count:
+        return np.ones(stop - start)
+
+    vocabulary = arrays["vocabulary"]
+    indptr = arrays["skill_indptr"]
+    indices = arrays["skill_indices"]
+    required = set(arrays["required"].tolist())
+
+    matches = np.empty(stop - start)
+    for row in range(start, stop):
+        available = set(indices[indptr[row]:indptr[row + 1]].tolist())
+        direct_matches = len(required & available)
+        unmatched = required - available
+        semantic_matches = 0.0
+        if unmatched and available:
+            sims = vocabulary[list(unmatched)] @ vocabulary[list(available)].T
+            best = sims.max(axis=1)
+            semantic_matches = float(best[best > 0.7].sum())
+        matches[row - start] = min((direct_matches + semantic_matches) / required_count, 1.0)
+    return matches
+
+
+def score_freelancer_shard(spec: Dict[str, Any], start: int, stop: int, limit: int,
+                           required_count: int) -> List[ShardResult]:
+    """Process pool entry point: attach to the shared columns and score one shard"""
+    shm, arrays = _attach(spec)
+    try:
+        return score_freelancer_rows(arrays, start, stop, limit, required_count)
+    finally:
+        # Views must be released before the mapping can close
+        del arrays
+        shm.close()
+
+
+@lru_cache()
+def get_shard_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn, not fork: forking a process that holds model threads can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+
+
+def top_k_sharded(arrays: Dict[str, np.ndarray], rows: int, limit: int, required_count: int,
+                  shards: int, pool: Optional[ProcessPoolExecutor] = None) -> List[ShardResult]:
+    """Global top `limit` over `rows` candidates, scored in `shards` row ranges"""
+    if limit <= 0 or not rows:
+        return []
+
+    if shards <= 1:
+        return score_freelancer_rows(arrays, 0, rows, limit, required_count)
+
+    bounds = np.linspace(0, rows, min(shards, rows) + 1).astype(int)
+    pool = pool or get_shard_pool(shards)
+    with SharedArrays(arrays) as shared:
+        futures = [
+            pool.submit(score_freelancer_shard, shared.spec, int(start), int(stop), limit, required_count)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        results = [result for future in futures for result in future.result()]
+
+    results.sort(key=lambda r: (-r[0], r[1]))
+    return results[:limit]
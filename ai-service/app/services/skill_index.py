@@ -0,0 +1,201 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from array import array
+import math
+import re
+import numpy as np
+
+TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def canonical_skill(skill: str) -> str:
+    return " ".join(skill.lower().split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [term.rstrip(".") for term in TERM_PATTERN.findall((text or "").lower())]
+
+
+class SkillIndex:
+    """Inverted index from canonical skill and text term to the documents containing them.
+
+    Documents get increasing internal numbers, so every posting list is a
+    sorted uint32 array that inserts only append to. Removal marks the
+    document dead; dead postings are filtered at query time and dropped by
+    compaction once they outnumber the live documents.
+    """
+
+    def __init__(self):
+        self._ids: List[Optional[Hashable]] = []
+        self._docs: Dict[Hashable, int] = {}
+        self._alive = bytearray()
+        self._lengths = array("I")
+        self._total_length = 0
+        self._skills: Dict[str, array] = {}
+        # term -> (doc numbers, term frequencies)
+        self._terms: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._docs
+
+    def upsert(self, doc_id: Hashable, skills: Iterable[str], text: Optional[str] = None) -> None:
+        """Index a document's skills and free text, replacing any previous version"""
+        self.remove(doc_id)
+
+        doc = len(self._ids)
+        self._ids.append(doc_id)
+        self._docs[doc_id] = doc
+        self._alive.append(1)
+
+        for skill in set(canonical_skill(s) for s in skills):
+            if skill:
+                self._skills.setdefault(skill, array("I")).append(doc)
+
+        terms = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, tf in frequencies.items():
+            docs, tfs = self._terms.setdefault(term, (array("I"), array("I")))
+            docs.append(doc)
+            tfs.append(tf)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+
+    def remove(self, doc_id: Hashable) -> bool:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        self._alive[doc] = 0
+        self._ids[doc] = None
+        self._total_length -= self._lengths[doc]
+        if len(self._ids) - len(self._docs) > max(len(self._docs), 1024):
+            self.compact()
+        return True
+
+    def skill_overlap(self, skills: Iterable[str]) -> np.ndarray:
+        """Per internal document number, how many of the given skills it lists"""
+        counts = np.zeros(len(self._ids), dtype=np.int32)
+        for skill in set(canonical_skill(s) for s in skills):
+            postings = self._skills.get(skill)
+            if postings:
+                # A document appears at most once per posting list
+                counts[np.frombuffer(postings, dtype=np.uint32)] += 1
+        return counts
+
+    def bm25(self, text: Optional[str]) -> np.ndarray:
+        """BM25 score of every internal document against the query text"""
+        scores = np.zeros(len(self._ids), dtype=np.float64)
+        live = len(self._docs)
+        if not live:
+            return scores
+
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        average_length = max(self._total_length / live, 1e-9)
+
+        for term in set(tokenize(text)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            docs = np.frombuffer(entry[0], dtype=np.uint32)
+            tfs = np.frombuffer(entry[1], dtype=np.uint32).astype(np.float64)
+            df = int(alive[docs].sum())
+            if not df:
+                continue
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / average_length)
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+        return scores
+
+    def shortlist(self, skills: Iterable[str], text: Optional[str], limit: int) -> List[Hashable]:
+        """Up to `limit` live ids, by skill overlap, then BM25 on text, then insertion order"""
+        if limit <= 0 or not self._docs:
+            return []
+        overlap = self.skill_overlap(skills)
+        relevance = self.bm25(text)
+        alive = np.flatnonzero(np.frombuffer(self._alive, dtype=np.uint8))
+        order = np.lexsort((alive, -relevance[alive], -overlap[alive]))[:limit]
+        return [self._ids[doc] for doc in alive[order]]
+
+    def compact(self) -> None:
+        """Renumber live documents and drop dead postings"""
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(alive, dtype=np.int64) - 1
+
+        def rewrite(docs: array, *columns: array):
+            positions = np.frombuffer(docs, dtype=np.uint32)
+            keep = alive[positions]
+            new_docs = array("I", renumber[positions[keep]].astype(np.uint32).tobytes())
+            return (new_docs,) + tuple(
+                array("I", np.frombuffer(c, dtype=np.uint32)[keep].tobytes()) for c in columns
+            )
+
+        self._skills = {
+            skill: postings for skill, postings in
+            ((s, rewrite(p)[0]) for s, p in self._skills.items()) if postings
+        }
+        self._terms = {
+            term: entry for term, entry in
+            ((t, rewrite(d, f)) for t, (d, f) in self._terms.items()) if entry[0]
+        }
+        self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+        self._ids = [doc_id for doc_id in self._ids if doc_id is not None]
+        self._docs = {doc_id: doc for doc, doc_id in enumerate(self._ids)}
+        self._alive = bytearray(b"\x01" * len(self._ids))
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Live documents and postings as flat arrays for a snapshot (compacts first)"""
+        if len(self._ids) != len(self._docs):
+            self.compact()
+        skills = list(self._skills)
+        terms = list(self._terms)
+        arrays = {
+            "lengths": np.frombuffer(self._lengths, dtype=np.uint32),
+            "skill_indptr": _indptr(self._skills[skill] for skill in skills),
+            "skill_docs": _concat(self._skills[skill] for skill in skills),
+            "term_indptr": _indptr(self._terms[term][0] for term in terms),
+            "term_docs": _concat(self._terms[term][0] for term in terms),
+            "term_tfs": _concat(self._terms[term][1] for term in terms),
+        }
+        return arrays, {"ids": [str(doc_id) for doc_id in self._ids], "skills": skills, "terms": terms}
+
+    def load_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> None:
+        """Replace the contents with an export_state() result; ids come back as strings"""
+        self._ids = list(strings["ids"])
+        self._docs = {doc_id: doc for doc, doc_id in enumerate(self._ids)}
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._lengths = array("I", np.ascontiguousarray(arrays["lengths"], dtype=np.uint32).tobytes())
+        self._total_length = int(arrays["lengths"].sum())
+
+        def postings(values: np.ndarray, start: int, stop: int) -> array:
+            return array("I", np.ascontiguousarray(values[start:stop], dtype=np.uint32).tobytes())
+
+        indptr = arrays["skill_indptr"].tolist()
+        self._skills = {
+            skill: postings(arrays["skill_docs"], indptr[k], indptr[k + 1])
+            for k, skill in enumerate(strings["skills"])
+        }
+        indptr = arrays["term_indptr"].tolist()
+        self._terms = {
+            term: (
+                postings(arrays["term_docs"], indptr[k], indptr[k + 1]),
+                postings(arrays["term_tfs"], indptr[k], indptr[k + 1]),
+            )
+            for k, term in enumerate(strings["terms"])
+        }
+
+
+def _indptr(columns: Iterable[array]) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum([len(c) for c in columns], dtype=np.int64))).astype(np.int64)
+
+
+def _concat(columns: Iterable[array]) -> np.ndarray:
+    parts = [np.frombuffer(c, dtype=np.uint32) for c in columns]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
@@ -1,6 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from functools import lru_cache
 import re
+import numpy as np
 from .embedding_service import get_embedding_service
+from ..metrics import timed, CACHE_REQUESTS
 from ..models.schemas import SkillAnalysis
 
 
@@ -55,6 +58,43 @@ class SkillsService:
         for category_skills in self.known_skills.values():
             self.all_skills.update(s.lower() for s in category_skills)
 
+        # Vocabulary embeddings are computed on first use and reused across calls
+        self.skill_vocabulary = list(self.all_skills)
+        self._vocabulary_embeddings = None
+
+    def vocabulary_embeddings(self) -> np.ndarray:
+        """Embeddings of skill_vocabulary, row-aligned"""
+        if self._vocabulary_embeddings is None:
+            CACHE_REQUESTS.inc(1, "skill_vocabulary", "miss")
+            self._vocabulary_embeddings = self.embedding_service.encode(self.skill_vocabulary)
+        else:
+            CACHE_REQUESTS.inc(1, "skill_vocabulary", "hit")
+        return self._vocabulary_embeddings
+
+    def clear_vocabulary_embeddings(self) -> None:
+        """Recompute vocabulary embeddings on next use, e.g. after the embedding model changed"""
+        self._vocabulary_embeddings = None
+
+    def export_vocabulary_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Vocabulary embeddings for a snapshot; empty until they were computed"""
+        if self._vocabulary_embeddings is None:
+            return {}, {}
+        return {"embeddings": self._vocabulary_embeddings}, {"vocabulary": self.skill_vocabulary}
+
+    def load_vocabulary_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> bool:
+        """Reuse snapshot vocabulary embeddings if the snapshot covers exactly the current vocabulary.
+
+        Set iteration order differs between processes, so rows are reordered
+        to this process's skill_vocabulary.
+        """
+        vocabulary = strings.get("vocabulary")
+        if vocabulary is None or sorted(vocabulary) != sorted(self.skill_vocabulary):
+            return False
+        rows = {skill: i for i, skill in enumerate(vocabulary)}
+        self._vocabulary_embeddings = arrays["embeddings"][[rows[skill] for skill in self.skill_vocabulary]]
+        return True
+
+    @timed("skills.extract")
     def extract_skills(self, text: str) -> SkillAnalysis:
         """Extract skills from text (resume, job description, etc.)"""
 
@@ -96,6 +136,7 @@ class SkillsService:
             confidence_scores=confidence_scores
         )
 
+    @timed("skills.related")
     def get_related_skills(self, skills: List[str], limit: int = 10) -> List[Dict[str, Any]]:
         """Get related skills based on semantic similarity"""
 
@@ -107,8 +148,8 @@ class SkillsService:
         skills_embedding = self.embedding_service.encode_single(skills_text)
 
         # Find related skills
-        all_skill_list = list(self.all_skills)
-        all_embeddings = self.embedding_service.encode(all_skill_list)
+        all_skill_list = self.skill_vocabulary
+        all_embeddings = self.vocabulary_embeddings()
 
         similarities = self.embedding_service.batch_similarity(skills_embedding, all_embeddings)
 
@@ -131,12 +172,17 @@ class SkillsService:
 
         return related
 
+    @timed("skills.validate")
     def validate_skills(self, skills: List[str]) -> Dict[str, Any]:
         """Validate and standardize skill names"""
 
         validated = []
         suggestions = {}
 
+        # Encode every unknown skill in one batch
+        unknown = [s.lower().strip() for s in skills if s.lower().strip() not in self.all_skills]
+        unknown_embeddings = dict(zip(unknown, self.embedding_service.encode(unknown))) if unknown else {}
+
         for skill in skills:
             skill_lower = skill.lower().strip()
 
@@ -145,15 +191,15 @@ class SkillsService:
                 validated.append(skill)
             else:
                 # Try to find similar skill
-                skill_embedding = self.embedding_service.encode_single(skill_lower)
-                all_embeddings = self.embedding_service.encode(list(self.all_skills))
+                skill_embedding = unknown_embeddings[skill_lower]
+                all_embeddings = self.vocabulary_embeddings()
                 similarities = self.embedding_service.batch_similarity(skill_embedding, all_embeddings)
 
                 max_idx = similarities.argmax()
                 max_sim = similarities[max_idx]
 
                 if max_sim > 0.8:
-                    matched_skill = list(self.all_skills)[max_idx]
+                    matched_skill = self.skill_vocabulary[max_idx]
                     validated.append(matched_skill)
                     suggestions[skill] = matched_skill
                 else:
@@ -164,3 +210,8 @@ class SkillsService:
             "suggestions": suggestions,
             "is_valid": len(suggestions) == 0
         }
+
+
+@lru_cache()
+def get_skills_service() -> SkillsService:
+    return SkillsService()
@@ -0,0 +1,288 @@
+"""Warm-state snapshots for fast restarts.
+
+A snapshot is a directory bundle of flat .npy files plus a manifest.json.
+It holds the embedding cache, the skill vocabulary embeddings, the job
+and freelancer embedding indexes, the materialized top-match lists with
+their entities, and the fraud account linkage graph. Each component
+exports numeric arrays and string lists. A string list is stored as one
+UTF-8 byte blob and an offsets array, so every file loads with
+np.load(mmap_mode="c").
+On restore, arrays are mapped copy-on-write rather than read. Pages are
+faulted in on first use, and in-place updates stay private to the process.
+
+Bundles are written to a temporary directory and renamed into place.
+Then the CURRENT file in the snapshot root is atomically replaced to point
+at the new bundle, so a reader never sees a partial bundle. The newest
+SNAPSHOT_KEEP bundles are kept.
+
+The manifest records the format version, the active model's name, the
+embedding dimension and the embeddings of a few probe texts. Restore
+refuses a bundle with another format, and a bundle whose files are
+missing or disagree with the manifest. Nothing is applied until every
+component has been read. If the model name differs, or the probe
+embeddings no longer match the loaded model (for example, new weights
+under the same name), only the MODEL_INDEPENDENT components are restored.
+Stored embeddings would otherwise mix two embedding spaces.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from functools import lru_cache
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+from .embedding_service import EmbeddingService, get_embedding_service
+from .embedding_index import get_job_index, get_freelancer_index
+from .skills_service import get_skills_service
+from .linkage_graph import get_linkage_graph
+from .top_matches_service import get_top_matches_service
+from ..metrics import counter
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+PROBE_TEXTS = (
+    "Senior Python developer with FastAPI and PostgreSQL experience",
+    "Looking for a designer to build a mobile app in Figma",
+    "kubernetes",
+)
+# Minimum cosine similarity between stored and current probe embeddings
+PROBE_SIMILARITY = 0.999
+# Components restored even from a bundle taken with another model
+MODEL_INDEPENDENT = {"linkage_graph"}
+
+SNAPSHOT_RESTORES = counter("ai_snapshot_restores_total", "Warm-state snapshot restore attempts", ["result"])
+
+State = Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]
+
+
+class SnapshotError(Exception):
+    """Missing, unreadable or stale snapshot bundle"""
+
+
+def _components() -> Dict[str, Tuple[Callable[[], State], Callable[..., Any]]]:
+    """Snapshot component name -> (export, load) over the process-wide singletons"""
+    embedding_service = get_embedding_service()
+    skills_service = get_skills_service()
+    components = {
+        "embedding_cache": (embedding_service.export_cache_state, embedding_service.load_cache_state),
+        "skill_vocabulary": (skills_service.export_vocabulary_state, skills_service.load_vocabulary_state),
+    }
+    for name, index in (
+        ("job_index", get_job_index()),
+        ("freelancer_index", get_freelancer_index()),
+        ("top_matches", get_top_matches_service()),
+        ("linkage_graph", get_linkage_graph()),
+    ):
+        components[name] = (index.export_state, index.load_state)
+    return components
+
+
+def model_fingerprint(embedding_service: EmbeddingService) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Model identity for the manifest, and the probe embeddings it is checked against"""
+    probes = np.asarray(embedding_service._encode_texts(list(PROBE_TEXTS)), dtype=np.float32)
+    return {
+        "name": embedding_service.active_space.name,
+        "dim": int(probes.shape[1]),
+    }, probes
+
+
+class SnapshotService:
+    def __init__(self, root: str, keep: int = 2):
+        self.root = root
+        self.keep = max(keep, 1)
+        # Outcome of the last restore() in this process: its summary, or {"error": ...}
+        self.last_restore: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def write(self) -> Dict[str, Any]:
+        """Write the current in-memory state as a new bundle and point CURRENT at it"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            name = f"bundle-{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}"
+            staging = os.path.join(self.root, f".{name}.tmp")
+            os.makedirs(staging)
+            try:
+                model, probes = model_fingerprint(get_embedding_service())
+                np.save(os.path.join(staging, "model.probes.npy"), probes)
+                manifest = {
+                    "format_version": SNAPSHOT_FORMAT_VERSION,
+                    "created_at": time.time(),
+                    "model": model,
+                    "components": {},
+                }
+                for component, (export, _) in _components().items():
+                    arrays, strings = export()
+                    if not arrays and not strings:
+                        continue
+                    manifest["components"][component] = _write_component(staging, component, arrays, strings)
+                with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(staging, os.path.join(self.root, name))
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+            pointer = os.path.join(self.root, f".{CURRENT_FILE}.tmp")
+            with open(pointer, "w") as f:
+                f.write(name)
+            os.replace(pointer, os.path.join(self.root, CURRENT_FILE))
+            self._prune(name)
+        return {"bundle": name, **manifest}
+
+    def manifest(self) -> Dict[str, Any]:
+        bundle = self._current()
+        with open(os.path.join(self.root, bundle, MANIFEST_FILE)) as f:
+            return {"bundle": bundle, **json.load(f)}
+
+    def restore(self) -> Dict[str, Any]:
+        """Map the current bundle into the process-wide services; raises SnapshotError if it is stale"""
+        start = time.perf_counter()
+        try:
+            manifest = self.manifest()
+        except (OSError, ValueError) as e:
+            SNAPSHOT_RESTORES.inc(1, "missing")
+            self.last_restore = {"error": f"No readable snapshot in {self.root}: {e}"}
+            raise SnapshotError(self.last_restore["error"])
+        directory = os.path.join(self.root, manifest["bundle"])
+        stale_model = None
+        try:
+            if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                raise SnapshotError(
+                    f"Snapshot format {manifest.get('format_version')}, expected {SNAPSHOT_FORMAT_VERSION}"
+                )
+            try:
+                self._check_model(manifest, directory)
+            except SnapshotError as e:
+                # Lexical indexes and the linkage graph do not depend on the model; the rest is stale
+                stale_model = str(e)
+                if not MODEL_INDEPENDENT & set(manifest["components"]):
+                    raise
+        except SnapshotError as e:
+            SNAPSHOT_RESTORES.inc(1, "stale")
+            self.last_restore = {"error": str(e), "bundle": manifest["bundle"]}
+            raise
+
+        # Read and check every component before applying any, so a damaged bundle leaves the process cold
+        components = _components()
+        states: Dict[str, State] = {}
+        try:
+            for component, layout in manifest["components"].items():
+                if component not in components or (stale_model and component not in MODEL_INDEPENDENT):
+                    continue
+                states[component] = _read_component(directory, component, layout)
+        except (OSError, ValueError, KeyError) as e:
+            SNAPSHOT_RESTORES.inc(1, "unreadable")
+            self.last_restore = {"error": f"Unreadable snapshot component: {e}", "bundle": manifest["bundle"]}
+            raise SnapshotError(self.last_restore["error"])
+
+        restored = {}
+        for component, (arrays, strings) in states.items():
+            try:
+                loaded = components[component][1](arrays, strings)
+            except (ValueError, KeyError, IndexError) as e:
+                SNAPSHOT_RESTORES.inc(1, "unreadable")
+                self.last_restore = {
+                    "error": f"Snapshot component {component} does not load: {e}",
+                    "bundle": manifest["bundle"],
+                    "components": restored,
+                }
+                raise SnapshotError(self.last_restore["error"])
+            restored[component] = loaded is not False
+        SNAPSHOT_RESTORES.inc(1, "partial" if stale_model else "restored")
+        self.last_restore = {
+            "bundle": manifest["bundle"],
+            "created_at": manifest["created_at"],
+            "components": restored,
+            "stale_model": stale_model,
+            "seconds": time.perf_counter() - start,
+        }
+        return self.last_restore
+
+    def _check_model(self, manifest: Dict[str, Any], directory: str) -> None:
+        model, probes = model_fingerprint(get_embedding_service())
+        stored = manifest.get("model", {})
+        if stored.get("name") != model["name"] or stored.get("dim") != model["dim"]:
+            raise SnapshotError(
+                f"Snapshot was taken with {stored.get('name')} ({stored.get('dim')} dims), "
+                f"the service runs {model['name']} ({model['dim']} dims)"
+            )
+        try:
+            stored_probes = np.load(os.path.join(directory, "model.probes.npy"))
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Unreadable snapshot probe embeddings: {e}")
+        if stored_probes.shape != probes.shape:
+            raise SnapshotError(f"Snapshot probe embeddings have shape {stored_probes.shape}, expected {probes.shape}")
+        similarity = np.sum(_unit(stored_probes) * _unit(probes), axis=1)
+        if similarity.min() < PROBE_SIMILARITY:
+            raise SnapshotError(
+                f"Model {model['name']} produces different embeddings than when the snapshot was taken "
+                f"(probe similarity {similarity.min():.4f})"
+            )
+
+    def _current(self) -> str:
+        with open(os.path.join(self.root, CURRENT_FILE)) as f:
+            bundle = f.read().strip()
+        if not bundle.startswith("bundle-"):
+            raise ValueError(f"Unexpected {CURRENT_FILE} contents: {bundle!r}")
+        return bundle
+
+    def _prune(self, current: str) -> None:
+        bundles = sorted(
+            (entry for entry in os.listdir(self.root) if entry.startswith("bundle-")),
+            reverse=True,
+        )
+        for bundle in bundles[self.keep:]:
+            if bundle != current:
+                shutil.rmtree(os.path.join(self.root, bundle), ignore_errors=True)
+
+
+def _write_component(directory: str, component: str, arrays: Dict[str, np.ndarray],
+                     strings: Dict[str, List[str]]) -> Dict[str, Any]:
+    for key, values in arrays.items():
+        np.save(os.path.join(directory, f"{component}.{key}.npy"), np.ascontiguousarray(values))
+    for key, values in strings.items():
+        encoded = [value.encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        np.save(os.path.join(directory, f"{component}.{key}.utf8.npy"), blob)
+        np.save(os.path.join(directory, f"{component}.{key}.offsets.npy"), offsets)
+    return {
+        "arrays": {key: list(np.shape(values)) for key, values in arrays.items()},
+        "strings": {key: len(values) for key, values in strings.items()},
+    }
+
+
+def _read_component(directory: str, component: str, layout: Dict[str, Any]) -> State:
+    """Map a component's files; raises OSError or ValueError if one is missing or disagrees with the manifest"""
+    arrays = {}
+    for key, shape in layout["arrays"].items():
+        arrays[key] = np.load(os.path.join(directory, f"{component}.{key}.npy"), mmap_mode="c")
+        if list(np.shape(arrays[key])) != shape:
+            raise ValueError(f"{component}.{key} has shape {list(np.shape(arrays[key]))}, manifest says {shape}")
+    strings = {}
+    for key, count in layout["strings"].items():
+        blob = np.load(os.path.join(directory, f"{component}.{key}.utf8.npy"), mmap_mode="r").tobytes()
+        offsets = np.load(os.path.join(directory, f"{component}.{key}.offsets.npy")).tolist()
+        if len(offsets) != count + 1 or (offsets and offsets[-1] != len(blob)):
+            raise ValueError(f"{component}.{key} does not hold the {count} strings the manifest lists")
+        strings[key] = [blob[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+    return arrays, strings
+
+
+def _unit(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=-1, keepdims=True), 1e-12)
+
+
+@lru_cache()
+def get_snapshot_service() -> Optional[SnapshotService]:
+    """Snapshots under SNAPSHOT_PATH, or None when snapshots are off"""
+    root = os.getenv("SNAPSHOT_PATH")
+    if not root:
+        return None
+    return SnapshotService(root, keep=int(os.getenv("SNAPSHOT_KEEP", "2")))
@@ -0,0 +1,583 @@
+"""Materialized top-K match lists per job and per freelancer.
+
+Job and freelancer changes are queued and applied in batches by refresh().
+A changed entity gets its own list rebuilt. It is then re-scored only
+against the other side's lists it could enter: those it is already on,
+and those whose cut-off its cheap upper bound reaches. Reads are dict
+lookups and never refresh: run() applies changes in the background every
+max_staleness / 2, and a read that finds a queued change older than
+max_staleness is answered from the current lists and flagged stale.
+
+Lists keep `depth` (> k) entries so that entries leaving a list rarely
+force a rebuild. Ties are broken by id. Each side is also kept in an
+inverted SkillIndex. When MATCHING_SHORTLIST_SIZE is set and a side has
+more entities than that, a rebuilt list only scores the index's shortlist:
+skill overlap first, then BM25 of the bio or job text.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from .embedding_index import EmbeddingIndex
+from .matching_service import MatchingService, BOUND_SLACK
+from .skill_index import SkillIndex
+from ..metrics import timed, counter, CANDIDATES_PRUNED
+from ..models.schemas import (
+    FreelancerProfile, JobForMatching, TopFreelancerMatches, TopJobMatches
+)
+
+logger = logging.getLogger(__name__)
+
+TOP_MATCH_UPDATES = counter(
+    "ai_top_matches_updates_total", "Materialized list maintenance by kind", ["kind"]
+)
+
+
+@dataclass
+class RankedList:
+    """Exact best entries for one job or freelancer, best first. Treated as immutable once published."""
+    ids: List[str]
+    # Rounded match scores, the ranking key
+    scores: List[float]
+    # Raw score components per entry, as returned by the MatchingService scorers
+    components: np.ndarray
+    # True when the list holds every candidate, not only the best `depth`
+    complete: bool
+    refreshed_at: float
+
+    def key(self, i: int) -> Tuple[float, str]:
+        return (-self.scores[i], self.ids[i])
+
+
+class TopMatchesService:
+    def __init__(
+        self,
+        matching_service: Optional[MatchingService] = None,
+        k: int = 20,
+        depth: Optional[int] = None,
+        max_staleness: float = 5.0,
+    ):
+        self.matching = matching_service or MatchingService()
+        self.embedding_service = self.matching.embedding_service
+        self.k = k
+        self.depth = max(depth or 2 * k, k)
+        self.max_staleness = max_staleness
+
+        self.jobs: Dict[str, JobForMatching] = {}
+        self.freelancers: Dict[str, FreelancerProfile] = {}
+        # Freelancer text is the same as query and as document; jobs differ (title only in the document)
+        self._freelancer_vectors = EmbeddingIndex()
+        self._job_query_vectors = EmbeddingIndex()
+        self._job_document_vectors = EmbeddingIndex()
+        # Skills and bio / job text per entity, for shortlisting candidates
+        self._freelancer_terms = SkillIndex()
+        self._job_terms = SkillIndex()
+
+        self.job_lists: Dict[str, RankedList] = {}
+        self.freelancer_lists: Dict[str, RankedList] = {}
+
+        # id -> new version, or None for a removal
+        self._pending_jobs: Dict[str, Optional[JobForMatching]] = {}
+        self._pending_freelancers: Dict[str, Optional[FreelancerProfile]] = {}
+        self._oldest_pending: Optional[float] = None
+        self._pending_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stopped = asyncio.Event()
+
+    # Writes
+
+    def upsert_job(self, job: JobForMatching) -> None:
+        self._enqueue(self._pending_jobs, job.job_id, job)
+
+    def remove_job(self, job_id: str) -> None:
+        self._enqueue(self._pending_jobs, job_id, None)
+
+    def upsert_freelancer(self, freelancer: FreelancerProfile) -> None:
+        self._enqueue(self._pending_freelancers, freelancer.user_id, freelancer)
+
+    def remove_freelancer(self, user_id: str) -> None:
+        self._enqueue(self._pending_freelancers, user_id, None)
+
+    def _enqueue(self, pending: Dict[str, Any], entity_id: str, value: Any) -> None:
+        with self._pending_lock:
+            pending[entity_id] = value
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+
+    @property
+    def pending_updates(self) -> int:
+        return len(self._pending_jobs) + len(self._pending_freelancers)
+
+    # Reads
+
+    def top_freelancers(self, job_id: str, limit: Optional[int] = None) -> Optional[TopFreelancerMatches]:
+        """Best freelancers for a job, or None if the job is unknown"""
+        ranked = self.job_lists.get(job_id)
+        if ranked is None:
+            return None
+        matches = self._build(ranked, limit, self.freelancers, self.matching._build_freelancer_match)
+        return TopFreelancerMatches(
+            job_id=job_id, matches=matches, refreshed_at=ranked.refreshed_at, pending_updates=self.pending_updates,
+            stale=self.stale
+        )
+
+    def top_jobs(self, user_id: str, limit: Optional[int] = None) -> Optional[TopJobMatches]:
+        """Best jobs for a freelancer, or None if the freelancer is unknown"""
+        ranked = self.freelancer_lists.get(user_id)
+        if ranked is None:
+            return None
+        jobs = {job_id: job.model_dump() for job_id, job in ((i, self.jobs.get(i)) for i in ranked.ids) if job}
+        matches = self._build(ranked, limit, jobs, self.matching._build_job_match)
+        return TopJobMatches(
+            user_id=user_id, matches=matches, refreshed_at=ranked.refreshed_at, pending_updates=self.pending_updates,
+            stale=self.stale
+        )
+
+    def _build(self, ranked: RankedList, limit: Optional[int], entities: Dict[str, Any],
+               build: Callable[[Any, tuple], Any]) -> List[Any]:
+        limit = self.k if limit is None else min(limit, self.depth)
+        result = []
+        for i, entity_id in enumerate(ranked.ids[:limit]):
+            entity = entities.get(entity_id)
+            if entity is not None:
+                result.append(build(entity, tuple(ranked.components[i].tolist())))
+        return result
+
+    @property
+    def stale(self) -> bool:
+        """Whether a queued change has waited longer than max_staleness"""
+        oldest = self._oldest_pending
+        return oldest is not None and time.monotonic() - oldest > self.max_staleness
+
+    # Maintenance
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """Apply queued changes in the background until stop() is called"""
+        interval = interval or self.max_staleness / 2
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._oldest_pending is None:
+                continue
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                # The changes were queued again; the next tick retries them
+                logger.exception("Top matches refresh failed")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    @timed("top_matches.refresh")
+    def refresh(self) -> Dict[str, int]:
+        """Apply all queued changes; returns how many lists were rebuilt and patched.
+
+        If applying fails (e.g. encoding), the dequeued changes are queued again under any newer ones and the error
+        is raised. Applying them a second time is safe.
+        """
+        with self._refresh_lock:
+            with self._pending_lock:
+                jobs, self._pending_jobs = self._pending_jobs, {}
+                freelancers, self._pending_freelancers = self._pending_freelancers, {}
+                self._oldest_pending = None
+            if not jobs and not freelancers:
+                return {"rebuilt": 0, "patched": 0}
+            try:
+                return self._refresh(jobs, freelancers)
+            except Exception:
+                with self._pending_lock:
+                    for pending, dequeued in ((self._pending_jobs, jobs), (self._pending_freelancers, freelancers)):
+                        for entity_id, entity in dequeued.items():
+                            pending.setdefault(entity_id, entity)
+                    if self._oldest_pending is None:
+                        self._oldest_pending = time.monotonic()
+                raise
+
+    def _refresh(self, jobs: Dict[str, Optional[JobForMatching]],
+                 freelancers: Dict[str, Optional[FreelancerProfile]]) -> Dict[str, int]:
+        stats = {"rebuilt": 0, "patched": 0}
+        changed_jobs = self._apply_jobs(jobs)
+        changed_freelancers = self._apply_freelancers(freelancers)
+        removed_jobs = [job_id for job_id, job in jobs.items() if job is None]
+        removed_freelancers = [user_id for user_id, f in freelancers.items() if f is None]
+
+        # Changed entities: own list from scratch, against the already-updated other side
+        for job_id in changed_jobs:
+            self.job_lists[job_id] = self._rank_freelancers_for(self.jobs[job_id])
+            stats["rebuilt"] += 1
+        for user_id in changed_freelancers:
+            self.freelancer_lists[user_id] = self._rank_jobs_for(self.freelancers[user_id])
+            stats["rebuilt"] += 1
+
+        # Everyone else: patch in the changed entities of the other side
+        for job_id, ranked in list(self.job_lists.items()):
+            if job_id in jobs:
+                continue
+            updated = self._patch_job_list(self.jobs[job_id], ranked, changed_freelancers, removed_freelancers)
+            if updated is not ranked:
+                self.job_lists[job_id] = updated
+                stats["patched"] += 1
+        for user_id, ranked in list(self.freelancer_lists.items()):
+            if user_id in freelancers:
+                continue
+            updated = self._patch_freelancer_list(self.freelancers[user_id], ranked, changed_jobs, removed_jobs)
+            if updated is not ranked:
+                self.freelancer_lists[user_id] = updated
+                stats["patched"] += 1
+
+        TOP_MATCH_UPDATES.inc(stats["rebuilt"], "rebuilt")
+        TOP_MATCH_UPDATES.inc(stats["patched"], "patched")
+        return stats
+
+    def reembed(self) -> None:
+        """Re-encode every entity and rebuild every list, e.g. after the embedding model was switched.
+
+        The new indexes and lists are built aside, without holding the refresh lock, and swapped in at once.
+        Until then reads get the previous lists. Changes refreshed meanwhile are queued again on top.
+        """
+        staged = TopMatchesService(self.matching, self.k, self.depth, self.max_staleness)
+        staged._apply_jobs(dict(self.jobs))
+        staged._apply_freelancers(dict(self.freelancers))
+        for job_id, job in staged.jobs.items():
+            staged.job_lists[job_id] = staged._rank_freelancers_for(job)
+        for user_id, freelancer in staged.freelancers.items():
+            staged.freelancer_lists[user_id] = staged._rank_jobs_for(freelancer)
+
+        with self._refresh_lock:
+            self._requeue(self._pending_jobs, staged.jobs, self.jobs)
+            self._requeue(self._pending_freelancers, staged.freelancers, self.freelancers)
+            self.jobs, self.freelancers = staged.jobs, staged.freelancers
+            self._freelancer_vectors = staged._freelancer_vectors
+            self._job_query_vectors = staged._job_query_vectors
+            self._job_document_vectors = staged._job_document_vectors
+            self._freelancer_terms, self._job_terms = staged._freelancer_terms, staged._job_terms
+            self.job_lists, self.freelancer_lists = staged.job_lists, staged.freelancer_lists
+        TOP_MATCH_UPDATES.inc(len(staged.jobs) + len(staged.freelancers), "rebuilt")
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """Entities, their vectors and term indexes, the ranked lists and queued changes for a snapshot"""
+        with self._refresh_lock, self._pending_lock:
+            if not self.jobs and not self.freelancers and not self.pending_updates:
+                return {}, {}
+            arrays: Dict[str, np.ndarray] = {}
+            strings: Dict[str, List[str]] = {
+                "jobs": [job.model_dump_json() for job in self.jobs.values()],
+                "freelancers": [f.model_dump_json() for f in self.freelancers.values()],
+                "pending_jobs": [job.model_dump_json() for job in self._pending_jobs.values() if job is not None],
+                "pending_job_removals": [i for i, job in self._pending_jobs.items() if job is None],
+                "pending_freelancers": [
+                    f.model_dump_json() for f in self._pending_freelancers.values() if f is not None
+                ],
+                "pending_freelancer_removals": [i for i, f in self._pending_freelancers.items() if f is None],
+            }
+            for name, part in self._parts().items():
+                part_arrays, part_strings = part.export_state()
+                arrays.update((f"{name}.{key}", values) for key, values in part_arrays.items())
+                strings.update((f"{name}.{key}", values) for key, values in part_strings.items())
+            for name, lists, width in (
+                ("job_lists", self.job_lists, 4), ("freelancer_lists", self.freelancer_lists, 3)
+            ):
+                owners = list(lists)
+                ranked = [lists[owner] for owner in owners]
+                strings[f"{name}.owners"] = owners
+                strings[f"{name}.ids"] = [entity_id for r in ranked for entity_id in r.ids]
+                arrays[f"{name}.indptr"] = np.cumsum([0] + [len(r.ids) for r in ranked], dtype=np.int64)
+                arrays[f"{name}.scores"] = np.array([score for r in ranked for score in r.scores], dtype=np.float64)
+                arrays[f"{name}.components"] = (
+                    np.concatenate([r.components for r in ranked]) if ranked else np.zeros((0, width))
+                )
+                arrays[f"{name}.complete"] = np.array([r.complete for r in ranked], dtype=np.uint8)
+                arrays[f"{name}.refreshed_at"] = np.array([r.refreshed_at for r in ranked], dtype=np.float64)
+            return arrays, strings
+
+    def load_state(self, arrays: Dict[str, np.ndarray], strings: Dict[str, List[str]]) -> None:
+        """Replace the contents with an export_state() result; queued changes are kept on top of the snapshot's"""
+        jobs = [JobForMatching.model_validate_json(job) for job in strings["jobs"]]
+        freelancers = [FreelancerProfile.model_validate_json(f) for f in strings["freelancers"]]
+        parts = {name: type(part)() for name, part in self._parts().items()}
+        for name, part in parts.items():
+            prefix = f"{name}."
+            part.load_state(
+                {key[len(prefix):]: values for key, values in arrays.items() if key.startswith(prefix)},
+                {key[len(prefix):]: values for key, values in strings.items() if key.startswith(prefix)},
+            )
+        lists = {}
+        for name in ("job_lists", "freelancer_lists"):
+            ids, scores = strings[f"{name}.ids"], arrays[f"{name}.scores"].tolist()
+            indptr = arrays[f"{name}.indptr"].tolist()
+            components = np.array(arrays[f"{name}.components"], dtype=np.float64)
+            complete, refreshed_at = arrays[f"{name}.complete"].tolist(), arrays[f"{name}.refreshed_at"].tolist()
+            if len(indptr) != len(strings[f"{name}.owners"]) + 1 or \
+                    not indptr[-1] == len(ids) == len(scores) == len(components):
+                raise ValueError(f"{name} entries do not match their offsets")
+            lists[name] = {
+                owner: RankedList(
+                    ids=ids[indptr[k]:indptr[k + 1]], scores=scores[indptr[k]:indptr[k + 1]],
+                    components=components[indptr[k]:indptr[k + 1]], complete=bool(complete[k]),
+                    refreshed_at=refreshed_at[k],
+                )
+                for k, owner in enumerate(strings[f"{name}.owners"])
+            }
+
+        with self._refresh_lock:
+            self.jobs = {job.job_id: job for job in jobs}
+            self.freelancers = {f.user_id: f for f in freelancers}
+            self._freelancer_vectors = parts["freelancer_vectors"]
+            self._job_query_vectors = parts["job_query_vectors"]
+            self._job_document_vectors = parts["job_document_vectors"]
+            self._freelancer_terms, self._job_terms = parts["freelancer_terms"], parts["job_terms"]
+            self.job_lists, self.freelancer_lists = lists["job_lists"], lists["freelancer_lists"]
+            for pending, changed, removed, model, key in (
+                (self._pending_jobs, "pending_jobs", "pending_job_removals", JobForMatching, "job_id"),
+                (self._pending_freelancers, "pending_freelancers", "pending_freelancer_removals",
+                 FreelancerProfile, "user_id"),
+            ):
+                snapshot = {entity_id: None for entity_id in strings[removed]}
+                snapshot.update((getattr(e, key), e) for e in map(model.model_validate_json, strings[changed]))
+                for entity_id, entity in snapshot.items():
+                    # A change queued since startup is newer than the snapshot's
+                    if entity_id not in pending:
+                        self._enqueue(pending, entity_id, entity)
+
+    def _parts(self) -> Dict[str, Any]:
+        """Snapshot name -> index with its own export_state / load_state"""
+        return {
+            "freelancer_vectors": self._freelancer_vectors,
+            "job_query_vectors": self._job_query_vectors,
+            "job_document_vectors": self._job_document_vectors,
+            "freelancer_terms": self._freelancer_terms,
+            "job_terms": self._job_terms,
+        }
+
+    def _requeue(self, pending: Dict[str, Any], built: Dict[str, Any], current: Dict[str, Any]) -> None:
+        """Queue every entity whose current version differs from the one the staged state was built from"""
+        with self._pending_lock:
+            for entity_id in built.keys() | current.keys():
+                if built.get(entity_id) is not current.get(entity_id):
+                    pending.setdefault(entity_id, current.get(entity_id))
+                    if self._oldest_pending is None:
+                        self._oldest_pending = time.monotonic()
+
+    def document_texts(self) -> List[str]:
+        """Every text the current entities are encoded from"""
+        jobs = list(self.jobs.values())
+        return (
+            [self._job_query_text(job) for job in jobs] + [self._job_document_text(job) for job in jobs] +
+            [self._freelancer_text(f) for f in list(self.freelancers.values())]
+        )
+
+    @staticmethod
+    def _job_query_text(job: JobForMatching) -> str:
+        return f"{job.description} Skills: {', '.join(job.skills)}"
+
+    @staticmethod
+    def _job_document_text(job: JobForMatching) -> str:
+        return f"{job.title} {job.description} Skills: {', '.join(job.skills)}"
+
+    @staticmethod
+    def _freelancer_text(freelancer: FreelancerProfile) -> str:
+        return f"{freelancer.bio or ''} Skills: {', '.join(freelancer.skills)}"
+
+    def _apply_jobs(self, pending: Dict[str, Optional[JobForMatching]]) -> List[str]:
+        changed = [job for job in pending.values() if job is not None]
+        for job_id, job in pending.items():
+            if job is None and self.jobs.pop(job_id, None) is not None:
+                self._job_query_vectors.remove(job_id)
+                self._job_document_vectors.remove(job_id)
+                self._job_terms.remove(job_id)
+                self.job_lists.pop(job_id, None)
+        if changed:
+            with timed("matching.encode"):
+                embeddings = self.embedding_service.encode_documents(
+                    [self._job_query_text(job) for job in changed] + [self._job_document_text(job) for job in changed]
+                )
+            ids = [job.job_id for job in changed]
+            self._job_query_vectors.upsert_many(ids, embeddings[:len(changed)])
+            self._job_document_vectors.upsert_many(ids, embeddings[len(changed):])
+            for job in changed:
+                self._job_terms.upsert(job.job_id, job.skills, f"{job.title} {job.description}")
+            self.jobs.update(zip(ids, changed))
+        return [job.job_id for job in changed]
+
+    def _apply_freelancers(self, pending: Dict[str, Optional[FreelancerProfile]]) -> List[str]:
+        changed = [f for f in pending.values() if f is not None]
+        for user_id, freelancer in pending.items():
+            if freelancer is None and self.freelancers.pop(user_id, None) is not None:
+                self._freelancer_vectors.remove(user_id)
+                self._freelancer_terms.remove(user_id)
+                self.freelancer_lists.pop(user_id, None)
+        if changed:
+            with timed("matching.encode"):
+                embeddings = self.embedding_service.encode_documents([self._freelancer_text(f) for f in changed])
+            ids = [f.user_id for f in changed]
+            self._freelancer_vectors.upsert_many(ids, embeddings)
+            for freelancer in changed:
+                self._freelancer_terms.upsert(freelancer.user_id, freelancer.skills, freelancer.bio)
+            self.freelancers.update(zip(ids, changed))
+        return [f.user_id for f in changed]
+
+    def _rank_freelancers_for(self, job: JobForMatching) -> RankedList:
+        freelancers = [
+            self.freelancers[user_id] for user_id in
+            self._candidate_ids(self._freelancer_terms, self.freelancers, job.skills, f"{job.title} {job.description}",
+                                "freelancers_to_job")
+        ]
+        job_embedding = self._job_query_vectors.get(job.job_id)
+        entries = self.matching._match_with_bounds(
+            freelancers,
+            self.matching._freelancer_upper_bounds(job.skills, freelancers, job.budget_min, job.budget_max),
+            lambda chunk: self.matching._score_freelancers(
+                job_embedding, job.skills, chunk, job.budget_min, job.budget_max,
+                self._stack(self._freelancer_vectors, [f.user_id for f in chunk])
+            ),
+            lambda freelancer, components: (freelancer.user_id, components),
+            self.depth,
+            "freelancers_to_job"
+        ) if freelancers else []
+        complete = len(freelancers) == len(self.freelancers) <= self.depth
+        return self._ranked(entries, complete=complete, width=4)
+
+    def _rank_jobs_for(self, freelancer: FreelancerProfile) -> RankedList:
+        jobs = [
+            self.jobs[job_id].model_dump() for job_id in
+            self._candidate_ids(self._job_terms, self.jobs, freelancer.skills, freelancer.bio, "jobs_to_freelancer")
+        ]
+        freelancer_embedding = self._freelancer_vectors.get(freelancer.user_id)
+        entries = self.matching._match_with_bounds(
+            jobs,
+            self.matching._job_upper_bounds(freelancer.skills, jobs, freelancer.hourly_rate),
+            lambda chunk: self.matching._score_jobs(
+                freelancer_embedding, freelancer.skills, chunk, freelancer.hourly_rate,
+                self._stack(self._job_document_vectors, [job["job_id"] for job in chunk])
+            ),
+            lambda job, components: (job["job_id"], components),
+            self.depth,
+            "jobs_to_freelancer"
+        ) if jobs else []
+        return self._ranked(entries, complete=len(jobs) == len(self.jobs) <= self.depth, width=3)
+
+    def _candidate_ids(self, index: SkillIndex, entities: Dict[str, Any], skills: List[str],
+                       text: Optional[str], direction: str) -> List[str]:
+        """Ids to score for one list: all of them, or the index's shortlist above the matching shortlist size"""
+        ids: List[str] = list(entities)
+        size = self.matching.shortlist_size
+        if size and len(ids) > size:
+            with timed("matching.prefilter"):
+                ids = index.shortlist(skills, text, size)
+            CANDIDATES_PRUNED.inc(len(entities) - len(ids), direction, "prefilter")
+        # Sorting by id makes TopK's input-order tie-break the id tie-break
+        return sorted(ids)
+
+    def _patch_job_list(self, job: JobForMatching, ranked: RankedList,
+                        changed: List[str], removed: List[str]) -> RankedList:
+        job_embedding = self._job_query_vectors.get(job.job_id)
+        updates: Dict[str, Optional[tuple]] = {user_id: None for user_id in removed}
+        for user_id in changed:
+            freelancer = self.freelancers[user_id]
+            freelancer_embedding = self._freelancer_vectors.get(user_id)
+            if user_id not in ranked.ids and not ranked.complete and ranked.ids:
+                # Cheap ceiling first: exact rate, experience and rating, unencoded skill bound
+                bound = (
+                    self.matching._skill_match_bound(job.skills, freelancer.skills) * 0.4 +
+                    float(np.dot(job_embedding, freelancer_embedding)) * 0.3 +
+                    self.matching._calculate_rate_match(freelancer.hourly_rate, job.budget_min, job.budget_max) * 0.15 +
+                    min(freelancer.experience_years or 0, 10) / 10 * 0.1 +
+                    (freelancer.avg_rating / 5) * 0.1
+                )
+                if (-round((bound + BOUND_SLACK) * 100, 2), user_id) > ranked.key(len(ranked.ids) - 1):
+                    continue
+            updates[user_id] = self.matching._score_freelancers(
+                job_embedding, job.skills, [freelancer], job.budget_min, job.budget_max, freelancer_embedding[None, :]
+            )[0]
+        if not any(user_id in ranked.ids or components is not None for user_id, components in updates.items()):
+            return ranked
+        patched = self._merge(ranked, updates)
+        if not patched.complete and len(patched.ids) < self.k:
+            return self._rank_freelancers_for(job)
+        return patched
+
+    def _patch_freelancer_list(self, freelancer: FreelancerProfile, ranked: RankedList,
+                               changed: List[str], removed: List[str]) -> RankedList:
+        freelancer_embedding = self._freelancer_vectors.get(freelancer.user_id)
+        updates: Dict[str, Optional[tuple]] = {job_id: None for job_id in removed}
+        for job_id in changed:
+            job = self.jobs[job_id].model_dump()
+            job_embedding = self._job_document_vectors.get(job_id)
+            if job_id not in ranked.ids and not ranked.complete and ranked.ids:
+                bound = (
+                    self.matching._skill_match_bound(job["skills"], freelancer.skills) * 0.5 +
+                    float(np.dot(freelancer_embedding, job_embedding)) * 0.35 +
+                    self.matching._calculate_budget_match(freelancer.hourly_rate, job.get("budget_max")) * 0.15
+                )
+                if (-round((bound + BOUND_SLACK) * 100, 2), job_id) > ranked.key(len(ranked.ids) - 1):
+                    continue
+            updates[job_id] = self.matching._score_jobs(
+                freelancer_embedding, freelancer.skills, [job], freelancer.hourly_rate, job_embedding[None, :]
+            )[0]
+        if not any(job_id in ranked.ids or components is not None for job_id, components in updates.items()):
+            return ranked
+        patched = self._merge(ranked, updates)
+        if not patched.complete and len(patched.ids) < self.k:
+            return self._rank_jobs_for(freelancer)
+        return patched
+
+    def _merge(self, ranked: RankedList, updates: Dict[str, Optional[tuple]]) -> RankedList:
+        """New list with `updates` applied: None removes an entry, components re-score it"""
+        entries = [
+            (key, ranked.ids[i], ranked.components[i])
+            for i, key in ((i, ranked.key(i)) for i in range(len(ranked.ids)))
+            if ranked.ids[i] not in updates
+        ]
+        cutoff = entries[-1][0] if entries else None
+        complete = ranked.complete
+        for entity_id, components in updates.items():
+            if components is None:
+                continue
+            key = (-round(components[0] * 100, 2), entity_id)
+            # A truncated list cannot take entries below its last one: unlisted candidates may rank between
+            if complete or cutoff is None or key < cutoff:
+                bisect.insort(entries, (key, entity_id, np.asarray(components, dtype=np.float64)), key=lambda e: e[0])
+        if len(entries) > self.depth:
+            entries = entries[:self.depth]
+            complete = False
+        if [e[1] for e in entries] == ranked.ids and complete == ranked.complete and all(
+            np.array_equal(e[2], ranked.components[i]) for i, e in enumerate(entries)
+        ):
+            return ranked
+        return RankedList(
+            ids=[e[1] for e in entries],
+            scores=[-e[0][0] for e in entries],
+            components=np.array([e[2] for e in entries]).reshape(len(entries), ranked.components.shape[1]),
+            complete=complete,
+            refreshed_at=time.time(),
+        )
+
+    def _ranked(self, entries: List[Tuple[str, tuple]], complete: bool, width: int) -> RankedList:
+        return RankedList(
+            ids=[entity_id for entity_id, _ in entries],
+            scores=[round(components[0] * 100, 2) for _, components in entries],
+            components=np.array([components for _, components in entries], dtype=np.float64).reshape(len(entries), width),
+            complete=complete,
+            refreshed_at=time.time(),
+        )
+
+    @staticmethod
+    def _stack(index: EmbeddingIndex, ids: List[str]) -> np.ndarray:
+        return np.stack([index.get(entity_id) for entity_id in ids])
+
+
+@lru_cache()
+def get_top_matches_service() -> TopMatchesService:
+    return TopMatchesService(
+        k=int(os.getenv("TOP_MATCHES_SIZE", "20")),
+        max_staleness=float(os.getenv("TOP_MATCHES_MAX_STALENESS", "5")),
+    )
@@ -0,0 +1 @@
+# Event-driven scoring worker
@@ -0,0 +1,165 @@
+from typing import Any, Dict, List
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Events the AI worker consumes from the backend
+JOB_CREATED = "job.created"
+PROPOSAL_SUBMITTED = "proposal.submitted"
+PROFILE_UPDATED = "profile.updated"
+EVENT_TYPES = [JOB_CREATED, PROPOSAL_SUBMITTED, PROFILE_UPDATED]
+
+
+@dataclass(eq=False)
+class Message:
+    routing_key: str
+    body: Dict[str, Any]
+    redelivered: bool = False
+    raw: Any = field(default=None, repr=False)
+
+
+class Broker(ABC):
+    """Minimal interface the scoring worker needs from a message bus"""
+
+    @abstractmethod
+    async def consume_batch(self, max_messages: int, timeout: float) -> List[Message]:
+        """Wait up to timeout seconds for the first message, then drain up to max_messages"""
+
+    @abstractmethod
+    async def ack(self, message: Message) -> None:
+        ...
+
+    @abstractmethod
+    async def nack(self, message: Message, requeue: bool = True) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, routing_key: str, body: Dict[str, Any]) -> None:
+        ...
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryBroker(Broker):
+    """Single-process stand-in for RabbitMQ with the same ack/redelivery semantics"""
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        self.unacked: List[Message] = []
+        self.published: List[Message] = []
+
+    async def send(self, routing_key: str, body: Dict[str, Any]) -> None:
+        """Enqueue an incoming event, as the backend would"""
+        await self._queue.put(Message(routing_key=routing_key, body=body))
+
+    async def consume_batch(self, max_messages: int, timeout: float) -> List[Message]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < max_messages and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        self.unacked.extend(batch)
+        return batch
+
+    async def ack(self, message: Message) -> None:
+        self.unacked.remove(message)
+
+    async def nack(self, message: Message, requeue: bool = True) -> None:
+        self.unacked.remove(message)
+        if requeue:
+            await self._queue.put(Message(routing_key=message.routing_key, body=message.body, redelivered=True))
+
+    async def publish(self, routing_key: str, body: Dict[str, Any]) -> None:
+        self.published.append(Message(routing_key=routing_key, body=body))
+
+
+class RabbitMQBroker(Broker):
+    """RabbitMQ topic-exchange consumer with manual acks and a bounded prefetch window"""
+
+    def __init__(
+        self,
+        url: str,
+        events_exchange: str = "gigaconnect.events",
+        results_exchange: str = "gigaconnect.ai",
+        queue_name: str = "ai-service.scoring",
+        prefetch: int = 64,
+    ):
+        self.url = url
+        self.events_exchange = events_exchange
+        self.results_exchange = results_exchange
+        self.queue_name = queue_name
+        self.prefetch = prefetch
+        self._buffer: "asyncio.Queue[Message]" = asyncio.Queue()
+        self._connection = None
+        self._results = None
+
+    async def connect(self) -> None:
+        import aio_pika
+
+        self._connection = await aio_pika.connect_robust(self.url)
+        channel = await self._connection.channel()
+        # Unacked deliveries are capped at the prefetch window, which is also the batch size
+        await channel.set_qos(prefetch_count=self.prefetch)
+
+        events = await channel.declare_exchange(self.events_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+        self._results = await channel.declare_exchange(self.results_exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+        queue = await channel.declare_queue(self.queue_name, durable=True)
+        for event_type in EVENT_TYPES:
+            await queue.bind(events, routing_key=event_type)
+        await queue.consume(self._on_message)
+
+    async def _on_message(self, incoming) -> None:
+        try:
+            body = json.loads(incoming.body)
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            # Never valid, so dead-letter it rather than leave it unacked in the prefetch window
+            logger.warning("Rejecting malformed %s message", incoming.routing_key)
+            await incoming.nack(requeue=False)
+            return
+        await self._buffer.put(Message(
+            routing_key=incoming.routing_key,
+            body=body,
+            redelivered=incoming.redelivered,
+            raw=incoming,
+        ))
+
+    async def consume_batch(self, max_messages: int, timeout: float) -> List[Message]:
+        try:
+            first = await asyncio.wait_for(self._buffer.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < max_messages and not self._buffer.empty():
+            batch.append(self._buffer.get_nowait())
+        return batch
+
+    async def ack(self, message: Message) -> None:
+        await message.raw.ack()
+
+    async def nack(self, message: Message, requeue: bool = True) -> None:
+        await message.raw.nack(requeue=requeue)
+
+    async def publish(self, routing_key: str, body: Dict[str, Any]) -> None:
+        import aio_pika
+
+        await self._results.publish(
+            aio_pika.Message(
+                body=json.dumps(body).encode(),
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+
+from .broker import Broker, Message, JOB_CREATED, PROPOSAL_SUBMITTED, PROFILE_UPDATED
+from ..services.fraud_service import FraudDetectionService
+from ..services.skills_service import SkillsService, get_skills_service
+from ..services.embedding_service import get_embedding_service
+from ..services.embedding_index import EmbeddingIndex, get_job_index, get_freelancer_index
+
+
+class ScoringWorker:
+    """Consumes backend events in prefetch-sized batches and publishes fraud, skill and embedding results.
+
+    Each message is acked only after its result is published, so a crash
+    mid-batch redelivers the unfinished events (at-least-once). A message that
+    fails again after redelivery is rejected without requeue.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        fraud_service: Optional[FraudDetectionService] = None,
+        skills_service: Optional[SkillsService] = None,
+        job_index: Optional[EmbeddingIndex] = None,
+        freelancer_index: Optional[EmbeddingIndex] = None,
+        batch_size: int = 64,
+        batch_timeout: float = 0.5,
+    ):
+        self.broker = broker
+        # The account linkage graph belongs to the API process, where labels are applied
+        self.fraud_service = fraud_service or FraudDetectionService(link_accounts=False)
+        self.skills_service = skills_service or get_skills_service()
+        self.embedding_service = get_embedding_service()
+        self.job_index = job_index if job_index is not None else get_job_index()
+        self.freelancer_index = freelancer_index if freelancer_index is not None else get_freelancer_index()
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self._stopped = asyncio.Event()
+
+    async def run(self) -> None:
+        """Process batches until stop() is called"""
+        while not self._stopped.is_set():
+            batch = await self.broker.consume_batch(self.batch_size, self.batch_timeout)
+            if batch:
+                await self.process_batch(batch)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def process_batch(self, messages: List[Message]) -> None:
+        """Score a batch, publish one result per event, then ack it"""
+        results: Dict[int, Dict[str, Any]] = {}
+        failed: Dict[int, Exception] = {}
+
+        for i, message in enumerate(messages):
+            try:
+                results[i] = self._score(message)
+            except Exception as e:
+                failed[i] = e
+
+        # Embed every job and profile in the batch with one encode call
+        to_embed = [i for i in results if messages[i].routing_key in (JOB_CREATED, PROFILE_UPDATED)]
+        try:
+            self._index_embeddings([messages[i] for i in to_embed])
+        except Exception as e:
+            for i in to_embed:
+                failed[i] = e
+                del results[i]
+
+        for i, message in enumerate(messages):
+            if i in failed:
+                # Retry once, then drop so a poison message cannot block the queue
+                await self.broker.nack(message, requeue=not message.redelivered)
+                continue
+            try:
+                await self.broker.publish(f"ai.{message.routing_key}.scored", results[i])
+            except Exception:
+                await self.broker.nack(message, requeue=True)
+                continue
+            await self.broker.ack(message)
+
+    def _score(self, message: Message) -> Dict[str, Any]:
+        body = message.body
+
+        if message.routing_key == JOB_CREATED:
+            risk = self.fraud_service.analyze_job_posting(body)
+            skills = self.skills_service.extract_skills(f"{body.get('title', '')} {body.get('description', '')}")
+            return {
+                "job_id": body["job_id"],
+                "fraud": risk.model_dump(),
+                "skills": skills.model_dump(),
+            }
+
+        if message.routing_key == PROPOSAL_SUBMITTED:
+            risk = self.fraud_service.analyze_proposal(body)
+            return {
+                "proposal_id": body["proposal_id"],
+                "fraud": risk.model_dump(),
+            }
+
+        if message.routing_key == PROFILE_UPDATED:
+            risk = self.fraud_service.analyze_user_risk(body, body.get("activity_data"))
+            skills = self.skills_service.validate_skills(body.get("skills", []))
+            return {
+                "user_id": body["user_id"],
+                "fraud": risk.model_dump(),
+                "skills": skills,
+            }
+
+        raise ValueError(f"Unknown event type: {message.routing_key}")
+
+    def _index_embeddings(self, messages: List[Message]) -> None:
+        if not messages:
+            return
+
+        texts = []
+        for message in messages:
+            body = message.body
+            if message.routing_key == JOB_CREATED:
+                texts.append(f"{body.get('title', '')} {body.get('description', '')} Skills: {', '.join(body.get('skills', []))}")
+            else:
+                texts.append(f"{body.get('bio') or ''} Skills: {', '.join(body.get('skills', []))}")
+        embeddings = self.embedding_service.encode_documents(texts)
+
+        job_rows = [i for i, m in enumerate(messages) if m.routing_key == JOB_CREATED]
+        profile_rows = [i for i, m in enumerate(messages) if m.routing_key == PROFILE_UPDATED]
+        self.job_index.upsert_many([messages[i].body["job_id"] for i in job_rows], embeddings[job_rows])
+        self.freelancer_index.upsert_many([messages[i].body["user_id"] for i in profile_rows], embeddings[profile_rows])
@@ -0,0 +1,109 @@
+"""Run the AI service benchmark suite
+
+From the ai-service directory:
+
+    python -m benchmarks                       # micro + macro, stub model, compare to baseline
+    python -m benchmarks --suite micro --quick
+    python -m benchmarks --suite wire          # JSON vs columnar msgpack serialization
+    python -m benchmarks --save-baseline       # record the current numbers as the new baseline
+    python -m benchmarks --runs 3              # keep each benchmark's fastest of 3 runs, to damp noise
+    python -m benchmarks --real-model          # use EMBEDDING_MODEL instead of the stub
+
+Exits with status 1 when any benchmark's p50 or p95 is slower than the
+baseline by more than --tolerance. No baseline is committed: record one with
+--save-baseline --runs 3 on the machine that runs the comparison. A baseline
+recorded with a different model, machine or CPU count is not compared against,
+only reported. Under --require-baseline a missing or incomparable baseline
+fails the run.
+"""
+import argparse
+import os
+import platform
+import sys
+import time
+
+from benchmarks.harness import (
+    baseline_mismatches, compare_to_baseline, print_results, run_case, save_results
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AI service benchmarks")
+    parser.add_argument("--suite", choices=["micro", "macro", "wire", "all"], default="all")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest input sizes")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--runs", type=int, default=1, help="Run each benchmark this many times and keep its fastest")
+    parser.add_argument("--real-model", action="store_true", help="Load EMBEDDING_MODEL instead of the stub")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--require-baseline", action="store_true",
+        help="Fail when the baseline file is missing or was recorded on a different setup",
+    )
+    parser.add_argument("--output", help="Also write results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        from benchmarks.stub_model import install_stub_model
+        install_stub_model()
+
+    from benchmarks import macro, micro, wire
+
+    cases = []
+    if args.suite in ("micro", "all"):
+        cases += micro.cases(quick=args.quick)
+    if args.suite in ("macro", "all"):
+        cases += macro.cases(quick=args.quick)
+    if args.suite in ("wire", "all"):
+        cases += wire.cases(quick=args.quick)
+    cases = [c for c in cases if args.filter in c.name]
+
+    results = []
+    for case in cases:
+        print(f"running {case.name} ...", file=sys.stderr)
+        results.append(min((run_case(case) for _ in range(max(args.runs, 1))), key=lambda r: r.p50_ms))
+    print_results(results)
+    if any(r.name.startswith("wire.") for r in results):
+        print()
+        print("\n".join(wire.size_report(quick=args.quick)))
+
+    metadata = {
+        "model": os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2") if args.real_model else "stub",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if args.output:
+        save_results(results, args.output, metadata)
+    if args.save_baseline:
+        save_results(results, args.baseline, metadata)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if args.require_baseline else 0
+
+    mismatches = baseline_mismatches(args.baseline, metadata)
+    if mismatches:
+        print(f"\nNot comparing against {args.baseline}, it was recorded on a different setup:")
+        for line in mismatches:
+            print(f"  {line}")
+        return 1 if args.require_baseline else 0
+
+    regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION (more than {args.tolerance:.0%} slower than baseline):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
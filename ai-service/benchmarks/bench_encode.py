@@ -0,0 +1,69 @@
+"""Compare fixed-size batching with length-bucketed batching in EmbeddingService.encode
+
+Run from the ai-service directory:
+
+    python -m benchmarks.bench_encode --size 2000 --repeat 3
+"""
+import argparse
+import time
+from typing import List
+
+from app.services.embedding_service import get_embedding_service
+from benchmarks.data import encode_mix
+
+
+def padded_tokens(batches: List[List[int]], lengths: List[int], max_seq_length: int) -> int:
+    """Tokens actually pushed through the model once every batch is padded to its longest row"""
+    total = 0
+    for batch in batches:
+        longest = min(max(lengths[i] for i in batch) + 2, max_seq_length)
+        total += longest * len(batch)
+    return total
+
+
+def run(size: int, repeat: int, batch_size: int, seed: int) -> None:
+    service = get_embedding_service()
+    # Measure the model path, not embedding cache hits on repeats
+    service.cache_size = 0
+    texts = encode_mix(seed=seed, size=size)
+    lengths = service.count_tokens(texts)
+    max_seq_length = getattr(service.model, "max_seq_length", None) or 256
+    real_tokens = sum(min(n + 2, max_seq_length) for n in lengths)
+
+    fixed_batches = [list(range(i, min(i + batch_size, size))) for i in range(0, size, batch_size)]
+    bucketed_batches = service.plan_batches(lengths)
+
+    def fixed():
+        for batch in fixed_batches:
+            service.model.encode([texts[i] for i in batch], convert_to_numpy=True, batch_size=len(batch))
+
+    def bucketed():
+        service.encode(texts)
+
+    # Warm up the model before timing
+    service.encode(texts[:batch_size])
+
+    print(f"{size} texts, {real_tokens} real tokens (token budget {service.token_budget})")
+    print(f"{'strategy':<10} {'batches':>8} {'padded tokens':>14} {'efficiency':>11} {'best s':>8} {'texts/s':>9}")
+    for name, fn, batches in (("fixed", fixed, fixed_batches), ("bucketed", bucketed, bucketed_batches)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        padded = padded_tokens(batches, lengths, max_seq_length)
+        print(
+            f"{name:<10} {len(batches):>8} {padded:>14} {real_tokens / padded:>10.1%} "
+            f"{best:>8.3f} {size / best:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for the fixed strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.size, args.repeat, args.batch_size, args.seed)
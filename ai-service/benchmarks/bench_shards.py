@@ -0,0 +1,80 @@
+"""Scaling of sharded columnar matching across processes
+
+Run from the ai-service directory:
+
+    python -m benchmarks.bench_shards --candidates 100000 --shards 1,2,4,8,16
+
+Candidates carry precomputed embeddings, so the timing covers skill
+matching, semantic scoring and the top-k merge rather than document
+encoding. Efficiency is speedup divided by shard count. Shard counts
+above os.cpu_count() are still run but cannot scale.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def run(candidates: int, shard_counts, repeat: int, dim: int, limit: int, seed: int) -> None:
+    from app.models.columnar import FreelancerColumns
+    from app.services.matching_service import MatchingService
+    from benchmarks import data
+    from benchmarks.wire import freelancer_columns
+
+    profiles = data.freelancer_profiles(candidates, seed=seed)
+    for profile in profiles:
+        profile["bio"] = None
+    embeddings = np.random.default_rng(seed).standard_normal((candidates, dim)).astype(np.float32)
+    columns = FreelancerColumns.decode(freelancer_columns(profiles, embeddings))
+    job = data.jobs(1, seed=seed)[0]
+
+    print(f"{candidates} candidates, dim {dim}, top {limit}, {os.cpu_count()} CPUs")
+    print(f"{'shards':>6} {'best s':>8} {'cands/s':>11} {'speedup':>8} {'efficiency':>11}")
+
+    baseline = None
+    reference = None
+    for shards in shard_counts:
+        service = MatchingService()
+        service.shards = shards
+        service.shard_min_candidates = 0
+
+        def call():
+            return service.match_freelancer_columns(
+                job["description"], job["skills"], columns, job["budget_min"], job["budget_max"], limit=limit
+            )
+
+        # Also starts the worker processes
+        result = call()
+        if reference is None:
+            reference = result["freelancer_id"]
+        elif result["freelancer_id"] != reference:
+            print(f"  warning: {shards} shards returned a different ranking")
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        speedup = baseline / best
+        print(f"{shards:>6} {best:>8.3f} {candidates / best:>11.0f} {speedup:>7.2f}x {speedup / shards:>10.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--shards", default="1,2,4,8,16", help="Comma-separated shard counts; the first is the baseline")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-model", action="store_true", help="Load EMBEDDING_MODEL instead of the stub")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        from benchmarks.stub_model import install_stub_model
+        install_stub_model()
+
+    run(args.candidates, [int(s) for s in args.shards.split(",")], args.repeat, args.dim, args.limit, args.seed)
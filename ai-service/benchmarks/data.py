@@ -0,0 +1,193 @@
+"""Seeded synthetic data for benchmarks"""
+import random
+from typing import List
+
+SKILLS = [
+    "python", "javascript", "typescript", "java", "golang", "rust", "php", "kotlin",
+    "react", "angular", "vue.js", "next.js", "svelte", "tailwind", "node.js", "express",
+    "django", "flask", "fastapi", "spring boot", "nestjs", "postgresql", "mysql",
+    "mongodb", "redis", "elasticsearch", "aws", "azure", "gcp", "docker", "kubernetes",
+    "terraform", "machine learning", "deep learning", "pytorch", "tensorflow", "nlp",
+    "react native", "flutter", "ios", "android", "figma", "ui design", "ux design",
+    "ci/cd", "github actions", "linux", "solidity", "web3", "graphql", "rest api",
+    "data engineering", "airflow", "spark", "copywriting", "seo", "video editing",
+]
+
+_BIO_SENTENCES = [
+    "I have been building production web applications for over {years} years.",
+    "My focus is on clean architecture, automated testing and clear communication.",
+    "I recently delivered a {skill} platform that serves thousands of daily users.",
+    "Clients appreciate my attention to detail and my ability to hit every milestone.",
+    "Before freelancing I worked at a fintech startup leading a team of {n} engineers.",
+    "I am comfortable owning a project end to end, from requirements to deployment.",
+    "Most of my recent work combines {skill} with {other} on cloud infrastructure.",
+    "I write documentation as I go so handover is painless for your team.",
+]
+
+_JOB_SENTENCES = [
+    "We are looking for an experienced {skill} developer to join our product team.",
+    "The project involves migrating a legacy system to {other} within {weeks} weeks.",
+    "You will work closely with our designers and report progress weekly.",
+    "Strong knowledge of {skill} and {other} is required.",
+    "Experience with automated testing and CI pipelines is a plus.",
+    "Please include links to similar work in your proposal.",
+    "Budget is flexible for the right candidate with a proven track record.",
+]
+
+
+def _fill(rng: random.Random, template: str) -> str:
+    return template.format(
+        years=rng.randint(1, 15),
+        n=rng.randint(2, 12),
+        weeks=rng.randint(2, 20),
+        skill=rng.choice(SKILLS),
+        other=rng.choice(SKILLS),
+    )
+
+
+def skill_list(rng: random.Random, low: int = 2, high: int = 8) -> List[str]:
+    return rng.sample(SKILLS, rng.randint(low, high))
+
+
+def bio(rng: random.Random, min_sentences: int = 1, max_sentences: int = 12) -> str:
+    count = rng.randint(min_sentences, max_sentences)
+    return " ".join(_fill(rng, rng.choice(_BIO_SENTENCES)) for _ in range(count))
+
+
+def job_description(rng: random.Random, min_sentences: int = 2, max_sentences: int = 10) -> str:
+    count = rng.randint(min_sentences, max_sentences)
+    return " ".join(_fill(rng, rng.choice(_JOB_SENTENCES)) for _ in range(count))
+
+
+def encode_mix(seed: int = 0, size: int = 1000) -> List[str]:
+    """Realistic encode input: mostly short skill names, with bios and job descriptions mixed in"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(size):
+        kind = rng.random()
+        if kind < 0.6:
+            texts.append(rng.choice(SKILLS))
+        elif kind < 0.85:
+            texts.append(bio(rng))
+        else:
+            texts.append(job_description(rng))
+    return texts
+
+
+_NAMES = ["Ana", "Bilal", "Chen", "Dara", "Elif", "Femi", "Goran", "Hana", "Ivan", "Jaya", "Kofi", "Lena"]
+
+_PROPOSAL_SENTENCES = [
+    "I have {years} years of experience with {skill} and {other}.",
+    "I can deliver the first milestone within {weeks} weeks.",
+    "Quality and clear communication are my priorities on every project.",
+    "I recently shipped a similar {skill} project for a client in retail.",
+    "Could you share more details about the expected timeline?",
+    "I am interested in this job, hire me.",
+    "My process starts with a short discovery call to confirm requirements.",
+]
+
+_RISKY_PHRASES = ["wire transfer", "western union", "bitcoin only", "payment outside platform", "easy money"]
+
+
+def freelancer_profiles(count: int, seed: int = 0) -> List[dict]:
+    """FreelancerProfile payloads with varied skills, rates and bio lengths"""
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": f"freelancer-{seed}-{i}",
+            "name": f"{rng.choice(_NAMES)} {i}",
+            "skills": skill_list(rng),
+            "hourly_rate": round(rng.uniform(10, 200), 2) if rng.random() > 0.1 else None,
+            "experience_years": rng.randint(0, 20) if rng.random() > 0.1 else None,
+            "bio": bio(rng, 0, 10) or None,
+            "completed_jobs": rng.randint(0, 300),
+            "avg_rating": round(rng.uniform(3.0, 5.0), 2),
+        }
+        for i in range(count)
+    ]
+
+
+def jobs(count: int, seed: int = 0) -> List[dict]:
+    """Job payloads in the shape match_jobs_to_freelancer and the fraud checks expect"""
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        budget_min = round(rng.uniform(15, 80), 2)
+        result.append({
+            "job_id": f"job-{seed}-{i}",
+            "title": f"{rng.choice(SKILLS).title()} developer needed",
+            "description": job_description(rng),
+            "skills": skill_list(rng, 1, 6),
+            "budget_min": budget_min,
+            "budget_max": round(budget_min * rng.uniform(1.2, 3.0), 2),
+        })
+    return result
+
+
+def proposals(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "proposal_id": f"proposal-{seed}-{i}",
+            "proposal_text": " ".join(
+                _fill(rng, rng.choice(_PROPOSAL_SENTENCES)) for _ in range(rng.randint(1, 25))
+            ),
+        }
+        for i in range(count)
+    ]
+
+
+def fraud_user_payloads(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        text = bio(rng, 0, 4)
+        if rng.random() < 0.2:
+            text += f" I only accept {rng.choice(_RISKY_PHRASES)}."
+        result.append({
+            "user_data": {
+                "account_age_days": rng.randint(0, 1000),
+                "profile_completion": rng.randint(0, 100),
+                "email_verified": rng.random() > 0.2,
+                "phone_verified": rng.random() > 0.4,
+                "bio": text,
+            },
+            "activity_data": {
+                "failed_payments": rng.randint(0, 6),
+                "jobs_last_24h": rng.randint(0, 15),
+                "disputes": rng.randint(0, 4),
+            },
+        })
+    return result
+
+
+def fraud_job_payloads(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    result = []
+    for job in jobs(count, seed):
+        if rng.random() < 0.2:
+            job["description"] += f" {rng.choice(_RISKY_PHRASES)}, act now."
+        result.append({"job_data": job})
+    return result
+
+
+def fraud_proposal_payloads(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "proposal_data": {
+                "cover_letter": p["proposal_text"],
+                "bid_amount": round(rng.uniform(5, 5000), 2),
+                "job_budget": round(rng.uniform(100, 3000), 2),
+            }
+        }
+        for p in proposals(count, seed)
+    ]
+
+
+def skills_with_unknowns(count: int, unknown: int, seed: int = 0) -> List[str]:
+    """Skill list where `unknown` entries are misspelt or unlisted and need the semantic fallback"""
+    rng = random.Random(seed)
+    known = [rng.choice(SKILLS) for _ in range(count - unknown)]
+    misspelt = [rng.choice(SKILLS).replace("a", "e", 1) + f" {i}" for i in range(unknown)]
+    return known + misspelt
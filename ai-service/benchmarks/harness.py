@@ -0,0 +1,137 @@
+"""Timing, percentile and baseline-comparison helpers shared by the benchmark suites"""
+import gc
+import json
+import resource
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+    # Work items handled per call (candidates, proposals, ...) for throughput
+    items: int = 1
+    iterations: int = 20
+    warmup: int = 2
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    items: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    calls_per_s: float
+    items_per_s: float
+    peak_rss_mb: float
+    # Share of matching candidates skipped before full scoring (prefilter or bound pruning)
+    pruned_pct: float = 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _candidate_counts() -> Tuple[float, float]:
+    from app.metrics import CANDIDATES_PRUNED, CANDIDATES_SCORED
+    return CANDIDATES_SCORED.total(), CANDIDATES_PRUNED.total()
+
+
+def run_case(case: Case) -> Result:
+    for _ in range(case.warmup):
+        case.fn()
+
+    gc.collect()
+    scored_before, pruned_before = _candidate_counts()
+    timings = np.empty(case.iterations)
+    for i in range(case.iterations):
+        start = time.perf_counter()
+        case.fn()
+        timings[i] = time.perf_counter() - start
+
+    scored_after, pruned_after = _candidate_counts()
+    scored, pruned = scored_after - scored_before, pruned_after - pruned_before
+
+    ms = timings * 1000
+    total = float(timings.sum())
+    return Result(
+        name=case.name,
+        iterations=case.iterations,
+        items=case.items,
+        mean_ms=float(ms.mean()),
+        p50_ms=float(np.percentile(ms, 50)),
+        p95_ms=float(np.percentile(ms, 95)),
+        p99_ms=float(np.percentile(ms, 99)),
+        calls_per_s=case.iterations / total if total else 0.0,
+        items_per_s=case.iterations * case.items / total if total else 0.0,
+        peak_rss_mb=peak_rss_mb(),
+        pruned_pct=100 * pruned / (scored + pruned) if pruned else 0.0,
+    )
+
+
+def print_results(results: List[Result]) -> None:
+    header = (
+        f"{'benchmark':<48} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>9} {'items/s':>11} "
+        f"{'rss MB':>8} {'pruned':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.name:<48} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} "
+            f"{r.calls_per_s:>9.1f} {r.items_per_s:>11.1f} {r.peak_rss_mb:>8.1f} "
+            f"{(f'{r.pruned_pct:.0f}%' if r.pruned_pct else '-'):>7}"
+        )
+
+
+def save_results(results: List[Result], path: str, metadata: Optional[Dict[str, object]] = None) -> None:
+    payload = {
+        "metadata": metadata or {},
+        "results": {r.name: r.__dict__ for r in results},
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+# Metadata that must match for timings to be comparable
+COMPARABLE_METADATA = ("model", "machine", "cpus")
+
+
+def baseline_mismatches(baseline_path: str, metadata: Dict[str, object]) -> List[str]:
+    """Return a line per comparability field whose baseline value differs from this run's"""
+    with open(baseline_path) as f:
+        recorded = json.load(f).get("metadata", {})
+    return [
+        f"{key}: {recorded.get(key)} (baseline) vs {metadata.get(key)} (this run)"
+        for key in COMPARABLE_METADATA if recorded.get(key) != metadata.get(key)
+    ]
+
+
+def compare_to_baseline(results: List[Result], baseline_path: str, tolerance: float) -> List[str]:
+    """Return a line per benchmark whose p50 or p95 got slower than the baseline by more than tolerance"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = base[metric], getattr(r, metric)
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append(
+                    f"{r.name}: {metric} {before:.2f} -> {after:.2f} ms (+{(after / before - 1):.0%})"
+                )
+    return regressions
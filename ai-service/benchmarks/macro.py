@@ -0,0 +1,134 @@
+"""Macro-benchmarks: full HTTP round trips through the FastAPI app, in process"""
+import json
+import random
+from typing import List
+
+from benchmarks import data
+from benchmarks.harness import Case
+
+
+def cases(quick: bool = False) -> List[Case]:
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.models.columnar import MSGPACK_MEDIA_TYPE, pack
+    from app.services.embedding_service import get_embedding_service
+    from benchmarks.wire import freelancer_columns
+
+    client = TestClient(app)
+    # Payloads repeat every iteration; measure encoding, not embedding cache hits
+    get_embedding_service().cache_size = 0
+    job = data.jobs(1, seed=99)[0]
+
+    def post(path: str, payload: dict):
+        def call():
+            response = client.post(path, json=payload)
+            response.raise_for_status()
+            return response
+        return call
+
+    result: List[Case] = []
+    for n in (100, 1000) if quick else (100, 1000, 5000):
+        payload = {
+            "job_description": job["description"],
+            "required_skills": job["skills"],
+            "freelancers": data.freelancer_profiles(n, seed=n),
+            "budget_min": job["budget_min"],
+            "budget_max": job["budget_max"],
+        }
+        result.append(Case(
+            f"http.matching.freelancers[n={n}]",
+            post("/api/matching/freelancers", payload),
+            items=n,
+            iterations=10 if n <= 100 else 3,
+            warmup=1,
+        ))
+
+    # Same 1000 candidates as NDJSON, parsed and scored incrementally
+    stream_header = {
+        "job_description": job["description"],
+        "required_skills": job["skills"],
+        "budget_min": job["budget_min"],
+        "budget_max": job["budget_max"],
+    }
+    ndjson = "\n".join([json.dumps(stream_header)] + [json.dumps(f) for f in data.freelancer_profiles(1000, seed=1000)])
+
+    def post_stream():
+        response = client.post(
+            "/api/matching/freelancers/stream", content=ndjson, headers={"content-type": "application/x-ndjson"}
+        )
+        response.raise_for_status()
+        return response
+
+    result.append(Case("http.matching.freelancers_stream[n=1000]", post_stream, items=1000, iterations=3, warmup=1))
+
+    # Same 1000 candidates in the columnar msgpack format, msgpack response
+    columnar_body = pack({**stream_header, "freelancers": freelancer_columns(data.freelancer_profiles(1000, seed=1000))})
+
+    def post_columnar():
+        response = client.post(
+            "/api/matching/freelancers",
+            content=columnar_body,
+            headers={"content-type": MSGPACK_MEDIA_TYPE, "accept": MSGPACK_MEDIA_TYPE},
+        )
+        response.raise_for_status()
+        return response
+
+    result.append(Case("http.matching.freelancers_msgpack[n=1000]", post_columnar, items=1000, iterations=3, warmup=1))
+
+    result.append(Case(
+        "http.matching.jobs[n=500]",
+        post("/api/matching/jobs", {
+            "freelancer_skills": data.SKILLS[:5],
+            "freelancer_bio": "Full-stack developer with a focus on Python and React.",
+            "jobs": data.jobs(500, seed=5),
+            "preferred_rate": 55,
+        }),
+        items=500,
+        iterations=5,
+    ))
+    result.append(Case(
+        "http.recommendations.proposal_batch[n=300]",
+        post("/api/recommendations/proposal-quality/batch", {
+            "job_description": job["description"],
+            "required_skills": job["skills"],
+            "proposals": data.proposals(300, seed=8),
+        }),
+        items=300,
+        iterations=5,
+    ))
+    # Identical payloads, so after warm-up this measures the response cache hit path
+    result.append(Case(
+        "http.recommendations.price[cached]",
+        post("/api/recommendations/price", {
+            "job_description": job["description"],
+            "required_skills": job["skills"],
+            "experience_level": "expert",
+        }),
+        iterations=200,
+    ))
+    result.append(Case(
+        "http.skills.validate[unknown=10]",
+        post("/api/skills/validate", {"skills": data.skills_with_unknowns(20, 10)}),
+        iterations=50,
+    ))
+    result.append(Case(
+        "http.skills.extract",
+        post("/api/skills/extract", {"text": data.job_description(random.Random(1), 8, 8)}),
+        iterations=100,
+    ))
+    result.append(Case(
+        "http.fraud.user",
+        post("/api/fraud/user", data.fraud_user_payloads(1, seed=4)[0]),
+        iterations=200,
+    ))
+    result.append(Case(
+        "http.fraud.job",
+        post("/api/fraud/job", data.fraud_job_payloads(1, seed=5)[0]),
+        iterations=200,
+    ))
+    result.append(Case(
+        "http.fraud.proposal",
+        post("/api/fraud/proposal", data.fraud_proposal_payloads(1, seed=6)[0]),
+        iterations=200,
+    ))
+    return result
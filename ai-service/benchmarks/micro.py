@@ -0,0 +1,141 @@
+"""Micro-benchmarks: service methods called directly"""
+import random
+from typing import List
+
+from benchmarks import data
+from benchmarks.harness import Case
+
+
+def cases(quick: bool = False) -> List[Case]:
+    from app.models.schemas import FreelancerProfile
+    from app.services.matching_service import MatchingService
+    from app.services.skills_service import SkillsService
+    from app.services.recommendation_service import RecommendationService
+    from app.services.fraud_service import FraudDetectionService
+    from app.services.embedding_service import get_embedding_service
+
+    matching = MatchingService()
+    skills = SkillsService()
+    recommendations = RecommendationService()
+    fraud = FraudDetectionService()
+    embeddings = get_embedding_service()
+    # Inputs repeat every iteration; measure encoding, not embedding cache hits
+    embeddings.cache_size = 0
+
+    rng = random.Random(42)
+    job = data.jobs(1, seed=42)[0]
+    freelancer_bio = data.bio(rng)
+    freelancer_skills = data.skill_list(rng)
+    result: List[Case] = []
+
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        profiles = [FreelancerProfile(**p) for p in data.freelancer_profiles(n, seed=n)]
+        result.append(Case(
+            f"matching.freelancers_to_job[n={n}]",
+            lambda profiles=profiles: matching.match_freelancers_to_job(
+                job_description=job["description"],
+                required_skills=job["skills"],
+                freelancers=profiles,
+                budget_min=job["budget_min"],
+                budget_max=job["budget_max"],
+            ),
+            items=n,
+            iterations=20 if n <= 100 else 5 if n <= 1000 else 3,
+            warmup=1,
+        ))
+
+    # Same candidates, only the skill-overlap shortlist (BM25 tie-break) of 200 fully scored
+    shortlisted = MatchingService()
+    shortlisted.shortlist_size = 200
+    for n in (1000,) if quick else (1000, 10000):
+        profiles = [FreelancerProfile(**p) for p in data.freelancer_profiles(n, seed=n)]
+        result.append(Case(
+            f"matching.freelancers_to_job[n={n},shortlist=200]",
+            lambda profiles=profiles: shortlisted.match_freelancers_to_job(
+                job_description=job["description"],
+                required_skills=job["skills"],
+                freelancers=profiles,
+                budget_min=job["budget_min"],
+                budget_max=job["budget_max"],
+            ),
+            items=n,
+            iterations=5 if n <= 1000 else 3,
+            warmup=1,
+        ))
+
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        job_dicts = data.jobs(n, seed=n)
+        result.append(Case(
+            f"matching.jobs_to_freelancer[n={n}]",
+            lambda job_dicts=job_dicts: matching.match_jobs_to_freelancer(
+                freelancer_skills=freelancer_skills,
+                freelancer_bio=freelancer_bio,
+                jobs=job_dicts,
+                preferred_rate=60,
+            ),
+            items=n,
+            iterations=20 if n <= 100 else 5 if n <= 1000 else 3,
+            warmup=1,
+        ))
+
+    for unknown in (0, 10, 100):
+        skill_names = data.skills_with_unknowns(max(unknown, 20), unknown, seed=unknown)
+        result.append(Case(
+            f"skills.validate[unknown={unknown}]",
+            lambda skill_names=skill_names: skills.validate_skills(skill_names),
+            items=len(skill_names),
+        ))
+
+    texts = [data.job_description(rng) for _ in range(50)]
+    result.append(Case("skills.extract", lambda: [skills.extract_skills(t) for t in texts], items=len(texts)))
+    result.append(Case("skills.related", lambda: skills.get_related_skills(freelancer_skills, limit=10)))
+
+    proposal_set = data.proposals(300, seed=7)
+    result.append(Case(
+        "recommendations.proposal_batch[n=300]",
+        lambda: recommendations.analyze_proposals_batch(proposal_set, job["description"], job["skills"]),
+        items=len(proposal_set),
+        iterations=5,
+    ))
+    result.append(Case(
+        "recommendations.proposal_single",
+        lambda: recommendations.analyze_proposal_quality(
+            proposal_set[0]["proposal_text"], job["description"], job["skills"]
+        ),
+    ))
+    result.append(Case(
+        "recommendations.price",
+        lambda: recommendations.recommend_price(job["description"], job["skills"], "intermediate"),
+        iterations=200,
+    ))
+
+    users = data.fraud_user_payloads(500, seed=1)
+    fraud_jobs = data.fraud_job_payloads(500, seed=2)
+    fraud_proposals = data.fraud_proposal_payloads(500, seed=3)
+    result.append(Case(
+        "fraud.user[n=500]",
+        lambda: [fraud.analyze_user_risk(u["user_data"], u["activity_data"]) for u in users],
+        items=len(users),
+    ))
+    result.append(Case(
+        "fraud.job[n=500]",
+        lambda: [fraud.analyze_job_posting(j["job_data"]) for j in fraud_jobs],
+        items=len(fraud_jobs),
+    ))
+    result.append(Case(
+        "fraud.proposal[n=500]",
+        lambda: [fraud.analyze_proposal(p["proposal_data"]) for p in fraud_proposals],
+        items=len(fraud_proposals),
+    ))
+
+    mix = data.encode_mix(seed=3, size=1000)
+    result.append(Case("embedding.encode_mix[n=1000]", lambda: embeddings._encode_texts(mix), items=len(mix), iterations=5))
+    documents = [data.bio(rng, 10, 60) for _ in range(100)]
+    result.append(Case(
+        "embedding.encode_documents[n=100]",
+        lambda: embeddings._encode_documents(documents),
+        items=len(documents),
+        iterations=5,
+    ))
+
+    return result
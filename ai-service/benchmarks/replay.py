@@ -0,0 +1,329 @@
+"""Replay captured traffic against the AI service for capacity planning
+
+Capture first: run the service with CAPTURE_PATH set (see app/capture.py).
+Then, from the ai-service directory:
+
+    python -m benchmarks.replay captures/*.jsonl.gz                   # in process, recorded rate
+    python -m benchmarks.replay captures/*.jsonl.gz --rate 0.5,1,2,4  # rate sweep, finds saturation
+    python -m benchmarks.replay captures/*.jsonl.gz --url http://127.0.0.1:8000 --concurrency 64
+
+Rate 1 is the full production rate. The capture holds a sample of the
+traffic, so its timeline is compressed by the capture's sample rate and
+then divided by the rate multiple. Requests are sent open loop at their
+scheduled times, whether or not earlier ones have finished. At most
+--concurrency requests are in flight, like a client connection pool; the
+rest wait in a queue. For each run the report gives:
+
+- offered and sustained request rates
+- per-route latency percentiles, timed from send to response
+- queueing delay, from the scheduled time to the send
+- the peak number of requests in flight
+
+A run counts as saturated when its p99 queueing delay exceeds
+--max-queue-ms, or when it sustains less than --min-efficiency of the
+offered rate. A service that keeps up is allowed one median latency to
+drain after the last request.
+The saturation point is the first saturated rate in the sweep.
+
+In process, the app shares one event loop with the load generator, like a
+single uvicorn worker. To measure the worker settings of a real
+deployment, run the service and pass --url.
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import gzip
+import json
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+REPLAY_HEADERS = {"x-replay": "1"}
+
+
+@dataclass
+class Request:
+    # Seconds after the first captured request, on the capture's own (sampled) timeline
+    offset: float
+    method: str
+    path: str
+    route: str
+    query: str
+    headers: Dict[str, str]
+    content: bytes
+
+
+@dataclass
+class Outcome:
+    route: str
+    due: float
+    sent: float
+    done: float
+    status: Optional[int]
+
+
+@dataclass
+class RouteStats:
+    route: str
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queue_p99_ms: float
+
+
+@dataclass
+class RunReport:
+    rate: float
+    requests: int
+    errors: int
+    offered_rps: float
+    sustained_rps: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    queue_p50_ms: float
+    queue_p99_ms: float
+    peak_in_flight: int
+    saturated: bool
+    routes: List[RouteStats] = field(default_factory=list)
+
+
+def load_capture(paths: List[str]) -> Tuple[List[Request], float]:
+    """Requests from capture files, merged on wall-clock arrival time, and the sample rate they were taken at"""
+    timed: List[Tuple[float, Request]] = []
+    sample_rates = set()
+    for path in paths:
+        started_at = None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    record = json.loads(line)
+                    if "format_version" in record:
+                        started_at = record["started_at"]
+                        sample_rates.add(record["sample_rate"])
+                        continue
+                    timed.append((started_at + record["t"], _request(record)))
+            except (EOFError, json.JSONDecodeError):
+                # A capture that is still being written ends mid-stream
+                pass
+    if len(sample_rates) > 1:
+        raise ValueError(f"Captures were taken at different sample rates: {sorted(sample_rates)}")
+    timed.sort(key=lambda item: item[0])
+    first = timed[0][0] if timed else 0.0
+    requests = []
+    for arrived, request in timed:
+        request.offset = arrived - first
+        requests.append(request)
+    return requests, sample_rates.pop() if sample_rates else 1.0
+
+
+def _request(record: Dict[str, Any]) -> Request:
+    encoding, body = record["encoding"], record["body"]
+    if encoding == "msgpack":
+        content = base64.b64decode(body)
+    elif encoding == "ndjson":
+        content = "\n".join(json.dumps(line) for line in body).encode()
+    else:
+        content = b"" if body is None else json.dumps(body).encode()
+    return Request(
+        0.0, record["method"], record["path"], record["route"], record["query"], record["headers"], content
+    )
+
+
+async def run(requests: List[Request], send, time_scale: float, concurrency: int) -> List[Outcome]:
+    """Send each request at offset * time_scale seconds from now, at most `concurrency` at a time"""
+    slots = asyncio.Semaphore(concurrency)
+    outcomes: List[Outcome] = []
+    start = time.perf_counter()
+
+    async def one(request: Request, due: float) -> None:
+        async with slots:
+            sent = time.perf_counter()
+            try:
+                status = await send(request)
+            except Exception:
+                status = None
+            outcomes.append(Outcome(request.route, due, sent, time.perf_counter(), status))
+
+    tasks = []
+    for request in requests:
+        due = start + request.offset * time_scale
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(request, due)))
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+def report(rate: float, outcomes: List[Outcome], max_queue_ms: float, min_efficiency: float) -> RunReport:
+    latency = np.array([o.done - o.sent for o in outcomes]) * 1000
+    queue = np.array([o.sent - o.due for o in outcomes]) * 1000
+    errors = sum(1 for o in outcomes if o.status is None or o.status >= 500)
+    first_due = min(o.due for o in outcomes)
+    offered_span = max(o.due for o in outcomes) - first_due
+    completed_span = max(o.done for o in outcomes) - first_due
+    offered = len(outcomes) / offered_span if offered_span > 0 else float("inf")
+    sustained = len(outcomes) / completed_span if completed_span > 0 else 0.0
+    # A service that keeps up finishes about one median latency after the last request is due
+    keeping_up = len(outcomes) / (offered_span + float(np.percentile(latency, 50)) / 1000)
+
+    # Peak concurrency from the send/done event sweep
+    events = sorted([(o.sent, 1) for o in outcomes] + [(o.done, -1) for o in outcomes])
+    in_flight = peak = 0
+    for _, delta in events:
+        in_flight += delta
+        peak = max(peak, in_flight)
+
+    by_route: Dict[str, List[int]] = defaultdict(list)
+    for i, o in enumerate(outcomes):
+        by_route[o.route].append(i)
+    routes = [
+        RouteStats(
+            route=route,
+            requests=len(rows),
+            errors=sum(1 for i in rows if outcomes[i].status is None or outcomes[i].status >= 500),
+            p50_ms=float(np.percentile(latency[rows], 50)),
+            p95_ms=float(np.percentile(latency[rows], 95)),
+            p99_ms=float(np.percentile(latency[rows], 99)),
+            queue_p99_ms=float(np.percentile(queue[rows], 99)),
+        )
+        for route, rows in sorted(by_route.items(), key=lambda kv: -len(kv[1]))
+    ]
+    queue_p99 = float(np.percentile(queue, 99))
+    return RunReport(
+        rate=rate,
+        requests=len(outcomes),
+        errors=errors,
+        offered_rps=offered,
+        sustained_rps=sustained,
+        latency_p50_ms=float(np.percentile(latency, 50)),
+        latency_p99_ms=float(np.percentile(latency, 99)),
+        queue_p50_ms=float(np.percentile(queue, 50)),
+        queue_p99_ms=queue_p99,
+        peak_in_flight=peak,
+        saturated=sustained < keeping_up * min_efficiency or queue_p99 > max_queue_ms,
+        routes=routes,
+    )
+
+
+def print_report(reports: List[RunReport]) -> None:
+    for r in reports:
+        print(
+            f"\nrate x{r.rate:g}: {r.requests} requests, {r.errors} errors, offered {r.offered_rps:.1f}/s, "
+            f"sustained {r.sustained_rps:.1f}/s, peak in flight {r.peak_in_flight}"
+            f"{'  SATURATED' if r.saturated else ''}"
+        )
+        header = f"  {'route':<48} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queue p99':>10}"
+        print(header)
+        print("  " + "-" * (len(header) - 2))
+        for s in r.routes:
+            print(
+                f"  {s.route:<48} {s.requests:>7} {s.errors:>7} {s.p50_ms:>9.2f} {s.p95_ms:>9.2f} "
+                f"{s.p99_ms:>9.2f} {s.queue_p99_ms:>10.2f}"
+            )
+
+    print(f"\n{'rate':>6} {'offered/s':>10} {'sustained/s':>12} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'queue p50':>10} {'queue p99':>10} {'in flight':>10}")
+    for r in reports:
+        print(
+            f"{'x' + format(r.rate, 'g'):>6} {r.offered_rps:>10.1f} {r.sustained_rps:>12.1f} {r.latency_p50_ms:>9.2f} "
+            f"{r.latency_p99_ms:>9.2f} {r.queue_p50_ms:>10.2f} {r.queue_p99_ms:>10.2f} {r.peak_in_flight:>10}"
+            f"{'  saturated' if r.saturated else ''}"
+        )
+    healthy = [r for r in reports if not r.saturated]
+    saturated = next((r for r in reports if r.saturated), None)
+    if healthy:
+        best = max(healthy, key=lambda r: r.sustained_rps)
+        print(f"\nSustained throughput: {best.sustained_rps:.1f} req/s (rate x{best.rate:g})")
+    if saturated is not None:
+        print(f"Saturation point: rate x{saturated.rate:g} ({saturated.offered_rps:.1f} req/s offered)")
+    else:
+        print("Not saturated at any tested rate")
+
+
+async def replay(args, requests: List[Request], sample_rate: float) -> List[RunReport]:
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        app = None
+    else:
+        from main import app
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay",
+                                   timeout=args.timeout)
+
+    async def send(request: Request) -> int:
+        response = await client.request(
+            request.method,
+            request.path,
+            params=request.query or None,
+            content=request.content or None,
+            headers={**request.headers, **REPLAY_HEADERS},
+        )
+        return response.status_code
+
+    reports = []
+    try:
+        if args.warmup:
+            await run(requests[:args.warmup], send, 0.0, args.concurrency)
+        for rate in args.rate:
+            time_scale = sample_rate / rate
+            span = requests[-1].offset * time_scale
+            print(f"replaying {len(requests)} requests at rate x{rate:g} over {span:.1f}s ...", file=sys.stderr)
+            outcomes = await run(requests, send, time_scale, args.concurrency)
+            reports.append(report(rate, outcomes, args.max_queue_ms, args.min_efficiency))
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+    return reports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay captured AI service traffic")
+    parser.add_argument("captures", nargs="+", help="Capture files (globs are expanded)")
+    parser.add_argument("--rate", default="1", help="Comma-separated multiples of the captured production rate")
+    parser.add_argument("--url", help="Replay against a running service instead of the app in process")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    parser.add_argument("--limit", type=int, default=0, help="Only replay the first N requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests sent back to back before the timed runs")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-queue-ms", type=float, default=100.0, help="p99 queueing delay that counts as saturated")
+    parser.add_argument("--min-efficiency", type=float, default=0.95,
+                        help="Sustained/offered rate below which a run counts as saturated")
+    parser.add_argument("--stub-model", action="store_true", help="In process, use the stub model instead of EMBEDDING_MODEL")
+    parser.add_argument("--output", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+    args.rate = sorted(float(r) for r in args.rate.split(","))
+
+    paths = sorted({p for pattern in args.captures for p in (glob.glob(pattern) or [pattern])})
+    requests, sample_rate = load_capture(paths)
+    if args.limit:
+        requests = requests[:args.limit]
+    if not requests:
+        print("No captured requests", file=sys.stderr)
+        return 1
+
+    if args.stub_model and not args.url:
+        from benchmarks.stub_model import install_stub_model
+        install_stub_model()
+
+    reports = asyncio.run(replay(args, requests, sample_rate))
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sample_rate": sample_rate, "reports": [asdict(r) for r in reports]}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
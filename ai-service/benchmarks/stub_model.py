@@ -0,0 +1,46 @@
+"""Deterministic stand-in for SentenceTransformer so benchmarks measure service code, not the model"""
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+class StubEmbeddingModel:
+    """Hashes words into a fixed-size bag-of-words vector.
+
+    Related texts share words and therefore score higher, which keeps
+    thresholds such as the 0.7 semantic skill match meaningful.
+    """
+
+    def __init__(self, dim: int = 384, max_seq_length: int = 256):
+        self.dim = dim
+        self.max_seq_length = max_seq_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32, **kwargs) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())[:self.max_seq_length]
+            for word in words:
+                h = zlib.crc32(word.encode())
+                out[row, h % self.dim] += 1.0
+                out[row, (h >> 12) % self.dim] += 0.5
+            # Shared component so unrelated texts are not exactly orthogonal
+            out[row, 0] += 0.25
+        return out
+
+
+def install_stub_model(dim: int = 384) -> None:
+    """Make the EmbeddingService singleton use the stub; call before importing services or the app"""
+    from app.services.embedding_service import EmbeddingService
+
+    if EmbeddingService._instance is not None and EmbeddingService._instance._initialized:
+        if isinstance(EmbeddingService._instance.model, StubEmbeddingModel):
+            return
+        raise RuntimeError("EmbeddingService was already initialized with a real model")
+    EmbeddingService(model=StubEmbeddingModel(dim=dim))
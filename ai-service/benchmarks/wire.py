@@ -0,0 +1,147 @@
+"""Wire-format benchmarks: JSON with per-row Pydantic models vs columnar msgpack.
+
+Covers only serialization, not scoring: decoding a matching request into
+what the service consumes, and encoding a result set for the response.
+"""
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks import data
+from benchmarks.harness import Case
+
+_NUMERIC = ("hourly_rate", "experience_years", "completed_jobs", "avg_rating")
+
+
+def freelancer_columns(profiles: List[dict], embeddings: np.ndarray = None) -> Dict[str, Any]:
+    """Columnar form of FreelancerProfile payloads, numeric fields as typed arrays"""
+    from app.models.columnar import typed_array
+
+    columns: Dict[str, Any] = {
+        name: [p[name] for p in profiles] for name in ("user_id", "name", "skills", "bio")
+    }
+    for name in _NUMERIC:
+        dtype = np.int64 if name == "completed_jobs" else np.float64
+        values = [np.nan if p[name] is None else p[name] for p in profiles]
+        columns[name] = typed_array(np.array(values, dtype=dtype))
+    if embeddings is not None:
+        columns["embedding"] = typed_array(embeddings.astype(np.float32))
+    return columns
+
+
+def _request(n: int) -> Dict[str, Any]:
+    job = data.jobs(1, seed=n)[0]
+    return {
+        "job_description": job["description"],
+        "required_skills": job["skills"],
+        "freelancers": data.freelancer_profiles(n, seed=n),
+        "budget_min": job["budget_min"],
+        "budget_max": job["budget_max"],
+    }
+
+
+def _results(n: int) -> List[dict]:
+    rng = np.random.default_rng(n)
+    return [
+        {
+            "freelancer_id": f"freelancer-{i}",
+            "name": f"Name {i}",
+            "match_score": round(float(rng.uniform(0, 100)), 2),
+            "skill_match": round(float(rng.uniform(0, 100)), 2),
+            "experience_match": round(float(rng.uniform(0, 100)), 2),
+            "rate_match": round(float(rng.uniform(0, 100)), 2),
+            "skills": data.SKILLS[i % 7: i % 7 + 4],
+        }
+        for i in range(n)
+    ]
+
+
+def _payloads(n: int, dim: int = 384):
+    from app.models.columnar import pack
+
+    request = _request(n)
+    json_body = json.dumps(request).encode()
+    columnar_request = {**request, "freelancers": freelancer_columns(request["freelancers"])}
+    msgpack_body = pack(columnar_request)
+
+    embeddings = np.random.default_rng(n).standard_normal((n, dim)).astype(np.float32)
+    with_embeddings = {**request, "freelancers": freelancer_columns(request["freelancers"], embeddings)}
+    json_embeddings = dict(request, freelancers=[
+        {**p, "embedding": e.tolist()} for p, e in zip(request["freelancers"], embeddings)
+    ])
+    return request, json_body, msgpack_body, json.dumps(json_embeddings).encode(), pack(with_embeddings)
+
+
+def size_report(quick: bool = False) -> List[str]:
+    lines = [f"{'payload':<40} {'json bytes':>12} {'msgpack bytes':>14} {'saved':>7}"]
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        _, json_body, msgpack_body, json_emb, msgpack_emb = _payloads(n)
+        for label, a, b in (
+            (f"freelancers[n={n}]", json_body, msgpack_body),
+            (f"freelancers+embeddings[n={n}]", json_emb, msgpack_emb),
+        ):
+            lines.append(f"{label:<40} {len(a):>12} {len(b):>14} {1 - len(b) / len(a):>7.0%}")
+    return lines
+
+
+def cases(quick: bool = False) -> List[Case]:
+    from app.models.columnar import FreelancerColumns, columns_to_rows, pack, unpack
+    from app.models.schemas import FreelancerMatch
+    from app.routers.matching import MatchFreelancersRequest
+
+    result: List[Case] = []
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        iterations = 20 if n <= 1000 else 5
+        _, json_body, msgpack_body, json_emb, msgpack_emb = _payloads(n)
+
+        result.append(Case(
+            f"wire.decode.json[n={n}]",
+            lambda body=json_body: MatchFreelancersRequest.model_validate_json(body),
+            items=n,
+            iterations=iterations,
+        ))
+        result.append(Case(
+            f"wire.decode.msgpack[n={n}]",
+            lambda body=msgpack_body: FreelancerColumns.decode(unpack(body)["freelancers"]),
+            items=n,
+            iterations=iterations,
+        ))
+        # Precomputed embeddings: float lists in JSON vs one float32 buffer
+        result.append(Case(
+            f"wire.decode.json+embeddings[n={n}]",
+            lambda body=json_emb: [np.asarray(f["embedding"], dtype=np.float32) for f in json.loads(body)["freelancers"]],
+            items=n,
+            iterations=iterations,
+        ))
+        result.append(Case(
+            f"wire.decode.msgpack+embeddings[n={n}]",
+            lambda body=msgpack_emb: FreelancerColumns.decode(unpack(body)["freelancers"]).embedding,
+            items=n,
+            iterations=iterations,
+        ))
+
+        rows = _results(n)
+        matches = [FreelancerMatch(**r) for r in rows]
+        columns = {name: [r[name] for r in rows] for name in rows[0]}
+        for name in ("match_score", "skill_match", "experience_match", "rate_match"):
+            columns[name] = np.array(columns[name])
+        result.append(Case(
+            f"wire.encode.json[n={n}]",
+            lambda matches=matches: json.dumps([m.model_dump() for m in matches]).encode(),
+            items=n,
+            iterations=iterations,
+        ))
+        result.append(Case(
+            f"wire.encode.msgpack[n={n}]",
+            lambda columns=columns: pack(columns),
+            items=n,
+            iterations=iterations,
+        ))
+        result.append(Case(
+            f"wire.encode.columns_to_json[n={n}]",
+            lambda columns=columns: json.dumps(columns_to_rows(columns)).encode(),
+            items=n,
+            iterations=iterations,
+        ))
+    return result
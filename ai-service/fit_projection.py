@@ -0,0 +1,139 @@
+"""Fit and evaluate the PCA projection used for two-stage embedding search
+
+Run from the ai-service directory:
+
+    python fit_projection.py fit --texts corpus.txt --dim 128 --output models/minilm-pca128.npz
+    python fit_projection.py evaluate --texts corpus.txt --dims 32,64,128,192 --k 20
+
+The corpus is one document per line (--texts), precomputed embeddings
+(--embeddings file.npy), or generated profiles and jobs (--synthetic N). For
+a file corpus, --queries documents are held out and used as queries.
+Synthetic runs use job texts as queries against freelancer profiles.
+
+evaluate reports, per dimension, recall@k of the two-stage search against
+exact search, and the speedup of the two-stage search over an exact
+full-vector scan. Point EMBEDDING_PROJECTION_PATH at the fitted file to
+enable two-stage search in the service.
+"""
+from dotenv import load_dotenv
+import argparse
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+
+load_dotenv()
+
+
+def load_corpus(args: argparse.Namespace) -> Tuple[np.ndarray, np.ndarray]:
+    """Document and query embeddings"""
+    from app.services.embedding_service import get_embedding_service
+
+    rng = np.random.default_rng(args.seed)
+    if args.synthetic:
+        from benchmarks import data
+
+        service = get_embedding_service()
+        profiles = data.freelancer_profiles(args.synthetic, seed=args.seed)
+        jobs = data.jobs(args.queries, seed=args.seed + 1)
+        documents = service.encode_documents([f"{p['bio'] or ''} Skills: {', '.join(p['skills'])}" for p in profiles])
+        queries = service.encode_documents([f"{j['description']} Skills: {', '.join(j['skills'])}" for j in jobs])
+        return documents, queries
+
+    if args.embeddings:
+        embeddings = np.load(args.embeddings)
+    else:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+        embeddings = get_embedding_service().encode_documents(texts)
+
+    order = rng.permutation(len(embeddings))
+    held_out = min(args.queries, len(embeddings) // 10)
+    return embeddings[order[held_out:]], embeddings[order[:held_out]]
+
+
+def fit(args: argparse.Namespace) -> None:
+    from app.services.projection import EmbeddingProjection
+
+    documents, _ = load_corpus(args)
+    full = EmbeddingProjection.fit(documents, documents.shape[1], os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    projection = full.truncate(args.dim)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    projection.save(args.output)
+    print(f"{len(documents)} documents, {documents.shape[1]} -> {args.dim} dims, "
+          f"{projection.explained_ratio(float(full.explained_variance.sum())):.1%} of variance kept")
+    print(f"wrote {args.output}; set EMBEDDING_PROJECTION_PATH to use it")
+
+
+def best_time(search, queries: np.ndarray, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            search(query)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(queries)
+
+
+def evaluate(args: argparse.Namespace) -> None:
+    from app.services.embedding_index import EmbeddingIndex
+    from app.services.projection import EmbeddingProjection
+
+    documents, queries = load_corpus(args)
+    dims = [int(d) for d in args.dims.split(",")]
+    fitted = EmbeddingProjection.fit(documents, documents.shape[1])
+    total_variance = float(fitted.explained_variance.sum())
+    ids = [str(i) for i in range(len(documents))]
+
+    exact_index = EmbeddingIndex()
+    exact_index.upsert_many(ids, documents)
+    truth = [{i for i, _ in exact_index.search(q, args.k)} for q in queries]
+    exact_time = best_time(lambda q: exact_index.search(q, args.k), queries, args.repeat)
+
+    print(f"{len(documents)} documents, {len(queries)} queries, dim {documents.shape[1]}, "
+          f"top {args.k}, re-rank depth {args.rerank_depth}")
+    print(f"exact: {exact_time * 1000:.2f} ms/query")
+    print(f"{'dims':>5} {'variance':>9} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+    for dim in dims:
+        projection = fitted.truncate(dim)
+        index = EmbeddingIndex(projection=projection, rerank_depth=args.rerank_depth)
+        index.upsert_many(ids, documents)
+        recall = np.mean([
+            len(truth[n] & {i for i, _ in index.search(q, args.k)}) / max(len(truth[n]), 1)
+            for n, q in enumerate(queries)
+        ])
+        elapsed = best_time(lambda q: index.search(q, args.k), queries, args.repeat)
+        print(f"{dim:>5} {projection.explained_ratio(total_variance):>9.1%} {recall:>9.3f} "
+              f"{elapsed * 1000:>9.2f} {exact_time / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    for name in ("fit", "evaluate"):
+        sub = subcommands.add_parser(name)
+        source = sub.add_mutually_exclusive_group(required=True)
+        source.add_argument("--texts", help="Corpus file, one document per line")
+        source.add_argument("--embeddings", help="Precomputed corpus embeddings (.npy)")
+        source.add_argument("--synthetic", type=int, help="Generate this many freelancer profiles")
+        sub.add_argument("--queries", type=int, default=200)
+        sub.add_argument("--seed", type=int, default=0)
+        sub.add_argument("--stub-model", action="store_true", help="Use the benchmark stub instead of EMBEDDING_MODEL")
+    subcommands.choices["fit"].add_argument("--dim", type=int, default=128)
+    subcommands.choices["fit"].add_argument("--output", required=True)
+    subcommands.choices["evaluate"].add_argument("--dims", default="32,64,128,192")
+    subcommands.choices["evaluate"].add_argument("--k", type=int, default=20)
+    subcommands.choices["evaluate"].add_argument("--rerank-depth", type=int, default=300)
+    subcommands.choices["evaluate"].add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.stub_model:
+        from benchmarks.stub_model import install_stub_model
+        install_stub_model()
+
+    if args.command == "fit":
+        fit(args)
+    else:
+        evaluate(args)
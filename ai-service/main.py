@@ -1,11 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
 
-from app.routers import matching, recommendations, fraud, skills
+from app.routers import matching, recommendations, fraud, skills, cache, admin, top_matches
+from app import metrics
+from app.profiling import ProfilingMiddleware
+from app.deadline import DeadlineMiddleware
+from app.capture import CaptureMiddleware, get_traffic_capture
+from app.services.snapshot_service import SnapshotError, get_snapshot_service
+from app.services.model_migration import get_model_migrations
+from app.services.semantic_cache import get_semantic_match_cache
+from app.services.cache_service import get_response_cache
 
 app = FastAPI(
     title="GigaConnect AI Service",
@@ -22,11 +32,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (X-Profile header or PROFILING_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-request latency budgets (X-Latency-Budget-Ms) and the X-Scoring-Tier response header
+app.add_middleware(DeadlineMiddleware)
+
+# Opt-in sampled traffic capture for benchmarks.replay (CAPTURE_PATH, CAPTURE_SAMPLE_RATE)
+app.add_middleware(CaptureMiddleware)
+
 # Include routers
 app.include_router(matching.router, prefix="/api/matching", tags=["Matching"])
 app.include_router(recommendations.router, prefix="/api/recommendations", tags=["Recommendations"])
 app.include_router(fraud.router, prefix="/api/fraud", tags=["Fraud Detection"])
 app.include_router(skills.router, prefix="/api/skills", tags=["Skills"])
+app.include_router(top_matches.router, prefix="/api/top-matches", tags=["Top Matches"])
+app.include_router(cache.router, prefix="/api/cache", tags=["Cache"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
+
+# Embedding model migrations (/admin/embedding-model): texts re-encoded besides the embedding cache,
+# and state rebuilt once the new model serves traffic
+model_migrations = get_model_migrations()
+model_migrations.add_source(lambda: [("text", skill) for skill in skills.skills_service.skill_vocabulary])
+model_migrations.add_source(lambda: [("document", text) for text in top_matches.top_matches.document_texts()])
+model_migrations.add_switch_hook(get_semantic_match_cache().clear)
+model_migrations.add_switch_hook(skills.skills_service.clear_vocabulary_embeddings)
+model_migrations.add_switch_hook(lambda: asyncio.to_thread(top_matches.top_matches.reembed))
+model_migrations.add_switch_hook(
+    lambda: asyncio.gather(*(get_response_cache().invalidate_route(route) for route in get_response_cache().ttls))
+)
+
+
+@app.on_event("startup")
+async def restore_snapshot():
+    # Map the warm state of a previous process if SNAPSHOT_PATH holds a compatible bundle
+    snapshots = get_snapshot_service()
+    if snapshots is not None:
+        try:
+            snapshots.restore()
+        except SnapshotError:
+            pass  # start cold; GET /admin/snapshot reports why
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Applies queued job/profile changes to the materialized top-match lists
+    app.state.top_matches_refresher = asyncio.create_task(top_matches.top_matches.run())
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    top_matches.top_matches.stop()
+    await app.state.top_matches_refresher
+    if model_migrations.active() is not None:
+        model_migrations.active().cancel()
+
+
+@app.on_event("shutdown")
+async def close_traffic_capture():
+    capture = get_traffic_capture()
+    if capture is not None:
+        await asyncio.to_thread(capture.close)
+
+
+@app.on_event("shutdown")
+async def write_snapshot():
+    snapshots = get_snapshot_service()
+    if snapshots is not None and os.getenv("SNAPSHOT_ON_SHUTDOWN", "true").lower() == "true":
+        snapshots.write()
 
 
 @app.get("/")
@@ -39,6 +113,12 @@ async def health_check():
     return {"status": "healthy", "service": "ai-service"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency, encode volume, batch sizes and cache outcomes in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,53 @@
+import json
+
+from app.capture import Pseudonymizer
+
+BACKEND_USER = {
+    "user_data": {
+        "user_id": "clx9k2f0a0000qz8h1b2c3d4e",
+        "email": "maria.gonzalez@example.com",
+        "firstName": "Maria",
+        "lastName": "Gonzalez",
+        "username": "mgonzalez",
+        "displayName": "Maria G.",
+        "phoneNumber": "+1 415 555 0134",
+        "phone_number": "4155550134",
+        "address": {"street": "221 Market St", "city": "San Francisco", "zip": 94105},
+        "freelancer_name": "Maria Gonzalez",
+        "headline": "Senior Python developer",
+        "bio": "Maria Gonzalez from San Francisco, Python and React developer",
+        "skills": ["Python", "React"],
+        "hourly_rate": 85,
+        "account_age_days": 12,
+        "email_verified": True,
+        "ip_addresses": ["203.0.113.7"],
+        "payment_fingerprints": ["card_4242"],
+    },
+    "activity_data": {"failed_payments": 1, "lastLoginIp": "203.0.113.7"},
+}
+
+
+def test_backend_user_record_has_no_clear_text_pii():
+    pseudonymizer = Pseudonymizer(b"secret", keep_words={"python", "react", "developer"})
+    captured = pseudonymizer.payload(BACKEND_USER)
+    written = json.dumps(captured)
+
+    for value in ("maria", "gonzalez", "mgonzalez", "415", "0134", "market", "francisco", "94105",
+                  "203.0.113.7", "4242", "clx9k2f0a"):
+        assert value not in written.lower()
+
+    user = captured["user_data"]
+    assert user["skills"] == ["Python", "React"]
+    assert user["hourly_rate"] == 85
+    assert user["account_age_days"] == 12
+    assert user["email_verified"] is True
+    assert captured["activity_data"]["failed_payments"] == 1
+    # Free text keeps its shape and skill words
+    assert len(user["bio"].split()) == len(BACKEND_USER["user_data"]["bio"].split())
+    assert "Python" in user["bio"]
+
+
+def test_pseudonyms_are_stable_per_secret():
+    a, b = Pseudonymizer(b"secret"), Pseudonymizer(b"other")
+    assert a.payload({"user_id": "u1"}) == a.payload({"user_id": "u1"})
+    assert a.payload({"user_id": "u1"}) != b.payload({"user_id": "u1"})